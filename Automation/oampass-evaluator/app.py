@@ -1,21 +1,92 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from pathlib import Path
 from io import BytesIO
+import hashlib
+import os
+from pathlib import Path
 
-from oampass.db import get_conn, init_db
-from oampass.db_ops import insert_entry, insert_features, fetch_joined
-from oampass.features import compute_all
-from oampass.scoring import compute_risk_index, risk_label
+from oampass.config import CACHE_DIR, DB_PATH
+from oampass.db import ConnectionManager
+from oampass.db_ops import fetch_page, fetch_stats, fetch_totals
+from oampass.export import export_db
+from oampass.fingerprint import load_key
+from oampass.importer import store_evaluation
 
 st.set_page_config(page_title="OAMpass Evaluator (SQLite)", layout="wide")
 
-APP_DIR = Path(__file__).resolve().parent
-DB_PATH = APP_DIR / "data" / "oampass.sqlite"
+EXPORT_DIR = CACHE_DIR / "exports"
+EXPORT_KEEP = 8
+EXPORT_MIME = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+EXPORT_SUFFIXES = tuple("." + fmt for fmt in EXPORT_MIME)
+
+
+@st.cache_resource
+def get_db() -> ConnectionManager:
+    # One manager per server process: WAL, per-thread readers, one batching writer.
+    return ConnectionManager(DB_PATH)
+
+@st.cache_resource
+def get_fingerprint_key() -> bytes:
+    return load_key()
+
+db = get_db()
 
-conn = get_conn(DB_PATH)
-init_db(conn)
+# Cached reads. `version` is db.data_version(): it changes only when something is
+# committed, so reruns with unchanged data are served from the cache.
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_page(version: int, order: str, cursor: tuple | None, limit: int, filters: tuple) -> tuple[pd.DataFrame, tuple | None]:
+    page = fetch_page(get_db().reader(), order=order, cursor=cursor, limit=limit, **dict(filters))
+    df = pd.DataFrame([dict(r) for r in page.rows]) if page.rows else pd.DataFrame()
+    return df, page.next_cursor
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_stats(version: int) -> tuple[dict, pd.DataFrame, pd.DataFrame]:
+    conn = get_db().reader()
+    by_tool = pd.DataFrame([dict(r) for r in fetch_stats(conn, "tool")])
+    by_label = pd.DataFrame([dict(r) for r in fetch_stats(conn, "label")])
+    return fetch_totals(conn), by_tool, by_label
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def histogram_png(version: int, view: tuple) -> bytes:
+    df, _ = load_page(version, *view)
+    fig, ax = plt.subplots()
+    ax.hist(df["RiskIndex"].astype(float), bins=20)
+    ax.set_title("RiskIndex distribution (rows in view)")
+    ax.set_xlabel("RiskIndex")
+    ax.set_ylabel("Count")
+    buf = BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
+
+def _mtime(p: Path) -> float:
+    try:
+        return p.stat().st_mtime
+    except FileNotFoundError:  # pruned by another session meanwhile
+        return 0.0
+
+def export_file(version: int, order: str, filters: tuple, fmt: str) -> str:
+    # Streamed from SQLite to disk in chunks; every row matching the filters, not just this page.
+    # Not st.cache_data: the file on disk is the cache, so a path is never returned after
+    # the cleanup below has deleted it.
+    view_hash = hashlib.sha256(repr((version, order, filters)).encode()).hexdigest()[:16]
+    path = EXPORT_DIR / f"oampass_db_export-{view_hash}.{fmt}"
+    try:
+        os.utime(path)  # mark as recently used for the cleanup (unlike touch(), never creates it)
+    except FileNotFoundError:
+        export_db(get_db().reader(), path, fmt=fmt, order=order, **dict(filters))
+        # Keep only the EXPORT_KEEP most recently used finished files; export_db writes to
+        # "<name>.part" first, and another session's in-flight export must not be removed.
+        done = [p for p in EXPORT_DIR.glob("oampass_db_export-*") if p.name.endswith(EXPORT_SUFFIXES)]
+        for p in sorted(done, key=_mtime)[:-EXPORT_KEEP]:
+            p.unlink(missing_ok=True)
+    return str(path)
 
 st.title("OAMpass Evaluator (SQLite-backed)")
 st.caption("Enter a password → auto-compute attributes → store in SQLite (hashed, no plaintext) → rank & export.")
@@ -24,6 +95,25 @@ with st.sidebar:
     st.header("Database")
     st.write(f"DB file: `{DB_PATH.as_posix()}`")
 
+    st.header("Browse")
+    order = st.radio("Sort by", ["recent", "risk"], format_func={"recent": "Newest first", "risk": "Highest risk first"}.get)
+    f_tool = st.text_input("Tool is", value="").strip()
+    f_label = st.selectbox("AutoRiskLabel", ["(any)", "Risky", "Medium", "Safe"])
+    f_risk = st.slider("RiskIndex range", 0.0, 100.0, (0.0, 100.0))
+    page_size = st.select_slider("Rows per page", [100, 250, 500, 1000, 2000], value=500)
+
+filters = {
+    "tool": f_tool or None,
+    "label": None if f_label == "(any)" else f_label,
+    "risk_min": f_risk[0] if f_risk[0] > 0.0 else None,
+    "risk_max": f_risk[1] if f_risk[1] < 100.0 else None,
+}
+# Keyset pagination: keep the cursor of every visited page; reset when the view changes.
+view_key = (order, page_size, tuple(sorted(filters.items())))
+if st.session_state.get("view_key") != view_key:
+    st.session_state.view_key = view_key
+    st.session_state.cursors = [None]
+
 st.subheader("Add a password (stored in SQLite)")
 c1, c2, c3 = st.columns([3, 2, 2])
 with c1:
@@ -34,51 +124,71 @@ with c3:
     st.write("Label is computed automatically")
 
 if st.button("Add & evaluate", type="primary", disabled=(not pw.strip())):
-    feats = compute_all(pw.strip())
-    rix = float(compute_risk_index(feats))
-    auto = risk_label(rix)
-    entry_id = insert_entry(conn, pw.strip(), tool.strip() or None, source="user_input")
-    insert_features(conn, entry_id, feats, rix, auto)
-    st.success(f"Saved (id={entry_id}) — AutoRiskLabel: {auto}, RiskIndex: {rix:.1f}")
+    # Known passwords (same keyed fingerprint) reuse the stored evaluation.
+    ev = db.write(store_evaluation, pw.strip(), tool.strip() or None, source="user_input", fingerprint_key=get_fingerprint_key())
+    seen = f" — already evaluated, seen {ev.occurrences}×" if ev.reused else ""
+    st.success(f"Saved (id={ev.entry_id}) — AutoRiskLabel: {ev.auto_label}, RiskIndex: {ev.risk_index:.1f}{seen}")
 
 st.divider()
 
-rows = fetch_joined(conn, limit=2000)
-df = pd.DataFrame([dict(r) for r in rows]) if rows else pd.DataFrame()
+version = db.data_version()
+view = (order, st.session_state.cursors[-1], page_size, tuple(sorted(filters.items())))
+df, next_cursor = load_page(version, *view)
 
-st.subheader("Latest stored entries (from SQLite)")
+st.subheader("Stored entries (from SQLite)")
+n1, n2, n3 = st.columns([1, 1, 4])
+with n1:
+    if st.button("← Previous", disabled=len(st.session_state.cursors) == 1):
+        st.session_state.cursors.pop()
+        st.rerun()
+with n2:
+    if st.button("Next →", disabled=next_cursor is None):
+        st.session_state.cursors.append(next_cursor)
+        st.rerun()
+with n3:
+    st.caption(f"Page {len(st.session_state.cursors)}")
 st.dataframe(df, use_container_width=True, height=420)
 
 if not df.empty:
+    # Whole-database numbers come from the trigger-maintained risk_stats table.
+    totals, by_tool, by_label = load_stats(version)
     st.subheader("Quick stats")
-    s1, s2, s3 = st.columns(3)
+    s1, s2, s3, s4 = st.columns(4)
     with s1:
         st.metric("Rows in view", len(df))
     with s2:
-        st.metric("Risky (Auto)", int((df["AutoRiskLabel"] == "Risky").sum()))
+        st.metric("Rows stored", totals["count"])
     with s3:
-        st.metric("Avg RiskIndex", float(df["RiskIndex"].mean()))
+        st.metric("Risky (Auto)", int(totals["by_label"].get("Risky", 0)))
+    with s4:
+        st.metric("Avg RiskIndex", float(totals["mean"] or 0.0))
 
-    fig, ax = plt.subplots()
-    ax.hist(df["RiskIndex"].astype(float), bins=20)
-    ax.set_title("RiskIndex distribution (from DB)")
-    ax.set_xlabel("RiskIndex")
-    ax.set_ylabel("Count")
-    st.pyplot(fig)
-
-    st.subheader("Export")
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
-    st.download_button("Download CSV export", csv_bytes, file_name="oampass_db_export.csv", mime="text/csv")
-
-    # Excel export
-    out = BytesIO()
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="DB_Export")
-    st.download_button(
-        "Download Excel export",
-        out.getvalue(),
-        file_name="oampass_db_export.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+    t1, t2 = st.columns(2)
+    with t1:
+        st.caption("By tool")
+        st.dataframe(by_tool, use_container_width=True)
+    with t2:
+        st.caption("By AutoRiskLabel")
+        st.dataframe(by_label, use_container_width=True)
+
+    st.image(histogram_png(version, view))
+
+    # Export files are only written once the user asks for them.
+    st.subheader("Export (all rows matching the filters)")
+    fmt = st.radio("Format", ["csv", "csv.gz", "xlsx"], horizontal=True, format_func={"csv": "CSV", "csv.gz": "CSV (gzip)", "xlsx": "Excel"}.get)
+    export_key = (version, order, view[3], fmt)
+    if st.button("Prepare export"):
+        st.session_state.export_key = export_key
+    if st.session_state.get("export_key") == export_key:
+        # st.download_button reads the whole file into server memory (and keeps it for the
+        # session), so this suits exports up to a few hundred MB; for larger databases use
+        # `python -m oampass.cli export`, which streams straight to disk.
+        with open(export_file(*export_key), "rb") as f:
+            st.download_button(
+                f"Download {fmt} export",
+                f,
+                file_name=f"oampass_db_export.{fmt}",
+                mime=EXPORT_MIME[fmt],
+            )
 else:
-    st.info("Database is empty. Add a password above.")
+    st.info("No stored entries match this view. Add a password above or relax the filters.")
@@ -0,0 +1,90 @@
+"""Compare a benchmark run against a baseline and fail on regressions.
+
+    python benchmarks/compare.py BASELINE.json CURRENT.json --threshold 0.15 \
+        --case-threshold "db.*=0.30"
+
+A case regresses when its best time grows by more than its threshold
+(0.15 = 15% slower). Exit status is 1 if any case regressed, else 0.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class Comparison:
+    case: str
+    baseline_s: float
+    current_s: float
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        return self.current_s / self.baseline_s - 1.0 if self.baseline_s > 0 else 0.0
+
+    @property
+    def regressed(self) -> bool:
+        return self.change > self.threshold
+
+
+def _threshold_for(case: str, default: float, overrides: list[tuple[str, float]]) -> float:
+    # Last matching pattern wins
+    value = default
+    for pattern, threshold in overrides:
+        if fnmatch.fnmatch(case, pattern):
+            value = threshold
+    return value
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.15, overrides: list[tuple[str, float]] = ()) -> list[Comparison]:
+    """Cases present in both reports, compared on best time."""
+    out = []
+    for case, cur in current["results"].items():
+        base = baseline["results"].get(case)
+        if base is None:
+            continue
+        out.append(Comparison(case, base["best_s"], cur["best_s"], _threshold_for(case, threshold, list(overrides))))
+    return out
+
+
+def _parse_override(text: str) -> tuple[str, float]:
+    pattern, _, value = text.rpartition("=")
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"expected PATTERN=THRESHOLD, got {text!r}")
+    return pattern, float(value)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Compare benchmark JSON files.")
+    ap.add_argument("baseline")
+    ap.add_argument("current")
+    ap.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown as a fraction (default 0.15).")
+    ap.add_argument("--case-threshold", type=_parse_override, action="append", default=[], help="PATTERN=THRESHOLD for matching cases.")
+    args = ap.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    if (baseline.get("rows"), baseline.get("spec")) != (current.get("rows"), current.get("spec")):
+        print("warning: runs used different rows/spec; timings may not be comparable")
+
+    rows = compare(baseline, current, args.threshold, args.case_threshold)
+    for c in rows:
+        flag = "REGRESSED" if c.regressed else "ok"
+        print(f"{c.case:<40} {c.baseline_s * 1e3:10.2f} ms -> {c.current_s * 1e3:10.2f} ms  {c.change:+7.1%}  (limit {c.threshold:+.0%})  {flag}")
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"not in current run: {', '.join(missing)}")
+    regressed = [c.case for c in rows if c.regressed]
+    if regressed:
+        print(f"{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
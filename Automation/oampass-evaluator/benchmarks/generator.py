@@ -0,0 +1,65 @@
+"""Seeded synthetic password lists for benchmarks.
+
+The same spec and seed always give the same list, so timings from different
+commits are comparable.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import random
+import string
+
+from oampass.config import COMMON_WEAK_WORDS, WORDLIST_PATH
+
+CHAR_CLASSES = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": "!@#$%^&*()-_=+[]{};:,.?/",
+    "x": "éüßçñøåÆΩЖ日本",  # non-ASCII
+}
+
+
+@dataclass(frozen=True)
+class PasswordSpec:
+    min_len: int = 6
+    max_len: int = 20
+    classes: str = "luds"  # keys of CHAR_CLASSES to draw random characters from
+    dictionary_rate: float = 0.3  # share of new passwords that embed a dictionary word
+    duplicate_rate: float = 0.2  # share of rows that repeat an earlier password (skewed to popular ones)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _dictionary_words() -> list[str]:
+    words = list(COMMON_WEAK_WORDS)
+    if WORDLIST_PATH.exists():
+        for line in WORDLIST_PATH.read_text(encoding="utf-8", errors="ignore").splitlines():
+            w = line.strip()
+            if w and not w.startswith("#") and w.isalpha():
+                words.append(w)
+    return words
+
+
+def generate_passwords(n: int, spec: PasswordSpec = PasswordSpec(), *, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    alphabet = "".join(CHAR_CLASSES[c] for c in spec.classes)
+    words = _dictionary_words() if spec.dictionary_rate > 0 else []
+    out: list[str] = []
+    for _ in range(n):
+        if out and rng.random() < spec.duplicate_rate:
+            # rng.random() ** 3 favours early rows, giving a few very common passwords
+            out.append(out[int(len(out) * rng.random() ** 3)])
+            continue
+        length = rng.randint(spec.min_len, spec.max_len)
+        chars = [rng.choice(alphabet) for _ in range(length)]
+        if words and rng.random() < spec.dictionary_rate:
+            word = rng.choice(words)
+            if rng.random() < 0.5:
+                word = word.capitalize()
+            at = rng.randint(0, max(0, length - len(word)))
+            chars[at:at + len(word)] = word
+        out.append("".join(chars))
+    return out
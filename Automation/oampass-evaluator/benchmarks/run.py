@@ -0,0 +1,197 @@
+"""Time startup, feature extraction, scoring, loading, summarizing and DB import.
+
+    python benchmarks/run.py --rows 20000 --out benchmarks/results/latest.json
+    python benchmarks/compare.py benchmarks/results/baseline.json benchmarks/results/latest.json
+
+Each case runs `--repeat` times on the same seeded input and records the best
+and median wall time (seconds), plus a throughput figure. Results are written
+as JSON together with the generator spec and environment details.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import fnmatch
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.generator import PasswordSpec, generate_passwords  # noqa: E402
+from oampass import __version__, features  # noqa: E402
+from oampass.analysis import summarize  # noqa: E402
+from oampass.config import OAMPASS_DERIVED_COLUMNS  # noqa: E402
+from oampass.db import init_db  # noqa: E402
+from oampass.dictionary import get_automaton  # noqa: E402
+from oampass.features_batch import compute_all_batch, compute_all_dedup  # noqa: E402
+from oampass.importer import bulk_import_dataframe  # noqa: E402
+from oampass.io import load_oampass_excel  # noqa: E402
+from oampass.scoring import compute_risk_index, compute_risk_index_batch  # noqa: E402
+
+SAMPLE_XLSX = ROOT / "data" / "OAMpass_sample.xlsx"
+
+# OAMPASS_DERIVED_COLUMNS name -> scalar function in oampass.features
+FEATURE_FUNCS: dict[str, Callable[[str], int]] = {
+    "Length": features.length,
+    "HasUpper": features.has_upper,
+    "HasLower": features.has_lower,
+    "HasDigit": features.has_digit,
+    "HasSymbol": features.has_symbol,
+    "CountUpper": features.count_upper,
+    "CountLower": features.count_lower,
+    "CountDigit": features.count_digit,
+    "CountSymbol": features.count_symbol,
+    "StartsWithDigit": features.starts_with_digit,
+    "EndsWithSymbol": features.ends_with_symbol,
+    "HasRepeatedChars": features.has_repeated_chars,
+    "HasDictionaryWord": features.has_dictionary_word,
+    "IsPalindrome": features.is_palindrome,
+    "HasSequential": features.has_sequential,
+    "UniqueChars": features.unique_chars,
+    "AsciiRange": features.ascii_range,
+}
+assert list(FEATURE_FUNCS) == OAMPASS_DERIVED_COLUMNS
+
+
+def _time(fn: Callable[[], object], repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _result(times: list[float], items: int, unit: str) -> dict:
+    best = min(times)
+    return {
+        "best_s": best,
+        "median_s": statistics.median(times),
+        "repeat": len(times),
+        "items": items,
+        "unit": unit,
+        "per_s": items / best if best > 0 else None,
+    }
+
+
+def _run_python(args: list[str], stdin: str = "") -> None:
+    subprocess.run([sys.executable, *args], cwd=ROOT, input=stdin, capture_output=True, text=True, check=True)
+
+
+def build_cases(passwords: list[str]) -> dict[str, tuple[Callable[[], object], int, str]]:
+    """name -> (callable, items processed per call, unit)."""
+    n = len(passwords)
+    cases: dict[str, tuple[Callable[[], object], int, str]] = {}
+
+    # Fresh interpreter each time: guards the `oampass score` start-up budget
+    cases["startup.oampass_score"] = (lambda: _run_python(["-m", "oampass", "score", "-"], "Tr0ub4dor&3\n"), 1, "runs")
+    cases["startup.import_cli"] = (lambda: _run_python(["-c", "import oampass.cli"]), 1, "runs")
+
+    for name, fn in FEATURE_FUNCS.items():
+        cases[f"features.{name}"] = (lambda fn=fn: [fn(p) for p in passwords], n, "passwords")
+    cases["features.compute_all"] = (lambda: [features.compute_all(p) for p in passwords], n, "passwords")
+    cases["features.compute_all_batch"] = (lambda: compute_all_batch(passwords), n, "passwords")
+    cases["features.compute_all_dedup"] = (lambda: compute_all_dedup(passwords), n, "passwords")
+
+    feats = [features.compute_all(p) for p in passwords]
+    feats_df = compute_all_batch(passwords)
+    cases["scoring.compute_risk_index"] = (lambda: [compute_risk_index(f) for f in feats], n, "rows")
+    cases["scoring.compute_risk_index_batch"] = (lambda: compute_risk_index_batch(feats_df), n, "rows")
+
+    if SAMPLE_XLSX.exists():
+        cases["io.load_oampass_excel"] = (lambda: load_oampass_excel(SAMPLE_XLSX), 1, "workbooks")
+        cases["io.load_oampass_excel_recompute"] = (
+            lambda: load_oampass_excel(SAMPLE_XLSX, recompute_missing=True, recompute_riskindex=True), 1, "workbooks",
+        )
+
+    table = feats_df.assign(
+        Password=passwords,
+        RiskIndex=compute_risk_index_batch(feats_df),
+        Tool=[f"Tool{i % 5}" for i in range(n)],
+        Label=["Risky" if i % 3 == 0 else "Safe" for i in range(n)],
+    )
+    cases["analysis.summarize"] = (lambda: summarize(table), n, "rows")
+
+    import_df = pd.DataFrame({"Password": passwords, "Tool": table["Tool"]})
+
+    def db_import(**kwargs) -> None:
+        conn = sqlite3.connect(":memory:")
+        init_db(conn)
+        bulk_import_dataframe(conn, import_df, recompute=True, **kwargs)
+        conn.close()
+
+    cases["db.import"] = (db_import, n, "rows")
+    cases["db.import_fingerprint"] = (lambda: db_import(fingerprint_key=b"benchmark"), n, "rows")
+    return cases
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=20000, help="Synthetic passwords per case.")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-len", type=int, default=PasswordSpec.min_len)
+    ap.add_argument("--max-len", type=int, default=PasswordSpec.max_len)
+    ap.add_argument("--classes", default=PasswordSpec.classes, help="Character classes: l,u,d,s,x (non-ASCII).")
+    ap.add_argument("--dictionary-rate", type=float, default=PasswordSpec.dictionary_rate)
+    ap.add_argument("--duplicate-rate", type=float, default=PasswordSpec.duplicate_rate)
+    ap.add_argument("--only", action="append", default=None, help="Glob of case names to run (repeatable).")
+    ap.add_argument("--out", default=None, help="JSON output (default: benchmarks/results/<timestamp>.json).")
+    args = ap.parse_args(argv)
+
+    spec = PasswordSpec(args.min_len, args.max_len, args.classes, args.dictionary_rate, args.duplicate_rate)
+    passwords = generate_passwords(args.rows, spec, seed=args.seed)
+    get_automaton()  # exclude the one-off dictionary load from the first case
+
+    cases = build_cases(passwords)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if any(fnmatch.fnmatch(k, pat) for pat in args.only)}
+
+    results = {}
+    for name, (fn, items, unit) in cases.items():
+        fn()  # warm-up
+        results[name] = _result(_time(fn, args.repeat), items, unit)
+        r = results[name]
+        print(f"{name:<40} best {r['best_s'] * 1e3:10.2f} ms   {r['per_s'] or 0:14,.0f} {unit}/s")
+
+    now = datetime.now(timezone.utc)
+    report = {
+        "timestamp_utc": now.isoformat(),
+        "git_commit": _git_commit(),
+        "oampass_version": __version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "seed": args.seed,
+        "unique_ratio": len(set(passwords)) / len(passwords) if passwords else None,
+        "spec": spec.as_dict(),
+        "results": results,
+    }
+    out = Path(args.out) if args.out else ROOT / "benchmarks" / "results" / f"{now:%Y%m%dT%H%M%SZ}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,3 @@
+"""OAMpass evaluator: password feature extraction, risk scoring and reporting."""
+
+__version__ = "0.1.0"
@@ -0,0 +1,24 @@
+"""`python -m oampass ...`
+
+`score` is dispatched before anything else is imported so it stays fast;
+every other command goes to oampass.cli (which loads pandas).
+"""
+
+from __future__ import annotations
+
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "score":
+        from .quickscore import main as score_main
+
+        return score_main(argv[1:])
+    from .cli import main as cli_main
+
+    return cli_main(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,41 +1,92 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
+import csv
+import heapq
 import json
+import math
+import os
+import tempfile
+import numpy as np
 import pandas as pd
 
+from . import config
+from .instrument import NULL_TIMER, StageTimer
+from .sketch import SKETCH_MODES, RiskSketch
+
 @dataclass(frozen=True)
 class SummaryTables:
     ranked: pd.DataFrame
     by_tool: pd.DataFrame
     by_label: pd.DataFrame
 
-def make_ranked(df: pd.DataFrame) -> pd.DataFrame:
-    ranked = df.copy()
-    ranked = ranked.sort_values(["RiskIndex", "Password"], ascending=[False, True]).reset_index(drop=True)
+def _top_candidates(df: pd.DataFrame, k: int) -> pd.DataFrame:
+    # Rows that can make the top k: argpartition finds the k-th highest RiskIndex and
+    # every row tied with it is kept, so the Password tie-break still decides.
+    risk = pd.to_numeric(df["RiskIndex"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    if k >= risk.size:
+        return df
+    key = np.where(np.isnan(risk), -np.inf, risk)  # NaN ranks last, as in sort_values
+    cutoff = key[np.argpartition(key, risk.size - k)[risk.size - k]]
+    return df.take(np.flatnonzero(key >= cutoff))
+
+def select_top(df: pd.DataFrame, k: int) -> pd.DataFrame:
+    """The k riskiest rows in rank order (RiskIndex desc, Password asc), without Rank."""
+    cand = _top_candidates(df, max(0, int(k)))
+    return cand.sort_values(["RiskIndex", "Password"], ascending=[False, True], ignore_index=True).head(k)
+
+def make_ranked(df: pd.DataFrame, top: int | None = None) -> pd.DataFrame:
+    """Rank rows by RiskIndex desc, Password asc; `top` keeps only the first `top` ranks.
+
+    With `top`, only rows that can reach the top are sorted (a partial selection),
+    and the result equals make_ranked(df).head(top).
+    """
+    if top is not None:
+        ranked = select_top(df, top)
+    else:
+        # sort_values already returns a new frame; no extra copy of df
+        ranked = df.sort_values(["RiskIndex", "Password"], ascending=[False, True], ignore_index=True)
     ranked.insert(0, "Rank", ranked.index + 1)
     return ranked
 
-def summarize(df: pd.DataFrame) -> SummaryTables:
-    ranked = make_ranked(df)
+def summarize(df: pd.DataFrame, percentiles: Iterable[float] = (), top: int | None = None) -> SummaryTables:
+    """Ranked table plus exact per-Tool/per-Label stats (`percentiles` adds p90-style columns).
+
+    `top` limits the ranked table to the riskiest rows; the summaries still cover all rows.
+    """
+    ranked = make_ranked(df, top)
+    extra = {percentile_column(q): (lambda s, q=q: s.quantile(q)) for q in percentiles}
 
     by_tool = (
-        df.groupby("Tool", dropna=False)["RiskIndex"]
-        .agg(count="count", mean="mean", median="median", min="min", max="max")
+        df.groupby("Tool", dropna=False, observed=True)["RiskIndex"]
+        .agg(count="count", mean="mean", median="median", min="min", max="max", **extra)
         .reset_index()
         .sort_values("mean", ascending=False)
     )
 
     by_label = (
-        df.groupby("Label", dropna=False)["RiskIndex"]
-        .agg(count="count", mean="mean", median="median", min="min", max="max")
+        df.groupby("Label", dropna=False, observed=True)["RiskIndex"]
+        .agg(count="count", mean="mean", median="median", min="min", max="max", **extra)
         .reset_index()
         .sort_values("mean", ascending=False)
     )
 
     return SummaryTables(ranked=ranked, by_tool=by_tool, by_label=by_label)
 
-def export_artifacts(summaries: SummaryTables, outdir: str | Path, run_log: dict) -> dict:
+def export_artifacts(
+    summaries: SummaryTables,
+    outdir: str | Path,
+    run_log: dict,
+    *,
+    timer: StageTimer = NULL_TIMER,
+    extra_log: Callable[[], dict] | None = None,
+    sketch: "StreamingSummary | None" = None,
+) -> dict:
+    """Write the ranked/summary CSVs and run_log.json (and summary_sketch.json if `sketch` is given).
+
+    `extra_log` is called after the CSVs are written and merged into the log.
+    """
     out = Path(outdir)
     out.mkdir(parents=True, exist_ok=True)
 
@@ -44,16 +95,324 @@ def export_artifacts(summaries: SummaryTables, outdir: str | Path, run_log: dict
     label_path = out / "summary_by_label.csv"
     log_path = out / "run_log.json"
 
-    summaries.ranked.to_csv(ranked_path, index=False)
-    summaries.by_tool.to_csv(tool_path, index=False)
-    summaries.by_label.to_csv(label_path, index=False)
+    with timer.stage("write_csv"):
+        summaries.ranked.to_csv(ranked_path, index=False)
+        summaries.by_tool.to_csv(tool_path, index=False)
+        summaries.by_label.to_csv(label_path, index=False)
+        if sketch is not None:
+            save_summary_sketch(sketch, out / SKETCH_FILENAME)
 
+    if extra_log is not None:
+        run_log = dict(run_log, **extra_log())
     with log_path.open("w", encoding="utf-8") as f:
         json.dump(run_log, f, indent=2, ensure_ascii=False)
 
-    return {
+    paths = {
         "ranked_csv": str(ranked_path),
         "summary_by_tool_csv": str(tool_path),
         "summary_by_label_csv": str(label_path),
         "run_log_json": str(log_path),
     }
+    if sketch is not None:
+        paths["summary_sketch_json"] = str(out / SKETCH_FILENAME)
+    return paths
+
+
+# --- Streaming variants (inputs too large for one DataFrame) ---
+
+SUMMARY_COLUMNS = ["count", "mean", "median", "min", "max"]
+# Mergeable per-group sketches of a run (export_*artifacts(sketch=/save_sketch=))
+SKETCH_FILENAME = "summary_sketch.json"
+
+
+def percentile_column(q: float) -> str:
+    """Summary column name for quantile q (0.9 -> "p90", 0.995 -> "p99.5")."""
+    return f"p{q * 100:g}"
+
+
+def _group_name(name):
+    # Missing keys (NaN from groupby(dropna=False) or JSON null) share one group
+    return math.nan if name is None or (isinstance(name, float) and math.isnan(name)) else name
+
+
+@dataclass
+class _GroupStats:
+    count: int = 0
+    total: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    sketch: RiskSketch = field(default_factory=RiskSketch)
+
+    def merge(self, other: "_GroupStats") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def median(self) -> float:
+        return self.sketch.quantile(0.5)
+
+
+class StreamingSummary:
+    """Per-Tool / per-Label RiskIndex statistics accumulated chunk by chunk.
+
+    Produces the same tables as summarize() without holding all rows;
+    summaries of separate chunks or shards can be combined with merge(), also
+    across processes via to_dict()/from_dict(). count/mean/min/max are exact;
+    median and percentiles come from a RiskSketch (see oampass.sketch for the
+    modes and error bounds).
+    """
+
+    def __init__(self, keys: tuple[str, ...] = ("Tool", "Label"), *, mode: str = "auto"):
+        if mode not in SKETCH_MODES:
+            raise ValueError(f"unknown sketch mode {mode!r}; expected one of {SKETCH_MODES}")
+        self.keys = tuple(keys)
+        self.mode = mode
+        self.groups: dict[str, dict] = {k: {} for k in self.keys}
+
+    def _new_group(self) -> _GroupStats:
+        return _GroupStats(sketch=RiskSketch(self.mode))
+
+    def update(self, df: pd.DataFrame) -> None:
+        risk = pd.to_numeric(df["RiskIndex"], errors="coerce")
+        for key in self.keys:
+            for name, s in risk.groupby(df[key], dropna=False, observed=True):
+                s = s.dropna()
+                g = self.groups[key].setdefault(_group_name(name), self._new_group())
+                if not s.size:
+                    continue
+                g.count += int(s.size)
+                g.total += float(s.sum())
+                g.min = min(g.min, float(s.min()))
+                g.max = max(g.max, float(s.max()))
+                g.sketch.update(s.to_numpy())
+
+    def merge(self, other: "StreamingSummary") -> None:
+        if other.keys != self.keys:
+            raise ValueError(f"cannot merge summaries over {other.keys} into {self.keys}")
+        for key in self.keys:
+            for name, g in other.groups[key].items():
+                self.groups[key].setdefault(_group_name(name), self._new_group()).merge(g)
+
+    @property
+    def exact(self) -> bool:
+        """True while every group's median/percentiles are exact."""
+        return all(g.sketch.exact for groups in self.groups.values() for g in groups.values())
+
+    def table(self, key: str, percentiles: Iterable[float] = ()) -> pd.DataFrame:
+        qs = list(percentiles)
+        pcols = [percentile_column(q) for q in qs]
+        rows = []
+        for name in sorted(self.groups[key], key=str):
+            g = self.groups[key][name]
+            n = g.count
+            row = {
+                key: name,
+                "count": n,
+                "mean": g.total / n if n else math.nan,
+                "median": g.median(),
+                "min": g.min if n else math.nan,
+                "max": g.max if n else math.nan,
+            }
+            row.update(zip(pcols, g.sketch.quantiles(qs)))
+            rows.append(row)
+        out = pd.DataFrame(rows, columns=[key, *SUMMARY_COLUMNS, *pcols])
+        return out.sort_values("mean", ascending=False, kind="stable")
+
+    def to_dict(self) -> dict:
+        """JSON-safe form; group names are kept as strings (NaN keys as null)."""
+        return {
+            "keys": list(self.keys),
+            "mode": self.mode,
+            "groups": {
+                key: [
+                    {"name": None if name is math.nan else str(name), "count": g.count, "total": g.total, "sketch": g.sketch.to_dict()}
+                    for name, g in groups.items()
+                ]
+                for key, groups in self.groups.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "StreamingSummary":
+        out = cls(tuple(d["keys"]), mode=d["mode"])
+        for key, groups in d["groups"].items():
+            for item in groups:
+                sketch = RiskSketch.from_dict(item["sketch"])
+                out.groups[key][_group_name(item["name"])] = _GroupStats(
+                    count=int(item["count"]), total=float(item["total"]), min=sketch.min, max=sketch.max, sketch=sketch
+                )
+        return out
+
+
+def _rank_key(row: list[str]) -> tuple:
+    # RiskIndex descending (NaN last), then Password ascending -- same as make_ranked
+    risk = float(row[1]) if row[1] else math.nan
+    return (math.isnan(risk), -risk if not math.isnan(risk) else 0.0, row[0])
+
+
+def write_ranked_csv(
+    chunks: Iterable[pd.DataFrame],
+    path: str | Path,
+    *,
+    tmpdir: str | Path | None = None,
+    timer: StageTimer = NULL_TIMER,
+    top: int | None = None,
+) -> int:
+    """Write results_ranked.csv for a stream of chunks with an external merge sort.
+
+    Each chunk is sorted like make_ranked() and spilled to a temporary run;
+    the runs are then merged lazily, so memory holds one chunk at a time.
+    At most config.SPILL_MERGE_FAN_IN runs are open at once: longer lists of
+    runs are first merged group-wise into intermediate runs.
+    With `top`, only a running top-`top` frame is kept instead (no spill).
+    Returns the number of rows written.
+    """
+    if top is not None:
+        return _write_top_csv(chunks, path, top, timer)
+    rows = 0
+    columns: list[str] | None = None
+    with tempfile.TemporaryDirectory(dir=tmpdir) as td:
+        runs: list[Path] = []
+        for df in chunks:
+            with timer.stage("sort_spill"):
+                if columns is None:
+                    columns = list(df.columns)
+                # Password and RiskIndex first so the merge key can read them by position
+                ordered = df[["Password", "RiskIndex"] + [c for c in columns if c not in ("Password", "RiskIndex")]]
+                ordered = ordered.sort_values(["RiskIndex", "Password"], ascending=[False, True], kind="stable")
+                run = Path(td) / f"run{len(runs):05d}.csv"
+                ordered.to_csv(run, index=False, header=False)
+                runs.append(run)
+
+        fan_in = max(2, int(config.SPILL_MERGE_FAN_IN))
+        passes = 0
+        while len(runs) > fan_in:
+            # Consecutive groups keep heapq.merge's stability: equal keys stay in stream order
+            with timer.stage("merge_pass"):
+                merged_runs = []
+                for g in range(0, len(runs), fan_in):
+                    group = runs[g:g + fan_in]
+                    run = Path(td) / f"pass{passes:02d}_{len(merged_runs):05d}.csv"
+                    with run.open("w", encoding="utf-8", newline="") as out:
+                        csv.writer(out).writerows(_merge_runs(group))
+                    for r in group:
+                        r.unlink()
+                    merged_runs.append(run)
+                runs = merged_runs
+                passes += 1
+
+        out_columns = ["Rank", *(columns or ["Password", "RiskIndex"])]
+        with timer.stage("merge_write"), Path(path).open("w", encoding="utf-8", newline="") as out:
+            w = csv.writer(out, lineterminator=os.linesep)
+            w.writerow(out_columns)
+            rest = [c for c in (columns or []) if c not in ("Password", "RiskIndex")]
+            src = {c: i for i, c in enumerate(["Password", "RiskIndex", *rest])}
+            order = [src[c] for c in out_columns[1:]]
+            for rows, rec in enumerate(_merge_runs(runs), start=1):
+                w.writerow([rows, *(rec[i] for i in order)])
+    return rows
+
+
+def _merge_runs(runs: list[Path]) -> Iterator[list[str]]:
+    """Lazily merge sorted run files (records in _rank_key order)."""
+    files = [r.open("r", encoding="utf-8", newline="") for r in runs]
+    try:
+        yield from heapq.merge(*(csv.reader(f) for f in files), key=_rank_key)
+    finally:
+        for f in files:
+            f.close()
+
+
+def _write_top_csv(chunks: Iterable[pd.DataFrame], path: str | Path, k: int, timer: StageTimer) -> int:
+    best: pd.DataFrame | None = None
+    for df in chunks:
+        with timer.stage("select_top"):
+            # Earlier rows come first in the concat, so equal keys keep stream order
+            best = select_top(df if best is None else pd.concat([best, df], ignore_index=True), k)
+    if best is None:
+        best = pd.DataFrame(columns=["Password", "RiskIndex"])
+    with timer.stage("merge_write"):
+        best.insert(0, "Rank", best.index + 1)
+        best.to_csv(path, index=False)
+    return len(best)
+
+
+def export_streamed_artifacts(
+    chunks: Iterable[pd.DataFrame],
+    outdir: str | Path,
+    run_log: dict,
+    *,
+    timer: StageTimer = NULL_TIMER,
+    extra_log: Callable[[], dict] | None = None,
+    summary_mode: str = "auto",
+    percentiles: Iterable[float] = (),
+    save_sketch: bool = False,
+    top: int | None = None,
+) -> dict:
+    """Streaming counterpart of summarize() + export_artifacts().
+
+    Writes the same four files; `run_log["rows"]` is filled in from the stream
+    (all rows, also when `top` limits results_ranked.csv).
+    `extra_log` is called once the stream is drained and merged into the log.
+    Medians/percentiles come from `summary_mode` sketches (see oampass.sketch);
+    `run_log["summary_exact"]` says whether they stayed exact.
+    """
+    out = Path(outdir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    ranked_path = out / "results_ranked.csv"
+    tool_path = out / "summary_by_tool.csv"
+    label_path = out / "summary_by_label.csv"
+    log_path = out / "run_log.json"
+
+    summary = StreamingSummary(mode=summary_mode)
+    percentiles = list(percentiles)
+
+    def tee() -> Iterable[pd.DataFrame]:
+        for df in chunks:
+            with timer.stage("summarize"):
+                summary.update(df)
+            yield df
+
+    rows = 0
+
+    def counted() -> Iterable[pd.DataFrame]:
+        nonlocal rows
+        for df in tee():
+            rows += len(df)
+            yield df
+
+    write_ranked_csv(counted(), ranked_path, tmpdir=out, timer=timer, top=top)
+    with timer.stage("write_csv"):
+        summary.table("Tool", percentiles).to_csv(tool_path, index=False)
+        summary.table("Label", percentiles).to_csv(label_path, index=False)
+        if save_sketch:
+            save_summary_sketch(summary, out / SKETCH_FILENAME)
+
+    run_log = dict(run_log, rows=rows, summary_mode=summary_mode, summary_exact=summary.exact)
+    if extra_log is not None:
+        run_log.update(extra_log())
+    with log_path.open("w", encoding="utf-8") as f:
+        json.dump(run_log, f, indent=2, ensure_ascii=False)
+
+    paths = {
+        "ranked_csv": str(ranked_path),
+        "summary_by_tool_csv": str(tool_path),
+        "summary_by_label_csv": str(label_path),
+        "run_log_json": str(log_path),
+    }
+    if save_sketch:
+        paths["summary_sketch_json"] = str(out / SKETCH_FILENAME)
+    return paths
+
+
+def save_summary_sketch(summary: StreamingSummary, path: str | Path) -> None:
+    with Path(path).open("w", encoding="utf-8") as f:
+        json.dump(summary.to_dict(), f, ensure_ascii=False)
+
+
+def load_summary_sketch(path: str | Path) -> StreamingSummary:
+    with Path(path).open("r", encoding="utf-8") as f:
+        return StreamingSummary.from_dict(json.load(f))
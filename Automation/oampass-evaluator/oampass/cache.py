@@ -0,0 +1,120 @@
+"""Content-addressed cache for load_oampass_excel results.
+
+Entries are keyed by everything that determines the output table: the
+workbook's SHA-256, the recompute flags, scoring weights/thresholds, the
+dictionary (wordlist) hash and the package version. A hit skips the Excel
+parse and the feature/scoring pass. Tables are stored as pandas pickles
+(block-columnar, no extra dependency); the oldest entries are evicted once
+the directory exceeds its size budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+from . import __version__
+from .config import (
+    AUTO_RISK_LABEL_THRESHOLDS,
+    DEFAULT_RISK_WEIGHTS,
+    OAMPASS_DERIVED_COLUMNS,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+)
+from .dictionary import dictionary_key
+from .instrument import NULL_TIMER, StageTimer
+from .io import TABLE_SCHEMA_VERSION, LoadResult, _sha256_file, load_oampass_excel
+
+
+def cache_key(dataset_sha256: str, *, recompute_missing: bool, recompute_riskindex: bool) -> str:
+    payload = {
+        "dataset_sha256": dataset_sha256,
+        "recompute_missing": bool(recompute_missing),
+        "recompute_riskindex": bool(recompute_riskindex),
+        "weights": DEFAULT_RISK_WEIGHTS,
+        "thresholds": AUTO_RISK_LABEL_THRESHOLDS,
+        "derived_columns": OAMPASS_DERIVED_COLUMNS,
+        "dictionary": dictionary_key(),
+        "version": __version__,
+        "table_schema": TABLE_SCHEMA_VERSION,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _entry_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"{key}.pkl"
+
+
+def get(key: str, cache_dir: Path = RESULT_CACHE_DIR) -> LoadResult | None:
+    path = _entry_path(cache_dir, key)
+    try:
+        with path.open("rb") as f:
+            entry = pickle.load(f)
+        os.utime(path)  # mark as recently used for eviction
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    return LoadResult(df=entry["df"], dataset_sha256=entry["dataset_sha256"], source_sheet=entry["source_sheet"])
+
+
+def put(key: str, lr: LoadResult, cache_dir: Path = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES) -> None:
+    entry = {"df": lr.df, "dataset_sha256": lr.dataset_sha256, "source_sheet": lr.source_sheet}
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        path = _entry_path(cache_dir, key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        return
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir: Path = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES) -> int:
+    """Delete least recently used entries until the cache fits in max_bytes. Returns files removed."""
+    try:
+        entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in cache_dir.glob("*.pkl")]
+    except OSError:
+        return 0
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def cached_load_oampass_excel(
+    path: str | Path,
+    *,
+    recompute_missing: bool = False,
+    recompute_riskindex: bool = False,
+    workers: int = 1,
+    cache_dir: Path = RESULT_CACHE_DIR,
+    max_bytes: int = RESULT_CACHE_MAX_BYTES,
+    timer: StageTimer = NULL_TIMER,
+) -> tuple[LoadResult, bool]:
+    """load_oampass_excel with the result cache in front. Returns (result, cache_hit)."""
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(p)
+    with timer.stage("cache_lookup"):
+        key = cache_key(_sha256_file(p), recompute_missing=recompute_missing, recompute_riskindex=recompute_riskindex)
+        hit = get(key, cache_dir)
+    if hit is not None:
+        return hit, True
+    lr = load_oampass_excel(
+        p, recompute_missing=recompute_missing, recompute_riskindex=recompute_riskindex, workers=workers, timer=timer,
+    )
+    with timer.stage("cache_store"):
+        put(key, lr, cache_dir, max_bytes)
+    return lr, False
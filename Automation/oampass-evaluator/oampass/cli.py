@@ -1,14 +1,51 @@
 from __future__ import annotations
 import argparse
+import csv
 from datetime import datetime, timezone
 from pathlib import Path
+import sys
+import time
 
-from .io import load_oampass_excel
-from .analysis import summarize, export_artifacts
+from .config import DB_PATH, IMPORT_CHUNK_ROWS
+from .db import STATS_DIMENSIONS, get_conn, init_db, is_legacy_layout, rebuild_stats
+from .db_ops import STATS_KEY_NAMES, fetch_stats
+from .export import export_db
+from .features_batch import feature_timings
+from .instrument import Profiler, StageTimer, children_cpu_s, peak_rss_mb
+from .cache import cached_load_oampass_excel
+from .io import load_oampass_excel, _sha256_file
+from .analysis import (
+    StreamingSummary,
+    export_artifacts,
+    export_streamed_artifacts,
+    load_summary_sketch,
+    save_summary_sketch,
+    summarize,
+    SKETCH_FILENAME,
+)
+from .parallel import WorkerStats, map_chunks_parallel
+from .rescore import count_stale, rescore
+from .scoring import scoring_model_version
+from .sketch import SKETCH_MODES
+from .wordlists import INPUT_FORMATS, detect_format, iter_password_chunks, score_chunk
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    # Database subcommands; anything else is the original workbook/wordlist mode.
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
 
-def main() -> int:
     ap = argparse.ArgumentParser(description="Process OAMpass v3 workbook and export ranked results + summaries.")
-    ap.add_argument("--input", required=True, help="Path to OAMpass v3 Excel workbook (.xlsx)")
+    ap.add_argument("--input", required=True, help="Path to OAMpass v3 Excel workbook (.xlsx), or a password list (.txt/.csv, optionally .gz)")
+    ap.add_argument(
+        "--input-format",
+        choices=["auto", *INPUT_FORMATS],
+        default="auto",
+        help="Input format; 'auto' decides from the file extension.",
+    )
+    ap.add_argument("--password-column", default=None, help="CSV column holding the passwords (default: Password/pw/Pass).")
+    ap.add_argument("--encoding", default="utf-8", help="Text encoding of .txt/.csv inputs (undecodable bytes are replaced).")
+    ap.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_ROWS, help="Rows per chunk when streaming .txt/.csv inputs.")
     ap.add_argument("--outdir", default="outputs", help="Output directory for artifacts")
     ap.add_argument(
         "--recompute-missing",
@@ -20,14 +57,83 @@ def main() -> int:
         action="store_true",
         help="Recompute RiskIndex from Password using the built-in baseline scoring model.",
     )
-    args = ap.parse_args()
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for feature extraction/scoring (1 = serial). Output is identical to a serial run.",
+    )
+    ap.add_argument(
+        "--summary-mode",
+        choices=SKETCH_MODES,
+        default="auto",
+        help="Median/percentile sketch for streamed inputs and --save-sketch: exact counts, a fixed-bin histogram, or auto (exact until too many distinct values).",
+    )
+    ap.add_argument("--percentiles", type=_parse_percentiles, default=(), help="Extra summary columns, e.g. 90,99 adds p90 and p99.")
+    ap.add_argument("--top", type=int, default=None, help="Write only the K riskiest rows to results_ranked.csv (summaries still cover every row).")
+    ap.add_argument("--save-sketch", action="store_true", help=f"Also write <outdir>/{SKETCH_FILENAME} for `oampass merge-summaries`.")
+    ap.add_argument("--no-cache", action="store_true", help="Always re-parse the workbook instead of using the local result cache.")
+    ap.add_argument("--profile", action="store_true", help="Run under cProfile; writes <outdir>/profile.pstats and a top-N summary to the run log.")
+    ap.add_argument("--trace-malloc", action="store_true", help="Trace Python allocations (slower); adds per-stage heap peaks and top allocation sites to the run log.")
+    args = ap.parse_args(argv)
+    if args.top is not None and args.top < 1:
+        ap.error("--top must be at least 1")
+
+    fmt = detect_format(args.input) if args.input_format == "auto" else args.input_format
+    profiler = Profiler(
+        profile_path=Path(args.outdir) / "profile.pstats" if args.profile else None,
+        trace_malloc=bool(args.trace_malloc),
+    )
+    with profiler, feature_timings() as ft:
+        run = _Run(StageTimer(), ft, profiler)
+        if fmt != "xlsx":
+            return _run_wordlist(args, fmt, run)
+        return _run_workbook(args, run)
+
+
+class _Run:
+    """Instrumentation shared by both CLI modes; rendered into run_log["instrumentation"]."""
+
+    def __init__(self, timer: StageTimer, feature_times: dict[str, float], profiler: Profiler) -> None:
+        self.timer = timer
+        self.feature_times = feature_times
+        self.profiler = profiler
+        self.wall0 = time.perf_counter()
+        self.cpu0 = time.process_time()
+
+    def log(self) -> dict:
+        out = {
+            "total_wall_s": round(time.perf_counter() - self.wall0, 6),
+            "total_cpu_s": round(time.process_time() - self.cpu0, 6),
+            "children_cpu_s": children_cpu_s(),
+            "rss_peak_mb": peak_rss_mb(),
+            "stages": self.timer.as_dict(),
+            # Batch feature groups timed in this process (worker processes are not included)
+            "feature_timings_s": {k: round(v, 6) for k, v in sorted(self.feature_times.items(), key=lambda kv: -kv[1])},
+        }
+        out.update(self.profiler.stop())
+        return {"instrumentation": out}
+
 
-    lr = load_oampass_excel(
-        args.input,
+def _run_workbook(args: argparse.Namespace, run: _Run) -> int:
+    timer = run.timer
+    load_kwargs = dict(
         recompute_missing=bool(args.recompute_missing or args.recompute_riskindex),
         recompute_riskindex=bool(args.recompute_riskindex),
+        workers=max(1, args.workers),
     )
-    summaries = summarize(lr.df)
+    if args.no_cache:
+        lr, cache_status = load_oampass_excel(args.input, timer=timer, **load_kwargs), "disabled"
+    else:
+        lr, hit = cached_load_oampass_excel(args.input, timer=timer, **load_kwargs)
+        cache_status = "hit" if hit else "miss"
+    sketch = None
+    with timer.stage("summarize"):
+        # The whole table is in memory, so the CSV summaries stay exact
+        summaries = summarize(lr.df, args.percentiles, top=args.top)
+        if args.save_sketch:
+            sketch = StreamingSummary(mode=args.summary_mode)
+            sketch.update(lr.df)
 
     run_log = {
         "timestamp_utc": datetime.now(timezone.utc).isoformat(),
@@ -38,13 +144,256 @@ def main() -> int:
         "columns": list(lr.df.columns),
         "recompute_missing": bool(args.recompute_missing or args.recompute_riskindex),
         "recompute_riskindex": bool(args.recompute_riskindex),
+        "workers": max(1, args.workers),
+        "cache": cache_status,
+        "top": args.top,
+        # In-memory size of the evaluation table; the process peak is instrumentation.rss_peak_mb
+        "table_memory_mb": round(lr.df.memory_usage(deep=True).sum() / (1024 * 1024), 3),
     }
+    if lr.worker_stats:
+        run_log["worker_stats"] = lr.worker_stats
+    if lr.dedup:
+        run_log["dedup"] = lr.dedup
 
-    paths = export_artifacts(summaries, args.outdir, run_log)
+    paths = export_artifacts(summaries, args.outdir, run_log, timer=timer, extra_log=run.log, sketch=sketch)
     print("Artifacts written:")
     for k, v in paths.items():
         print(f"- {k}: {v}")
     return 0
 
+def _run_wordlist(args: argparse.Namespace, fmt: str, run: _Run) -> int:
+    """Score a text/CSV password list as a stream of chunks (always recomputes)."""
+    path = Path(args.input)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    timer = run.timer
+    raw_chunks = iter_password_chunks(
+        path,
+        fmt=fmt,
+        password_column=args.password_column,
+        chunk_size=max(1, args.chunk_size),
+        encoding=args.encoding,
+    )
+    chunks = timer.iter(raw_chunks, "read")
+    workers = max(1, args.workers)
+    stats = WorkerStats()
+    if workers > 1:
+        # Waiting on the pool; includes the reads that feed it
+        scored = timer.iter(map_chunks_parallel(score_chunk, chunks, workers, stats=stats), "score_wait")
+    else:
+        scored = _timed_scores(chunks, timer)
+    with timer.stage("hashing"):
+        sha = _sha256_file(path)
+    run_log = {
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "input_path": str(path.resolve()),
+        "input_format": fmt,
+        "dataset_sha256": sha,
+        "recompute_missing": True,
+        "recompute_riskindex": True,
+        "chunk_size": max(1, args.chunk_size),
+        "workers": workers,
+        "top": args.top,
+    }
+    # Worker and stage timings are only complete once the stream is drained
+    def extra() -> dict:
+        out = {"worker_stats": stats.as_dict()} if workers > 1 else {}
+        out.update(run.log())
+        return out
+
+    paths = export_streamed_artifacts(
+        scored,
+        args.outdir,
+        run_log,
+        timer=timer,
+        extra_log=extra,
+        summary_mode=args.summary_mode,
+        percentiles=args.percentiles,
+        save_sketch=args.save_sketch,
+        top=args.top,
+    )
+    print("Artifacts written:")
+    for k, v in paths.items():
+        print(f"- {k}: {v}")
+    return 0
+
+def _parse_percentiles(text: str) -> tuple[float, ...]:
+    try:
+        qs = tuple(float(p) / 100 for p in text.split(",") if p.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated percentiles, got {text!r}")
+    if not all(0 <= q <= 1 for q in qs):
+        raise argparse.ArgumentTypeError("percentiles must be between 0 and 100")
+    return qs
+
+def _timed_scores(chunks, timer: StageTimer):
+    for df in chunks:
+        with timer.stage("score"):
+            out = score_chunk(df)
+        yield out
+
+def _db_parser(prog: str, description: str) -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog=f"oampass {prog}", description=description)
+    ap.add_argument("--db", default=str(DB_PATH), help="SQLite database (default: the app database).")
+    return ap
+
+def _cmd_stats(argv: list[str]) -> int:
+    ap = _db_parser("stats", "Print RiskIndex aggregates from the database (read from risk_stats, no table scan).")
+    ap.add_argument("--by", choices=STATS_DIMENSIONS, default="tool", help="Group by tool, AutoRiskLabel or UTC day.")
+    ap.add_argument("--out", default=None, help="Write CSV here instead of stdout.")
+    args = ap.parse_args(argv)
+    conn = get_conn(args.db)
+    init_db(conn)
+    rows = fetch_stats(conn, args.by)
+    f = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+    try:
+        w = csv.writer(f)
+        w.writerow([STATS_KEY_NAMES[args.by], "count", "mean", "min", "max"])
+        w.writerows(tuple(r) for r in rows)
+    finally:
+        if args.out:
+            f.close()
+    return 0
+
+def _cmd_rebuild_stats(argv: list[str]) -> int:
+    ap = _db_parser("rebuild-stats", "Recompute the risk_stats aggregates from the stored rows.")
+    args = ap.parse_args(argv)
+    conn = get_conn(args.db)
+    init_db(conn)
+    rebuild_stats(conn)
+    groups = conn.execute("SELECT COUNT(*) FROM risk_stats").fetchone()[0]
+    print(f"risk_stats rebuilt: {groups} groups")
+    return 0
+
+def _cmd_rescore(argv: list[str]) -> int:
+    ap = _db_parser("rescore", "Recompute stored RiskIndex/AutoRiskLabel with the current weights and thresholds in config.py.")
+    ap.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_ROWS, help="Entry ids per UPDATE transaction.")
+    ap.add_argument(
+        "--include-external",
+        action="store_true",
+        help="Also replace RiskIndex values that came from imported files (by default they are only relabeled).",
+    )
+    ap.add_argument(
+        "--include-unknown",
+        action="store_true",
+        help="Also recompute rows with no recorded model version (by default they are only relabeled).",
+    )
+    ap.add_argument("--dry-run", action="store_true", help="Only count the rows that would change.")
+    args = ap.parse_args(argv)
+    conn = get_conn(args.db)
+    init_db(conn)
+    if args.dry_run:
+        n = count_stale(conn, include_external=args.include_external, include_unknown=args.include_unknown)
+        unknown_action = "rescore" if args.include_unknown else "relabel"
+        print(
+            f"model {scoring_model_version()}: {n['rescore']} rows to rescore, {n['relabel']} imported rows to relabel, "
+            f"{n['unknown']} unversioned rows to {unknown_action}"
+        )
+        return 0
+    report = rescore(
+        conn, chunk_rows=args.chunk_size, include_external=args.include_external, include_unknown=args.include_unknown
+    )
+    print(
+        f"model {report.model_version}: rescored {report.rescored}, relabeled {report.relabeled} of {report.scanned} rows "
+        f"in {report.seconds:.2f}s ({report.rows_per_s:,.0f} rows/s; risk_stats rebuild {report.stats_seconds:.2f}s)"
+    )
+    return 0
+
+def _cmd_compact(argv: list[str]) -> int:
+    ap = _db_parser("compact", "Migrate the database to the compact layout if needed, then VACUUM it to reclaim space.")
+    args = ap.parse_args(argv)
+    path = Path(args.db)
+    before = path.stat().st_size if path.exists() else 0
+    conn = get_conn(path)
+    legacy = is_legacy_layout(conn)
+    init_db(conn)
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    after = path.stat().st_size
+    print(f"{'migrated to the compact layout and ' if legacy else ''}vacuumed {path}: {before:,} -> {after:,} bytes")
+    return 0
+
+def _cmd_export(argv: list[str]) -> int:
+    ap = _db_parser("export", "Stream stored entries to .csv, .csv.gz or .xlsx in constant memory.")
+    ap.add_argument("--out", required=True, help="Output file; the format follows the extension.")
+    ap.add_argument("--order", choices=["recent", "risk"], default="recent", help="Newest first or highest RiskIndex first.")
+    ap.add_argument("--tool", default=None)
+    ap.add_argument("--source", default=None)
+    ap.add_argument("--label", default=None, help="AutoRiskLabel to keep (Risky/Medium/Safe).")
+    ap.add_argument("--risk-min", type=float, default=None)
+    ap.add_argument("--risk-max", type=float, default=None)
+    ap.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_ROWS, help="Rows fetched from SQLite per chunk.")
+    ap.add_argument("--top", type=int, default=None, help="Only the K riskiest rows (implies --order risk; read from the RiskIndex index).")
+    args = ap.parse_args(argv)
+    if args.top is not None:
+        if args.top < 1:
+            ap.error("--top must be at least 1")
+        args.order = "risk"
+    conn = get_conn(args.db)
+    init_db(conn)
+    report = export_db(
+        conn,
+        args.out,
+        order=args.order,
+        chunk_size=args.chunk_size,
+        tool=args.tool,
+        source=args.source,
+        label=args.label,
+        risk_min=args.risk_min,
+        risk_max=args.risk_max,
+        limit=args.top,
+    )
+    print(f"Exported {report.rows} rows to {report.path} ({report.seconds:.2f}s)")
+    return 0
+
+def _cmd_merge_summaries(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(
+        prog="oampass merge-summaries",
+        description=f"Combine {SKETCH_FILENAME} files from separate runs or shards into one set of summary tables.",
+    )
+    ap.add_argument("sketches", nargs="+", help=f"{SKETCH_FILENAME} files (or run output directories).")
+    ap.add_argument("--outdir", required=True, help="Where to write the merged summaries and sketch.")
+    ap.add_argument("--percentiles", type=_parse_percentiles, default=(), help="Extra summary columns, e.g. 90,99.")
+    args = ap.parse_args(argv)
+    merged = None
+    for item in args.sketches:
+        path = Path(item)
+        part = load_summary_sketch(path / SKETCH_FILENAME if path.is_dir() else path)
+        if merged is None:
+            merged = part
+        else:
+            merged.merge(part)
+    out = Path(args.outdir)
+    out.mkdir(parents=True, exist_ok=True)
+    merged.table("Tool", args.percentiles).to_csv(out / "summary_by_tool.csv", index=False)
+    merged.table("Label", args.percentiles).to_csv(out / "summary_by_label.csv", index=False)
+    save_summary_sketch(merged, out / SKETCH_FILENAME)
+    rows = sum(g.count for g in merged.groups["Tool"].values())
+    exactness = "exact" if merged.exact else "histogram estimates"
+    print(f"Merged {len(args.sketches)} sketches ({rows} rows, medians/percentiles are {exactness}) into {out}")
+    return 0
+
+def _cmd_score(argv: list[str]) -> int:
+    from .quickscore import main as score_main
+
+    return score_main(argv)
+
+def _cmd_serve(argv: list[str]) -> int:
+    from .service import main as serve_main
+
+    return serve_main(argv)
+
+SUBCOMMANDS = {
+    "score": _cmd_score,
+    "serve": _cmd_serve,
+    "stats": _cmd_stats,
+    "rebuild-stats": _cmd_rebuild_stats,
+    "rescore": _cmd_rescore,
+    "export": _cmd_export,
+    "compact": _cmd_compact,
+    "merge-summaries": _cmd_merge_summaries,
+}
+
 if __name__ == "__main__":
     raise SystemExit(main())
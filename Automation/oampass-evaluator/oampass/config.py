@@ -15,6 +15,15 @@ from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 WORDLIST_PATH = PROJECT_ROOT / "data" / "wordlist.txt"
+# SQLite database used by the Streamlit app and the CLI database commands
+DB_PATH = PROJECT_ROOT / "data" / "oampass.sqlite"
+# Secret for password fingerprints (see fingerprint.py); $OAMPASS_FINGERPRINT_KEY overrides it
+FINGERPRINT_KEY_PATH = PROJECT_ROOT / "data" / "fingerprint.key"
+# Local artifacts (precompiled dictionary, ...) that can be deleted at any time
+CACHE_DIR = PROJECT_ROOT / "data" / "cache"
+# Cached cleaned/derived tables from previous CLI runs, evicted oldest-first above this size
+RESULT_CACHE_DIR = CACHE_DIR / "datasets"
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
 MIN_DICT_WORD_LEN = 4
 # Minimum schema to run the pipeline
 MIN_REQUIRED_COLUMNS = [
@@ -44,6 +53,23 @@ OAMPASS_DERIVED_COLUMNS = [
     "AsciiRange",
 ]
 
+# Table dtypes (io.apply_table_dtypes): flags as int8, counts as the smallest
+# integer type that fits, group keys as categoricals.
+DERIVED_FLAG_COLUMNS = [
+    "HasUpper",
+    "HasLower",
+    "HasDigit",
+    "HasSymbol",
+    "StartsWithDigit",
+    "EndsWithSymbol",
+    "HasRepeatedChars",
+    "HasDictionaryWord",
+    "IsPalindrome",
+    "HasSequential",
+]
+DERIVED_COUNT_COLUMNS = [c for c in OAMPASS_DERIVED_COLUMNS if c not in DERIVED_FLAG_COLUMNS]
+CATEGORY_COLUMNS = ["Tool", "Label"]
+
 # Optional columns used for summaries
 OPTIONAL_COLUMNS = [
     "Label",
@@ -95,6 +121,32 @@ COMMON_WEAK_WORDS = [
 ]
 
 
+# Streaming summaries (oampass.sketch): RiskIndex histogram bins over the score range,
+# used once a group has more distinct values than the exact counter keeps
+SUMMARY_HIST_BINS = 1000
+SUMMARY_HIST_RANGE = (0.0, 100.0)
+SUMMARY_EXACT_MAX_DISTINCT = 4096
+
+# Rows per transaction for bulk imports into SQLite
+IMPORT_CHUNK_ROWS = 5000
+# Spilled runs merged at once when sorting streamed results (keeps open files bounded)
+SPILL_MERGE_FAN_IN = 256
+# Passwords per task when feature extraction is sharded over worker processes
+WORKER_CHUNK_ROWS = 20000
+
+# Local scoring service (oampass.service)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+# Passwords per micro-batch, and how long the first request waits for company
+SERVICE_MAX_BATCH = 512
+SERVICE_MAX_WAIT_MS = 2.0
+# Smaller batches use the scalar path: the pandas batch path has ~2.5 ms fixed cost
+SERVICE_VECTOR_MIN_BATCH = 192
+# Queued passwords before new requests are answered with 503
+SERVICE_MAX_PENDING = 20000
+SERVICE_MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
 # Automatic risk label thresholds for the demo UI/CLI
 AUTO_RISK_LABEL_THRESHOLDS = {
     'risky': 70.0,
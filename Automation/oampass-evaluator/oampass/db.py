@@ -1,49 +1,319 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
+import queue
 import sqlite3
+import threading
 from pathlib import Path
+from typing import Any, Callable
 
-SCHEMA_SQL = """
-PRAGMA foreign_keys = ON;
-
-CREATE TABLE IF NOT EXISTS password_entries (
+_ENTRIES_COLUMNS = """\
   id INTEGER PRIMARY KEY AUTOINCREMENT,
-  password_hash TEXT NOT NULL,
-  salt TEXT NOT NULL,
+  password_hash BLOB NOT NULL,  -- SHA-256(salt || password), 32 bytes
+  salt BLOB NOT NULL,           -- 16 bytes
   password_mask TEXT,
   tool TEXT,
   source TEXT NOT NULL DEFAULT 'user_input',
-  created_at INTEGER NOT NULL
-);
+  created_at INTEGER NOT NULL,
+  fingerprint BLOB,             -- HMAC-SHA256, 32 bytes (fingerprint.py)
+  occurrences INTEGER NOT NULL DEFAULT 1"""
 
-CREATE TABLE IF NOT EXISTS password_features (
+_FEATURES_COLUMNS = """\
   entry_id INTEGER PRIMARY KEY,
+  flags INTEGER NOT NULL,
   Length INTEGER NOT NULL,
-  HasUpper INTEGER NOT NULL,
-  HasLower INTEGER NOT NULL,
-  HasDigit INTEGER NOT NULL,
-  HasSymbol INTEGER NOT NULL,
   CountUpper INTEGER NOT NULL,
   CountLower INTEGER NOT NULL,
   CountDigit INTEGER NOT NULL,
   CountSymbol INTEGER NOT NULL,
-  StartsWithDigit INTEGER NOT NULL,
-  EndsWithSymbol INTEGER NOT NULL,
-  HasRepeatedChars INTEGER NOT NULL,
-  HasDictionaryWord INTEGER NOT NULL,
-  IsPalindrome INTEGER NOT NULL,
-  HasSequential INTEGER NOT NULL,
   UniqueChars INTEGER NOT NULL,
   AsciiRange INTEGER NOT NULL,
   RiskIndex REAL NOT NULL,
   AutoRiskLabel TEXT NOT NULL,
-  FOREIGN KEY(entry_id) REFERENCES password_entries(id) ON DELETE CASCADE
+  model_version TEXT,           -- scoring.scoring_model_version() of RiskIndex; 'external' = from the input, NULL = unknown
+  FOREIGN KEY(entry_id) REFERENCES password_entries(id) ON DELETE CASCADE"""
+
+SCHEMA_SQL = f"""
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS password_entries (
+{_ENTRIES_COLUMNS}
+);
+
+-- The 0/1 features share one bitfield: bit i is FEATURE_FLAGS[i].
+CREATE TABLE IF NOT EXISTS password_features (
+{_FEATURES_COLUMNS}
 );
 
+-- Keyset pagination / filtering (db_ops.fetch_page). The rowid (id / entry_id)
+-- is implicitly the last column of every index, which makes them unique sort keys.
 CREATE INDEX IF NOT EXISTS idx_entries_created_at ON password_entries(created_at);
-CREATE INDEX IF NOT EXISTS idx_features_risklabel ON password_features(AutoRiskLabel);
+CREATE INDEX IF NOT EXISTS idx_entries_tool_created ON password_entries(tool, created_at);
+CREATE INDEX IF NOT EXISTS idx_entries_source_created ON password_entries(source, created_at);
+CREATE INDEX IF NOT EXISTS idx_features_risk ON password_features(RiskIndex);
+CREATE INDEX IF NOT EXISTS idx_features_label_risk ON password_features(AutoRiskLabel, RiskIndex);
+-- Superseded by idx_features_label_risk (same leading column)
+DROP INDEX IF EXISTS idx_features_risklabel;
+
+-- RiskIndex aggregates per tool / AutoRiskLabel / UTC day, kept current by the
+-- triggers below (see STATS_SQL). mean = risk_sum / n.
+CREATE TABLE IF NOT EXISTS risk_stats (
+  dim TEXT NOT NULL,
+  key TEXT NOT NULL,
+  n INTEGER NOT NULL,
+  risk_sum REAL NOT NULL,
+  risk_min REAL NOT NULL,
+  risk_max REAL NOT NULL,
+  PRIMARY KEY (dim, key)
+) WITHOUT ROWID;
 """
 
+STATS_DIMENSIONS = ("tool", "label", "day")
+
+# Bit order of password_features.flags (never reorder; append new flags at the end)
+FEATURE_FLAGS = (
+    "HasUpper", "HasLower", "HasDigit", "HasSymbol", "StartsWithDigit",
+    "EndsWithSymbol", "HasRepeatedChars", "HasDictionaryWord", "IsPalindrome", "HasSequential",
+)
+FEATURE_COUNTS = ("Length", "CountUpper", "CountLower", "CountDigit", "CountSymbol", "UniqueChars", "AsciiRange")
+
+# Feature columns in the order the joined view (and db_ops.FEATURE_KEYS) lists them
+_FEATURE_ORDER = (
+    "Length", "HasUpper", "HasLower", "HasDigit", "HasSymbol",
+    "CountUpper", "CountLower", "CountDigit", "CountSymbol",
+    "StartsWithDigit", "EndsWithSymbol", "HasRepeatedChars", "HasDictionaryWord",
+    "IsPalindrome", "HasSequential", "UniqueChars", "AsciiRange",
+)
+
+
+def feature_expr(name: str, alias: str = "f") -> str:
+    """SQL expression for one feature column of password_features (decodes flags)."""
+    if name in FEATURE_FLAGS:
+        return f"(({alias}.flags >> {FEATURE_FLAGS.index(name)}) & 1)"
+    return f"{alias}.{name}"
+
+
+# Column list of the joined entry + features row in the pre-compact layout's
+# names and formats (hex hash, one column per feature). Used by db_ops queries
+# and the password_joined view.
+JOINED_COLUMNS = (
+    "e.id, lower(hex(e.password_hash)) AS password_hash, e.password_mask, e.tool, e.source, e.created_at, e.occurrences,\n"
+    + ",\n".join(f"{feature_expr(k)} AS {k}" for k in _FEATURE_ORDER)
+    + ",\nf.RiskIndex, f.AutoRiskLabel"
+)
+
+VIEW_SQL = f"""
+CREATE VIEW IF NOT EXISTS password_joined AS
+SELECT {JOINED_COLUMNS}
+FROM password_entries e JOIN password_features f ON f.entry_id = e.id;
+"""
+
+
+def _stats_add(tool: str, created: str, label: str, risk: str) -> str:
+    return f"""
+  INSERT INTO risk_stats(dim, key, n, risk_sum, risk_min, risk_max)
+  SELECT dim, key, 1, {risk}, {risk}, {risk} FROM (
+    SELECT 'tool' AS dim, COALESCE({tool}, '') AS key
+    UNION ALL SELECT 'label', {label}
+    UNION ALL SELECT 'day', date({created}, 'unixepoch')
+  ) WHERE true
+  ON CONFLICT(dim, key) DO UPDATE SET
+    n = n + 1,
+    risk_sum = risk_sum + excluded.risk_sum,
+    risk_min = min(risk_min, excluded.risk_min),
+    risk_max = max(risk_max, excluded.risk_max);"""
+
+
+def _stats_remove(tool: str, created: str, label: str, risk: str) -> str:
+    # Min/max are only recomputed (via the indexes) when the removed value was an extreme.
+    return f"""
+  UPDATE risk_stats SET n = n - 1, risk_sum = risk_sum - {risk}
+  WHERE (dim = 'tool' AND key = COALESCE({tool}, ''))
+     OR (dim = 'label' AND key = {label})
+     OR (dim = 'day' AND key = date({created}, 'unixepoch'));
+  DELETE FROM risk_stats WHERE n <= 0;
+  UPDATE risk_stats SET
+    risk_min = (SELECT MIN(RiskIndex) FROM password_features WHERE AutoRiskLabel = risk_stats.key),
+    risk_max = (SELECT MAX(RiskIndex) FROM password_features WHERE AutoRiskLabel = risk_stats.key)
+  WHERE dim = 'label' AND key = {label} AND {risk} IN (risk_min, risk_max);
+  UPDATE risk_stats SET
+    risk_min = (SELECT MIN(f.RiskIndex) FROM password_entries e JOIN password_features f ON f.entry_id = e.id
+                WHERE e.tool = risk_stats.key OR (risk_stats.key = '' AND e.tool IS NULL)),
+    risk_max = (SELECT MAX(f.RiskIndex) FROM password_entries e JOIN password_features f ON f.entry_id = e.id
+                WHERE e.tool = risk_stats.key OR (risk_stats.key = '' AND e.tool IS NULL))
+  WHERE dim = 'tool' AND key = COALESCE({tool}, '') AND {risk} IN (risk_min, risk_max);
+  UPDATE risk_stats SET
+    risk_min = (SELECT MIN(f.RiskIndex) FROM password_entries e JOIN password_features f ON f.entry_id = e.id
+                WHERE e.created_at >= CAST(strftime('%s', risk_stats.key) AS INTEGER)
+                  AND e.created_at < CAST(strftime('%s', risk_stats.key) AS INTEGER) + 86400),
+    risk_max = (SELECT MAX(f.RiskIndex) FROM password_entries e JOIN password_features f ON f.entry_id = e.id
+                WHERE e.created_at >= CAST(strftime('%s', risk_stats.key) AS INTEGER)
+                  AND e.created_at < CAST(strftime('%s', risk_stats.key) AS INTEGER) + 86400)
+  WHERE dim = 'day' AND key = date({created}, 'unixepoch') AND {risk} IN (risk_min, risk_max);"""
+
+
+def _entry_col(col: str, entry_id: str) -> str:
+    return f"(SELECT {col} FROM password_entries WHERE id = {entry_id})"
+
+
+def _feature_col(col: str, entry_id: str) -> str:
+    return f"(SELECT {col} FROM password_features WHERE entry_id = {entry_id})"
+
+
+def _features_row(row: str) -> tuple[str, str, str, str]:
+    eid = f"{row}.entry_id"
+    return _entry_col("tool", eid), _entry_col("created_at", eid), f"{row}.AutoRiskLabel", f"{row}.RiskIndex"
+
+
+def _entries_row(row: str) -> tuple[str, str, str, str]:
+    return f"{row}.tool", f"{row}.created_at", _feature_col("AutoRiskLabel", f"{row}.id"), _feature_col("RiskIndex", f"{row}.id")
+
+
+# Kept separately so bulk jobs (rescore.py) can drop it for a set-based update and
+# recreate it in the same transaction, then rebuild the aggregates once.
+FEATURES_UPDATE_TRIGGER_SQL = f"""
+CREATE TRIGGER IF NOT EXISTS trg_stats_features_update AFTER UPDATE OF RiskIndex, AutoRiskLabel ON password_features
+BEGIN{_stats_remove(*_features_row("OLD"))}{_stats_add(*_features_row("NEW"))}
+END;
+"""
+
+STATS_SQL = f"""
+CREATE TRIGGER IF NOT EXISTS trg_stats_features_insert AFTER INSERT ON password_features
+BEGIN{_stats_add(*_features_row("NEW"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_features_delete AFTER DELETE ON password_features
+BEGIN{_stats_remove(*_features_row("OLD"))}
+END;
+
+{FEATURES_UPDATE_TRIGGER_SQL}
+-- Moving an entry to another tool/day: remove with the old keys, add with the new ones.
+CREATE TRIGGER IF NOT EXISTS trg_stats_entries_update AFTER UPDATE OF tool, created_at ON password_entries
+WHEN EXISTS (SELECT 1 FROM password_features WHERE entry_id = NEW.id)
+BEGIN{_stats_remove("OLD.tool", "OLD.created_at", *_entries_row("NEW")[2:])}{_stats_add(*_entries_row("NEW"))}
+END;
+
+-- Delete features first so their trigger still sees the entry's tool/day.
+CREATE TRIGGER IF NOT EXISTS trg_stats_entries_delete BEFORE DELETE ON password_entries
+BEGIN
+  DELETE FROM password_features WHERE entry_id = OLD.id;
+END;
+"""
+
+REBUILD_STATS_SQL = """
+BEGIN;
+DELETE FROM risk_stats;
+INSERT INTO risk_stats(dim, key, n, risk_sum, risk_min, risk_max)
+  SELECT 'tool', COALESCE(e.tool, ''), COUNT(*), SUM(f.RiskIndex), MIN(f.RiskIndex), MAX(f.RiskIndex)
+  FROM password_features f JOIN password_entries e ON e.id = f.entry_id GROUP BY 2;
+INSERT INTO risk_stats(dim, key, n, risk_sum, risk_min, risk_max)
+  SELECT 'label', f.AutoRiskLabel, COUNT(*), SUM(f.RiskIndex), MIN(f.RiskIndex), MAX(f.RiskIndex)
+  FROM password_features f JOIN password_entries e ON e.id = f.entry_id GROUP BY 2;
+INSERT INTO risk_stats(dim, key, n, risk_sum, risk_min, risk_max)
+  SELECT 'day', date(e.created_at, 'unixepoch'), COUNT(*), SUM(f.RiskIndex), MIN(f.RiskIndex), MAX(f.RiskIndex)
+  FROM password_features f JOIN password_entries e ON e.id = f.entry_id GROUP BY 2;
+COMMIT;
+"""
+
+# Tables as they were before the compact layout (hex TEXT hash/salt/fingerprint,
+# one INTEGER column per feature). init_db migrates databases in this layout;
+# kept here as the reference for that migration and for building test fixtures.
+LEGACY_TABLES_SQL = """
+CREATE TABLE password_entries (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  password_hash TEXT NOT NULL,
+  salt TEXT NOT NULL,
+  password_mask TEXT,
+  tool TEXT,
+  source TEXT NOT NULL DEFAULT 'user_input',
+  created_at INTEGER NOT NULL,
+  fingerprint TEXT,
+  occurrences INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE password_features (
+  entry_id INTEGER PRIMARY KEY,
+  Length INTEGER NOT NULL, HasUpper INTEGER NOT NULL, HasLower INTEGER NOT NULL,
+  HasDigit INTEGER NOT NULL, HasSymbol INTEGER NOT NULL, CountUpper INTEGER NOT NULL,
+  CountLower INTEGER NOT NULL, CountDigit INTEGER NOT NULL, CountSymbol INTEGER NOT NULL,
+  StartsWithDigit INTEGER NOT NULL, EndsWithSymbol INTEGER NOT NULL, HasRepeatedChars INTEGER NOT NULL,
+  HasDictionaryWord INTEGER NOT NULL, IsPalindrome INTEGER NOT NULL, HasSequential INTEGER NOT NULL,
+  UniqueChars INTEGER NOT NULL, AsciiRange INTEGER NOT NULL,
+  RiskIndex REAL NOT NULL, AutoRiskLabel TEXT NOT NULL,
+  FOREIGN KEY(entry_id) REFERENCES password_entries(id) ON DELETE CASCADE
+);
+"""
+
+# Copy a legacy database into the compact tables (generalized ALTER TABLE
+# procedure: create new, copy, drop old, rename). oampass_unhex is registered
+# by _migrate_legacy_layout. Dropping the old tables also drops their indexes
+# and triggers; init_db recreates them afterwards. risk_stats is unchanged.
+_MIGRATE_COMPACT_SQL = f"""
+BEGIN;
+DROP VIEW IF EXISTS password_joined;
+CREATE TEMP TABLE _old_seq AS SELECT seq FROM sqlite_sequence WHERE name = 'password_entries';
+CREATE TABLE password_entries_compact (
+{_ENTRIES_COLUMNS}
+);
+INSERT INTO password_entries_compact
+  SELECT id, oampass_unhex(password_hash), oampass_unhex(salt), password_mask, tool, source, created_at,
+         oampass_unhex(fingerprint), occurrences
+  FROM password_entries ORDER BY id;
+CREATE TABLE password_features_compact (
+{_FEATURES_COLUMNS}
+);
+INSERT INTO password_features_compact
+  SELECT entry_id, {" | ".join(f"(({k} != 0) << {i})" for i, k in enumerate(FEATURE_FLAGS))},
+         {", ".join(FEATURE_COUNTS)}, RiskIndex, AutoRiskLabel, model_version
+  FROM password_features ORDER BY entry_id;
+DROP TABLE password_features;
+DROP TABLE password_entries;
+ALTER TABLE password_entries_compact RENAME TO password_entries;
+ALTER TABLE password_features_compact RENAME TO password_features;
+DELETE FROM sqlite_sequence WHERE name = 'password_entries';
+INSERT INTO sqlite_sequence(name, seq)
+  SELECT 'password_entries', MAX(COALESCE((SELECT seq FROM _old_seq), 0), COALESCE((SELECT MAX(id) FROM password_entries), 0));
+DROP TABLE _old_seq;
+"""
+
+
+def _unhex(value: str | None) -> bytes | None:
+    return bytes.fromhex(value) if value is not None else None
+
+
+def is_legacy_layout(conn: sqlite3.Connection) -> bool:
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(password_features)")}
+    return "HasUpper" in cols
+
+
+def _migrate_legacy_layout(conn: sqlite3.Connection) -> bool:
+    """Rewrite a pre-compact database into the compact layout; False if nothing to do.
+
+    The file keeps its size until VACUUM (see `oampass compact`).
+    """
+    if not is_legacy_layout(conn):
+        return False
+    for table, column, decl in ADDED_COLUMNS:
+        _ensure_column(conn, table, column, decl)
+    conn.commit()
+    conn.create_function("oampass_unhex", 1, _unhex, deterministic=True)
+    # Foreign keys can only be switched off outside a transaction
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        # The script leaves its transaction open: check before committing, so a
+        # bad migration leaves the legacy tables as they were.
+        conn.executescript(_MIGRATE_COMPACT_SQL)
+        bad = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if bad:
+            raise sqlite3.IntegrityError(f"foreign key violations after migration: {len(bad)}")
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return True
+
 def get_conn(db_path: str | Path) -> sqlite3.Connection:
     db_path = Path(db_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -52,6 +322,237 @@ def get_conn(db_path: str | Path) -> sqlite3.Connection:
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
 
+# Columns added after the first release: (table, column, declaration)
+ADDED_COLUMNS = (
+    ("password_entries", "fingerprint", "TEXT"),
+    ("password_entries", "occurrences", "INTEGER NOT NULL DEFAULT 1"),
+    ("password_features", "model_version", "TEXT"),
+)
+
+# Objects that depend on ADDED_COLUMNS, created once the columns exist.
+# One row per (password, tool): keyed fingerprint (fingerprint.py), NULL when not tracked.
+POST_MIGRATION_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_fingerprint_tool
+  ON password_entries(fingerprint, COALESCE(tool, '')) WHERE fingerprint IS NOT NULL;
+"""
+
+def _ensure_column(conn: sqlite3.Connection, table: str, column: str, decl: str) -> None:
+    cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in cols:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
 def init_db(conn: sqlite3.Connection) -> None:
+    _migrate_legacy_layout(conn)
     conn.executescript(SCHEMA_SQL)
+    for table, column, decl in ADDED_COLUMNS:
+        _ensure_column(conn, table, column, decl)
+    conn.executescript(POST_MIGRATION_SQL)
+    conn.executescript(STATS_SQL)
+    conn.executescript(VIEW_SQL)
     conn.commit()
+    # Databases created before risk_stats existed get their aggregates built once.
+    stats_empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM risk_stats)").fetchone()[0]
+    has_rows = conn.execute("SELECT EXISTS (SELECT 1 FROM password_features)").fetchone()[0]
+    if stats_empty and has_rows:
+        rebuild_stats(conn)
+
+def rebuild_stats(conn: sqlite3.Connection) -> None:
+    """Recompute risk_stats from the base tables (fixes any drift)."""
+    conn.executescript(REBUILD_STATS_SQL)
+
+
+# Pragmas for the shared, multi-session database (see ConnectionManager)
+TUNED_PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA busy_timeout = 5000;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -16000;",
+)
+
+
+class _WriterConnection(sqlite3.Connection):
+    """Connection used by the writer thread.
+
+    commit()/rollback() are no-ops so existing helpers (insert_entry,
+    insert_features, ...) can run unchanged inside a batch; the writer commits
+    once per batch and rolls back failed writes to their savepoint.
+    """
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+class ConnectionManager:
+    """Thread-safe access to one SQLite database in WAL mode.
+
+    - reader() returns a per-thread read connection.
+    - submit()/write() run `fn(conn, *args, **kwargs)` on a single writer
+      thread. Queued writes are grouped into one transaction (up to
+      `batch_max` per commit); each runs in its own savepoint so one failure
+      does not roll back the others. Futures resolve after the commit; if
+      BEGIN/COMMIT fails (e.g. another process holds the write lock past
+      busy_timeout) the whole batch fails with that error and the writer
+      keeps running. submit() raises RuntimeError after close().
+    - data_version() returns a counter that changes whenever any connection
+      (including other processes) commits, for use as a cache key.
+    """
+
+    def __init__(self, db_path: str | Path, *, batch_max: int = 256):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_max = batch_max
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._queue_lock = threading.Lock()
+        self._stopped = False
+        self.commits = 0
+        self.writes = 0
+
+        ready: Future = Future()
+        self._thread = threading.Thread(target=self._writer_loop, args=(ready,), name="oampass-db-writer", daemon=True)
+        self._thread.start()
+        ready.result()  # surface schema/pragma errors in the caller
+
+        # PRAGMA data_version on a dedicated connection changes after every
+        # commit made through any *other* connection, i.e. all real writes.
+        self._monitor = self._connect(check_same_thread=False)
+        self._monitor_lock = threading.Lock()
+        self._seen_data_version: int | None = None
+        self._version = 0
+
+    def _connect(self, **kwargs: Any) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), **kwargs)
+        conn.row_factory = sqlite3.Row
+        for pragma in TUNED_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON;")
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        fut: Future = Future()
+        with self._queue_lock:
+            if self._stopped:
+                raise RuntimeError(f"database writer for {self.db_path} has stopped")
+            self._queue.put((fut, fn, args, kwargs))
+        return fut
+
+    def write(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return self.submit(fn, *args, **kwargs).result()
+
+    def data_version(self) -> int:
+        with self._monitor_lock:
+            current = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+            if current != self._seen_data_version:
+                self._seen_data_version = current
+                self._version += 1
+            return self._version
+
+    def close(self) -> None:
+        with self._queue_lock:
+            if not self._stopped:
+                self._queue.put(None)
+        self._thread.join()
+        with self._monitor_lock:
+            self._monitor.close()
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+
+    def _writer_loop(self, ready: Future) -> None:
+        try:
+            conn = self._connect(factory=_WriterConnection, isolation_level=None)
+            init_db(conn)
+        except BaseException as e:
+            with self._queue_lock:
+                self._stopped = True
+            ready.set_exception(e)
+            return
+        ready.set_result(None)
+
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+
+            try:
+                results = self._run_batch(conn, batch)
+                self.commits += 1
+            except BaseException as e:
+                # e.g. "database is locked" from BEGIN/COMMIT while another
+                # process holds the write lock: fail this batch, keep serving
+                results = [(fut, False, e) for fut, _, _, _ in batch]
+                try:
+                    conn = self._reset_writer(conn)
+                except BaseException:
+                    stop = True
+            self.writes += len(batch)
+            for fut, ok, value in results:
+                if ok:
+                    fut.set_result(value)
+                else:
+                    fut.set_exception(value)
+
+        with self._queue_lock:
+            self._stopped = True
+        # Anything queued behind the stop marker (or after a fatal error)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].set_exception(RuntimeError(f"database writer for {self.db_path} has stopped"))
+        conn.close()
+
+    def _run_batch(self, conn: sqlite3.Connection, batch: list) -> list:
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        for fut, fn, args, kwargs in batch:
+            conn.execute("SAVEPOINT w")
+            try:
+                value = fn(conn, *args, **kwargs)
+            except BaseException as e:
+                conn.execute("ROLLBACK TO w")
+                conn.execute("RELEASE w")
+                results.append((fut, False, e))
+            else:
+                conn.execute("RELEASE w")
+                results.append((fut, True, value))
+        conn.execute("COMMIT")  # on any error the caller rolls back via _reset_writer
+        return results
+
+    def _reset_writer(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        """Leave the writer outside any transaction, reopening it if ROLLBACK fails."""
+        try:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return conn
+        except sqlite3.Error:
+            conn.close()
+            return self._connect(factory=_WriterConnection, isolation_level=None)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 import time
 import hashlib
 import secrets
 import sqlite3
 from typing import Any, Iterable
 
+from .db import FEATURE_COUNTS, FEATURE_FLAGS, JOINED_COLUMNS
+
 FEATURE_KEYS = [
     "Length","HasUpper","HasLower","HasDigit","HasSymbol",
     "CountUpper","CountLower","CountDigit","CountSymbol",
@@ -28,46 +31,271 @@ def _mask_password(pw: str) -> str:
     return f"{first}{stars}{last2}"
 
 
-def _salted_sha256(pw: str) -> tuple[str, str]:
-    """Return (hash_hex, salt_hex) using SHA-256(salt || password)."""
+def _salted_sha256(pw: str) -> tuple[bytes, bytes]:
+    """Return (hash, salt) using SHA-256(salt || password), stored as BLOBs."""
     salt = secrets.token_bytes(16)
-    h = hashlib.sha256(salt + pw.encode("utf-8")).hexdigest()
-    return h, salt.hex()
+    return hashlib.sha256(salt + pw.encode("utf-8")).digest(), salt
+
+
+def _fp_bytes(fingerprint: str | None) -> bytes | None:
+    # Fingerprints are hex strings in Python and 32-byte BLOBs in the database
+    return bytes.fromhex(fingerprint) if fingerprint is not None else None
+
+
+def pack_flags(feats: dict[str, Any]) -> int:
+    """password_features.flags for a features dict (bit i = db.FEATURE_FLAGS[i])."""
+    bits = 0
+    for i, k in enumerate(FEATURE_FLAGS):
+        if int(feats.get(k, 0)):
+            bits |= 1 << i
+    return bits
 
 
-def insert_entry(conn: sqlite3.Connection, password: str, tool: str | None, source: str = "user_input") -> int:
+_FEATURE_COLUMNS = ["flags", *FEATURE_COUNTS, "RiskIndex", "AutoRiskLabel", "model_version"]
+
+_INSERT_FEATURES_SQL = f"""INSERT INTO password_features(
+            entry_id,{",".join(_FEATURE_COLUMNS)}
+        ) VALUES ({",".join(["?"] * (len(_FEATURE_COLUMNS) + 1))})"""
+
+
+def insert_entry(conn: sqlite3.Connection, password: str, tool: str | None, source: str = "user_input", fingerprint: str | None = None) -> int:
     """Insert a new entry storing only a salted hash (no plaintext password)."""
     now = int(time.time())
-    pw_hash, salt_hex = _salted_sha256(password)
+    pw_hash, salt = _salted_sha256(password)
     pw_mask = _mask_password(password)
     cur = conn.execute(
-        "INSERT INTO password_entries(password_hash, salt, password_mask, tool, source, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-        (pw_hash, salt_hex, pw_mask, tool, source, now),
+        "INSERT INTO password_entries(password_hash, salt, password_mask, tool, source, created_at, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (pw_hash, salt, pw_mask, tool, source, now, _fp_bytes(fingerprint)),
     )
     conn.commit()
     return int(cur.lastrowid)
 
-def insert_features(conn: sqlite3.Connection, entry_id: int, feats: dict[str, Any], risk_index: float, auto_label: str) -> None:
-    values = [entry_id] + [int(feats.get(k, 0)) for k in FEATURE_KEYS] + [float(risk_index), str(auto_label)]
-    conn.execute(
-        f"""INSERT INTO password_features(
-            entry_id,{",".join(FEATURE_KEYS)},RiskIndex,AutoRiskLabel
-        ) VALUES ({",".join(["?"]*(len(values)))})""",
-        values,
+def feature_values(entry_id: int, feats: dict[str, Any], risk_index: float, auto_label: str, model_version: str | None = None) -> list:
+    """Row values for password_features, in insert column order.
+
+    `model_version` is the scoring.scoring_model_version() that produced
+    risk_index (None if unknown; `oampass rescore` then treats the row as stale).
+    """
+    return (
+        [entry_id, pack_flags(feats)]
+        + [int(feats.get(k, 0)) for k in FEATURE_COUNTS]
+        + [float(risk_index), str(auto_label), model_version]
     )
+
+def insert_features(
+    conn: sqlite3.Connection,
+    entry_id: int,
+    feats: dict[str, Any],
+    risk_index: float,
+    auto_label: str,
+    model_version: str | None = None,
+) -> None:
+    conn.execute(_INSERT_FEATURES_SQL, feature_values(entry_id, feats, risk_index, auto_label, model_version))
     conn.commit()
 
+def insert_evaluation(
+    conn: sqlite3.Connection,
+    password: str,
+    tool: str | None,
+    feats: dict[str, Any],
+    risk_index: float,
+    auto_label: str,
+    source: str = "user_input",
+    fingerprint: str | None = None,
+    model_version: str | None = None,
+) -> int:
+    """Insert an entry and its features; returns the entry id."""
+    entry_id = insert_entry(conn, password, tool, source=source, fingerprint=fingerprint)
+    insert_features(conn, entry_id, feats, risk_index, auto_label, model_version)
+    return entry_id
+
+# --- Bulk helpers (no commit; the caller owns the transaction) ---
+
+def entry_values(
+    entry_id: int,
+    password: str,
+    tool: str | None,
+    source: str,
+    created_at: int,
+    fingerprint: str | None = None,
+    occurrences: int = 1,
+) -> tuple:
+    """Row values for password_entries with an explicit id (hash + mask only, no plaintext)."""
+    pw_hash, salt = _salted_sha256(password)
+    return (entry_id, pw_hash, salt, _mask_password(password), tool, source, created_at, _fp_bytes(fingerprint), occurrences)
+
+def next_entry_id(conn: sqlite3.Connection) -> int:
+    """First id AUTOINCREMENT would hand out next (call inside a write transaction)."""
+    row = conn.execute(
+        """SELECT MAX(COALESCE((SELECT MAX(id) FROM password_entries), 0),
+                      COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'password_entries'), 0))"""
+    ).fetchone()
+    return int(row[0]) + 1
+
+def insert_entries_many(conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+    conn.executemany(
+        """INSERT INTO password_entries(id, password_hash, salt, password_mask, tool, source, created_at, fingerprint, occurrences)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+
+def insert_features_many(conn: sqlite3.Connection, rows: Iterable[list]) -> None:
+    conn.executemany(_INSERT_FEATURES_SQL, rows)
+
+# --- Fingerprint lookups (see fingerprint.py) ---
+
+_LOOKUP_BATCH = 500  # stays under SQLite's bound-parameter limit
+
+def find_fingerprints(conn: sqlite3.Connection, fingerprints: Iterable[str]) -> dict[str, list[tuple[int, str]]]:
+    """Map each stored fingerprint to its [(entry_id, tool or '')] rows (index lookups)."""
+    fps = [_fp_bytes(fp) for fp in dict.fromkeys(fingerprints)]
+    out: dict[str, list[tuple[int, str]]] = {}
+    for i in range(0, len(fps), _LOOKUP_BATCH):
+        batch = fps[i:i + _LOOKUP_BATCH]
+        rows = conn.execute(
+            f"""SELECT fingerprint, id, COALESCE(tool, '') FROM password_entries
+                WHERE fingerprint IN ({",".join("?" * len(batch))}) ORDER BY id""",
+            batch,
+        )
+        for fp, entry_id, tool in rows:
+            out.setdefault(fp.hex(), []).append((entry_id, tool))
+    return out
+
+def find_evaluation(conn: sqlite3.Connection, fingerprint: str, tool: str | None = None) -> sqlite3.Row | None:
+    """Stored joined row for a fingerprint, preferring the entry with the same tool."""
+    return conn.execute(
+        f"""SELECT {JOINED_COLUMNS}
+            FROM password_entries e JOIN password_features f ON f.entry_id = e.id
+            WHERE e.fingerprint = ?
+            ORDER BY COALESCE(e.tool, '') = ? DESC, e.id
+            LIMIT 1""",
+        (_fp_bytes(fingerprint), tool or ""),
+    ).fetchone()
+
+def add_occurrences(conn: sqlite3.Connection, rows: Iterable[tuple[int, int]]) -> None:
+    """Add (count, entry_id) occurrences to existing entries (no commit)."""
+    conn.executemany("UPDATE password_entries SET occurrences = occurrences + ? WHERE id = ?", rows)
+
+def copy_features_many(conn: sqlite3.Connection, rows: Iterable[tuple[int, int]]) -> None:
+    """Insert features for (new_entry_id, source_entry_id) pairs by copying the stored row (no commit)."""
+    cols = ",".join(_FEATURE_COLUMNS)
+    conn.executemany(
+        f"INSERT INTO password_features(entry_id,{cols}) SELECT ?,{cols} FROM password_features WHERE entry_id = ?",
+        rows,
+    )
+
 def fetch_joined(conn: sqlite3.Connection, limit: int = 1000) -> list[sqlite3.Row]:
     return conn.execute(
-        """SELECT e.id, e.password_hash, e.password_mask, e.tool, e.source, e.created_at,
-                  f.Length, f.HasUpper, f.HasLower, f.HasDigit, f.HasSymbol,
-                  f.CountUpper, f.CountLower, f.CountDigit, f.CountSymbol,
-                  f.StartsWithDigit, f.EndsWithSymbol, f.HasRepeatedChars, f.HasDictionaryWord,
-                  f.IsPalindrome, f.HasSequential, f.UniqueChars, f.AsciiRange,
-                  f.RiskIndex, f.AutoRiskLabel
-           FROM password_entries e
-           JOIN password_features f ON f.entry_id = e.id
-           ORDER BY e.created_at DESC
-           LIMIT ?""",
+        f"""SELECT {JOINED_COLUMNS}
+            FROM password_entries e JOIN password_features f ON f.entry_id = e.id
+            ORDER BY e.created_at DESC
+            LIMIT ?""",
         (limit,),
     ).fetchall()
+
+# --- Keyset pagination ---
+
+# order name -> (driving join, sort key, tie-breaker). CROSS JOIN pins the table that
+# owns the sort key as the outer loop so the ORDER BY is served by an index.
+_PAGE_ORDERS = {
+    "recent": ("password_entries e CROSS JOIN password_features f ON f.entry_id = e.id", "e.created_at", "e.id"),
+    "risk": ("password_features f CROSS JOIN password_entries e ON e.id = f.entry_id", "f.RiskIndex", "f.entry_id"),
+}
+
+@dataclass(frozen=True)
+class Page:
+    rows: list[sqlite3.Row]
+    # Pass back as `cursor` to get the following page; None on the last page.
+    next_cursor: tuple | None
+
+def _page_filters(
+    tool: str | None,
+    source: str | None,
+    label: str | None,
+    risk_min: float | None,
+    risk_max: float | None,
+    since: int | None,
+    until: int | None,
+) -> tuple[list[str], list]:
+    where: list[str] = []
+    params: list = []
+    for clause, value in (
+        ("e.tool = ?", tool),
+        ("e.source = ?", source),
+        ("f.AutoRiskLabel = ?", label),
+        ("f.RiskIndex >= ?", risk_min),
+        ("f.RiskIndex <= ?", risk_max),
+        ("e.created_at >= ?", since),
+        ("e.created_at < ?", until),
+    ):
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    return where, params
+
+def page_query(
+    *,
+    order: str = "recent",
+    cursor: tuple | None = None,
+    limit: int = 100,
+    tool: str | None = None,
+    source: str | None = None,
+    label: str | None = None,
+    risk_min: float | None = None,
+    risk_max: float | None = None,
+    since: int | None = None,
+    until: int | None = None,
+) -> tuple[str, list]:
+    """Build the SQL and parameters behind fetch_page (exposed for EXPLAIN tests)."""
+    if order not in _PAGE_ORDERS:
+        raise ValueError(f"order must be one of {sorted(_PAGE_ORDERS)}")
+    source_sql, key, tie = _PAGE_ORDERS[order]
+    where, params = _page_filters(tool, source, label, risk_min, risk_max, since, until)
+    if cursor is not None:
+        where.append(f"({key}, {tie}) < (?, ?)")
+        params.extend(cursor)
+    sql = f"""SELECT {JOINED_COLUMNS}
+           FROM {source_sql}
+           {"WHERE " + " AND ".join(where) if where else ""}
+           ORDER BY {key} DESC, {tie} DESC
+           LIMIT ?"""
+    return sql, params + [int(limit)]
+
+def fetch_page(conn: sqlite3.Connection, *, order: str = "recent", cursor: tuple | None = None, limit: int = 100, **filters: Any) -> Page:
+    """Return one page of joined rows, newest first ("recent") or riskiest first ("risk").
+
+    Filters: tool, source, label (AutoRiskLabel), risk_min/risk_max (inclusive),
+    since/until (created_at epoch seconds, half-open). Pagination is keyset
+    based: pass the returned next_cursor to continue after the last row.
+    """
+    sql, params = page_query(order=order, cursor=cursor, limit=limit, **filters)
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(rows) == limit and rows:
+        last = rows[-1]
+        next_cursor = (last["created_at"], last["id"]) if order == "recent" else (last["RiskIndex"], last["id"])
+    return Page(rows=rows, next_cursor=next_cursor)
+
+# --- Aggregates (risk_stats, maintained by triggers in db.py) ---
+
+STATS_KEY_NAMES = {"tool": "Tool", "label": "AutoRiskLabel", "day": "Day"}
+
+def fetch_stats(conn: sqlite3.Connection, dim: str) -> list[sqlite3.Row]:
+    """count/mean/min/max of RiskIndex per tool, AutoRiskLabel or UTC day (O(groups))."""
+    if dim not in STATS_KEY_NAMES:
+        raise ValueError(f"dim must be one of {sorted(STATS_KEY_NAMES)}")
+    order = "key" if dim == "day" else "mean DESC, key"
+    return conn.execute(
+        f"""SELECT key AS {STATS_KEY_NAMES[dim]}, n AS count, risk_sum / n AS mean, risk_min AS min, risk_max AS max
+            FROM risk_stats WHERE dim = ? ORDER BY {order}""",
+        (dim,),
+    ).fetchall()
+
+def fetch_totals(conn: sqlite3.Connection) -> dict[str, float | int | None]:
+    """Database-wide count/mean/min/max of RiskIndex and the count per label."""
+    row = conn.execute(
+        """SELECT SUM(n), SUM(risk_sum) / SUM(n), MIN(risk_min), MAX(risk_max)
+           FROM risk_stats WHERE dim = 'label'"""
+    ).fetchone()
+    by_label = dict(conn.execute("SELECT key, n FROM risk_stats WHERE dim = 'label'").fetchall())
+    return {"count": row[0] or 0, "mean": row[1], "min": row[2], "max": row[3], "by_label": by_label}
@@ -0,0 +1,157 @@
+"""Aho-Corasick matcher behind `features.has_dictionary_word`.
+
+The automaton is built once from COMMON_WEAK_WORDS plus the wordlist and
+answers "does any pattern occur in this text" in one linear pass. Built
+automata are pickled under CACHE_DIR, keyed by a hash of the wordlist bytes and
+the matching settings, so later processes skip parsing the wordlist.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+from .config import CACHE_DIR, COMMON_WEAK_WORDS, MIN_DICT_WORD_LEN, WORDLIST_PATH
+
+# Pattern kinds (bit flags stored per automaton state)
+WEAK_WORD = 1  # COMMON_WEAK_WORDS: matched against raw, compact and normalized forms
+LIST_WORD = 2  # wordlist entries: matched against the normalized form only
+
+# has_dictionary_word only looks at substrings up to this length
+MAX_DICT_WORD_LEN = 32
+
+# Bump when the pickled layout changes so old cache files are ignored.
+_ARTIFACT_VERSION = 1
+
+
+class Automaton:
+    """Aho-Corasick automaton over str patterns.
+
+    `goto[s]` maps a character to the next state, `fail[s]` is the failure
+    link and `out[s]` holds the kinds of every pattern ending at `s`
+    (including those reached through failure links).
+    """
+
+    __slots__ = ("goto", "fail", "out")
+
+    def __init__(self, goto: list[dict[str, int]], fail: list[int], out: list[int]):
+        self.goto = goto
+        self.fail = fail
+        self.out = out
+
+    @classmethod
+    def build(cls, patterns: Iterable[tuple[str, int]]) -> "Automaton":
+        goto: list[dict[str, int]] = [{}]
+        out = [0]
+        for word, kind in patterns:
+            if not word:
+                continue
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(0)
+                state = nxt
+            out[state] |= kind
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+                queue.append(nxt)
+        return cls(goto, fail, out)
+
+    def search(self, text: str, kinds: int) -> bool:
+        """Return True if a pattern of one of `kinds` occurs in `text`."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state] & kinds:
+                return True
+        return False
+
+
+def _read_wordlist(raw: str) -> list[str]:
+    out = set()
+    for line in raw.splitlines():
+        w = line.strip().lower()
+        if not w or w.startswith("#"):
+            continue
+        if w.isascii() and w.isalpha() and MIN_DICT_WORD_LEN <= len(w) <= MAX_DICT_WORD_LEN:
+            out.add(w)
+    return sorted(out)
+
+
+def _artifact_key(wordlist_bytes: bytes) -> str:
+    h = hashlib.sha256()
+    h.update(f"v{_ARTIFACT_VERSION}|{MIN_DICT_WORD_LEN}|{MAX_DICT_WORD_LEN}|".encode())
+    h.update("\n".join(COMMON_WEAK_WORDS).encode("utf-8"))
+    h.update(b"|")
+    h.update(wordlist_bytes)
+    return h.hexdigest()
+
+
+def _build(wordlist_bytes: bytes) -> Automaton:
+    words = _read_wordlist(wordlist_bytes.decode("utf-8", errors="ignore"))
+    patterns = [(w, WEAK_WORD) for w in COMMON_WEAK_WORDS] + [(w, LIST_WORD) for w in words]
+    return Automaton.build(patterns)
+
+
+def _wordlist_bytes(wordlist_path: Path) -> bytes:
+    return wordlist_path.read_bytes() if wordlist_path.exists() else b""
+
+
+def dictionary_key(wordlist_path: Path = WORDLIST_PATH) -> str:
+    """Hash of the wordlist contents and matching settings (changes => new automaton)."""
+    return _artifact_key(_wordlist_bytes(wordlist_path))
+
+
+def artifact_path(wordlist_path: Path = WORDLIST_PATH, cache_dir: Path = CACHE_DIR) -> Path:
+    """Return the cache file that holds the automaton for `wordlist_path`."""
+    return cache_dir / f"dictionary-{dictionary_key(wordlist_path)[:16]}.pickle"
+
+
+def load_automaton(wordlist_path: Path = WORDLIST_PATH, cache_dir: Path = CACHE_DIR) -> Automaton:
+    """Load the automaton from its cache file, building (and caching) it if needed."""
+    data = _wordlist_bytes(wordlist_path)
+    path = cache_dir / f"dictionary-{_artifact_key(data)[:16]}.pickle"
+    try:
+        with path.open("rb") as f:
+            goto, fail, out = pickle.load(f)
+        return Automaton(goto, fail, out)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    ac = _build(data)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump((ac.goto, ac.fail, ac.out), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        # A read-only install still works; it just rebuilds per process.
+        pass
+    return ac
+
+
+@lru_cache(maxsize=1)
+def get_automaton() -> Automaton:
+    return load_automaton()
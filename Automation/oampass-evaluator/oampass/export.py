@@ -0,0 +1,142 @@
+"""Streaming export of the stored entries to CSV / CSV.gz / XLSX.
+
+Rows are pulled from one SQLite cursor with fetchmany() and written straight to
+the output file (openpyxl's write-only mode for XLSX), so memory use depends on
+`chunk_size`, not on how many rows the database holds.
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+import gzip
+from pathlib import Path
+import sqlite3
+import time
+from typing import Any, Iterator
+
+from .config import IMPORT_CHUNK_ROWS
+from .db_ops import page_query
+
+EXPORT_FORMATS = ("csv", "csv.gz", "xlsx")
+
+# Rows per worksheet; Excel's hard limit is 1,048,576 including the header row.
+XLSX_MAX_ROWS = 1_048_575
+
+
+@dataclass(frozen=True)
+class ExportReport:
+    path: str
+    fmt: str
+    rows: int
+    seconds: float
+
+    def as_dict(self) -> dict:
+        return {"path": self.path, "format": self.fmt, "rows": self.rows, "seconds": round(self.seconds, 6)}
+
+
+def detect_export_format(path: str | Path) -> str:
+    name = Path(path).name.lower()
+    for fmt in sorted(EXPORT_FORMATS, key=len, reverse=True):
+        if name.endswith("." + fmt):
+            return fmt
+    raise ValueError(f"Cannot infer export format from {Path(path).name!r}; use .csv, .csv.gz or .xlsx.")
+
+
+def iter_export_chunks(
+    conn: sqlite3.Connection,
+    *,
+    order: str = "recent",
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    limit: int | None = None,
+    **filters: Any,
+) -> tuple[list[str], Iterator[list[tuple]]]:
+    """Return (header, chunks) for the filtered joined view (same filters as db_ops.fetch_page).
+
+    `limit` stops after that many rows; with order="risk" that is the top-K riskiest,
+    read in index order (ties: newest entry first, as in fetch_page).
+    """
+    sql, params = page_query(order=order, limit=-1 if limit is None else limit, **filters)
+    cur = conn.execute(sql, params)
+    header = [d[0] for d in cur.description]
+
+    def chunks() -> Iterator[list[tuple]]:
+        try:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield [tuple(r) for r in rows]
+        finally:
+            cur.close()
+
+    return header, chunks()
+
+
+def _write_csv(path: Path, header: list[str], chunks: Iterator[list[tuple]], compress: bool) -> int:
+    opener = gzip.open if compress else open
+    n = 0
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for rows in chunks:
+            w.writerows(rows)
+            n += len(rows)
+    return n
+
+
+def _write_xlsx(path: Path, header: list[str], chunks: Iterator[list[tuple]]) -> int:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = None
+    sheet_rows = XLSX_MAX_ROWS
+    n = 0
+    for rows in chunks:
+        for row in rows:
+            if sheet_rows >= XLSX_MAX_ROWS:
+                ws = wb.create_sheet("DB_Export" if ws is None else f"DB_Export_{len(wb.worksheets) + 1}")
+                ws.append(header)
+                sheet_rows = 0
+            ws.append(row)
+            sheet_rows += 1
+        n += len(rows)
+    if ws is None:
+        wb.create_sheet("DB_Export").append(header)
+    wb.save(path)
+    return n
+
+
+def export_db(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    *,
+    fmt: str | None = None,
+    order: str = "recent",
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    limit: int | None = None,
+    **filters: Any,
+) -> ExportReport:
+    """Stream the (optionally filtered) joined view to `path`.
+
+    The file is written next to `path` and renamed into place when complete.
+    """
+    path = Path(path)
+    fmt = fmt or detect_export_format(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"fmt must be one of {EXPORT_FORMATS}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+
+    t0 = time.perf_counter()
+    header, chunks = iter_export_chunks(conn, order=order, chunk_size=max(1, int(chunk_size)), limit=limit, **filters)
+    try:
+        if fmt == "xlsx":
+            rows = _write_xlsx(tmp, header, chunks)
+        else:
+            rows = _write_csv(tmp, header, chunks, compress=(fmt == "csv.gz"))
+        tmp.replace(path)
+    finally:
+        chunks.close()
+        tmp.unlink(missing_ok=True)
+    return ExportReport(path=str(path), fmt=fmt, rows=rows, seconds=time.perf_counter() - t0)
@@ -6,6 +6,7 @@ import re
 from dataclasses import dataclass
 
 from .config import COMMON_WEAK_WORDS
+from .dictionary import LIST_WORD, WEAK_WORD, get_automaton
 
 _SYMBOL_RE = re.compile(r"[^A-Za-z0-9]")
 
@@ -98,11 +99,15 @@ def has_repeated_chars(pw: str) -> int:
     return 0
 
 
+_LEET_TABLE = str.maketrans({"0":"o","1":"i","3":"e","4":"a","5":"s","7":"t","@":"a","$":"s","!":"i"})
+_COMPACT_RE = re.compile(r"[^a-z0-9@!$]")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]")
+
+
 def _normalize_leetspeak(s: str) -> str:
     if not s:
         return ""
-    trans = str.maketrans({"0":"o","1":"i","3":"e","4":"a","5":"s","7":"t","@":"a","$":"s","!":"i"})
-    return s.translate(trans)
+    return s.translate(_LEET_TABLE)
 
 @lru_cache(maxsize=1)
 def _load_wordlist() -> set[str]:
@@ -118,6 +123,23 @@ def _load_wordlist() -> set[str]:
     return out
 
 def has_dictionary_word(pw: str) -> int:
+    """Return 1 if a weak word or wordlist word occurs in the password.
+
+    Weak words are searched in the lowered, compact and leet-normalized forms;
+    wordlist words only in the normalized form. Matching uses the precompiled
+    automaton from `oampass.dictionary` (one pass per form).
+    """
+    s = (pw or "").lower()
+    compact = _COMPACT_RE.sub("", s)
+    norm = _NON_ALNUM_RE.sub("", compact.translate(_LEET_TABLE))
+
+    ac = get_automaton()
+    if ac.search(s, WEAK_WORD) or ac.search(compact, WEAK_WORD):
+        return 1
+    return 1 if ac.search(norm, WEAK_WORD | LIST_WORD) else 0
+
+def has_dictionary_word_reference(pw: str) -> int:
+    """Substring-scan version of has_dictionary_word (kept for tests/benchmarks)."""
     s = (pw or "").lower()
 
     # Normalize: keep letters+digits for leet conversion
@@ -171,7 +193,131 @@ def has_sequential(pw: str) -> int:
     return 0
 
 
+# Character classes used by the fused scanner (and features_batch)
+CLS_UPPER = 1
+CLS_LOWER = 2
+CLS_DIGIT = 4
+CLS_SYMBOL = 8  # not A-Za-z0-9 (same rule as _is_symbol)
+CLS_SEQ_ALPHA = 16  # lowered char isalpha() (has_sequential)
+CLS_SEQ_DIGIT = 32  # lowered char isdigit() (has_sequential)
+CLS_LOWER_MULTI = 64  # ch.lower() is not a single character
+CLS_LOWER_CONTEXT = 128  # str.lower() maps ch by its neighbours (final sigma: "Σ" -> "ς")
+
+
+def classify_char(ch: str) -> tuple[int, int]:
+    """Return (class bits, code point of ch.lower()) for one character."""
+    bits = 0
+    if ch.isupper():
+        bits |= CLS_UPPER
+    if ch.islower():
+        bits |= CLS_LOWER
+    if ch.isdigit():
+        bits |= CLS_DIGIT
+    if not (("a" <= ch <= "z") or ("A" <= ch <= "Z") or ("0" <= ch <= "9")):
+        bits |= CLS_SYMBOL
+    low = ch.lower()
+    if len(low) != 1:
+        return bits | CLS_LOWER_MULTI, ord(ch)
+    if ("a" + ch).lower() != "a" + low:
+        bits |= CLS_LOWER_CONTEXT
+    if low.isalpha():
+        bits |= CLS_SEQ_ALPHA
+    if low.isdigit():
+        bits |= CLS_SEQ_DIGIT
+    return bits, ord(low)
+
+
+_ASCII_CLASSES = {chr(i): classify_char(chr(i)) for i in range(128)}
+_classify_cached = lru_cache(maxsize=4096)(classify_char)
+
+
+def _scan(pw: str) -> dict:
+    """Compute every feature except HasDictionaryWord in one walk over pw."""
+    n = len(pw)
+    cu = cl = cd = cs = 0
+    repeated = sequential = 0
+    multi = 0
+    seen = set()
+    alnum = []
+    lo = hi = ord(pw[0]) if n else 0
+    prev = None
+    p1 = p2 = 0  # lowered code points of the previous two chars
+    k1 = k2 = 0  # their CLS_SEQ_* bits
+
+    for ch in pw:
+        bits, lc = _ASCII_CLASSES.get(ch) or _classify_cached(ch)
+        if bits & CLS_UPPER:
+            cu += 1
+        if bits & CLS_LOWER:
+            cl += 1
+        if bits & CLS_DIGIT:
+            cd += 1
+        if bits & CLS_SYMBOL:
+            cs += 1
+        else:
+            alnum.append(lc)
+        if ch == prev:
+            repeated = 1
+        prev = ch
+        seen.add(ch)
+        o = ord(ch)
+        if o < lo:
+            lo = o
+        elif o > hi:
+            hi = o
+        kind = bits & (CLS_SEQ_ALPHA | CLS_SEQ_DIGIT)
+        if kind & k1 & k2 and ((lc - p1 == 1 and p1 - p2 == 1) or (lc - p1 == -1 and p1 - p2 == -1)):
+            sequential = 1
+        p2, k2 = p1, k1
+        p1, k1 = lc, kind
+        multi |= bits & (CLS_LOWER_MULTI | CLS_LOWER_CONTEXT)
+
+    unique = len(seen)
+    if n >= 6 and (unique / n) <= 0.5:
+        repeated = 1
+    if multi:
+        # str.lower() changes the length or maps a char by its neighbours,
+        # so per-char lowered code points no longer match it
+        sequential = has_sequential(pw)
+
+    return {
+        "Length": n,
+        "HasUpper": 1 if cu else 0,
+        "HasLower": 1 if cl else 0,
+        "HasDigit": 1 if cd else 0,
+        "HasSymbol": 1 if cs else 0,
+        "CountUpper": cu,
+        "CountLower": cl,
+        "CountDigit": cd,
+        "CountSymbol": cs,
+        "StartsWithDigit": 1 if n and pw[0].isdigit() else 0,
+        "EndsWithSymbol": 1 if n and _ASCII_CLASSES.get(pw[-1], (CLS_SYMBOL,))[0] & CLS_SYMBOL else 0,
+        "HasRepeatedChars": repeated,
+        "HasDictionaryWord": 0,
+        "IsPalindrome": 1 if len(alnum) >= 3 and alnum == alnum[::-1] else 0,
+        "HasSequential": sequential,
+        "UniqueChars": unique,
+        "AsciiRange": hi - lo,
+    }
+
+
 def compute_all(pw: str) -> dict:
+    """Compute all OAMpass-derived features for one password.
+
+    Uses the fused single-pass scanner plus the dictionary automaton; values
+    are identical to `compute_all_reference`.
+    """
+    pw = pw or ""
+    feats = _scan(pw)
+    feats["HasDictionaryWord"] = has_dictionary_word(pw)
+    return feats
+
+
+def compute_all_reference(pw: str) -> dict:
+    """Per-feature version of compute_all (one walk per feature).
+
+    Kept as the readable reference that `compute_all` is tested against.
+    """
     pw = pw or ""
     return {
         "Length": length(pw),
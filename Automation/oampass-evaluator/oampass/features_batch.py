@@ -0,0 +1,301 @@
+"""Column-wise feature extraction for many passwords at once.
+
+`compute_all_batch` returns the same values as calling `features.compute_all`
+on every password, but classifies characters over a fixed-width array of code
+points so large datasets avoid 17 Python calls per row.
+
+Rows that cannot be represented exactly in the array (very long passwords, or
+characters whose lowercase form is more than one code point or depends on the
+neighbouring characters, like a final "Σ") are routed through the scalar
+functions, so the output is always identical.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import time
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .config import OAMPASS_DERIVED_COLUMNS
+from .features import (
+    CLS_DIGIT,
+    CLS_LOWER,
+    CLS_LOWER_CONTEXT,
+    CLS_LOWER_MULTI,
+    CLS_SEQ_ALPHA,
+    CLS_SEQ_DIGIT,
+    CLS_SYMBOL,
+    CLS_UPPER,
+    classify_char,
+    compute_all,
+    has_dictionary_word,
+    has_sequential,
+)
+
+# Rows processed per array; keeps the (rows x width) arrays bounded.
+BATCH_CHUNK_ROWS = 65536
+# Passwords longer than this are scored by the scalar path instead of widening the array.
+BATCH_MAX_WIDTH = 128
+
+_PAD = np.uint32(0xFFFFFFFF)
+
+# Seconds per feature group, accumulated by compute_all_batch while feature_timings() is active.
+_timings: dict[str, float] | None = None
+
+
+@contextmanager
+def feature_timings() -> Iterator[dict[str, float]]:
+    """Collect cumulative per-feature-group time spent in compute_all_batch (this process only)."""
+    global _timings
+    prev, _timings = _timings, {}
+    try:
+        yield _timings
+    finally:
+        _timings = prev
+
+
+class _Laps:
+    __slots__ = ("t",)
+
+    def __init__(self) -> None:
+        self.t = time.perf_counter()
+
+    def __call__(self, name: str) -> None:
+        now = time.perf_counter()
+        if _timings is not None:
+            _timings[name] = _timings.get(name, 0.0) + (now - self.t)
+        self.t = now
+
+
+def _no_lap(name: str) -> None:
+    pass
+
+
+def _laps() -> Callable[[str], None]:
+    return _Laps() if _timings is not None else _no_lap
+
+
+def _build_tables(cps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    pairs = [classify_char(chr(c)) for c in cps]
+    bits = np.array([b for b, _ in pairs], dtype=np.uint8)
+    lowered = np.array([lc for _, lc in pairs], dtype=np.int64)
+    return bits, lowered
+
+
+_ASCII_BITS, _ASCII_LOWER = _build_tables(np.arange(128))
+
+
+def _lookup(codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Map a code-point array to (class bits, lowered code points)."""
+    if codes.size == 0 or int(codes.max()) < 128:
+        return _ASCII_BITS[codes], _ASCII_LOWER[codes]
+    uniq = np.unique(codes)
+    bits, lowered = _build_tables(uniq)
+    idx = np.searchsorted(uniq, codes)
+    return bits[idx], lowered[idx]
+
+
+def _encode(passwords: list[str], width: int) -> np.ndarray:
+    """Encode passwords as a (rows, width) uint32 code-point array (zero padded)."""
+    width = max(width, 1)
+    arr = np.array(passwords, dtype=f"<U{width}")
+    return arr.view(np.uint32).reshape(len(passwords), width)
+
+
+def _row_any(mask: np.ndarray) -> np.ndarray:
+    return mask.any(axis=1).astype(np.int64)
+
+
+def _vector_features(passwords: list[str]) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Compute all array-friendly features for `passwords`.
+
+    Returns (columns, fallback_rows) where fallback_rows flags rows whose
+    sequential check must be redone by the scalar path.
+    """
+    lap = _laps()
+    n = len(passwords)
+    lengths = np.fromiter((len(p) for p in passwords), dtype=np.int64, count=n)
+    width = int(lengths.max()) if n else 0
+    codes = _encode(passwords, width)
+    width = codes.shape[1]
+
+    pos = np.arange(width)
+    valid = pos[None, :] < lengths[:, None]
+    bits, lowered = _lookup(codes)
+    bits = np.where(valid, bits, 0)
+    rows = np.arange(n)
+    nonempty = lengths > 0
+    lap("classify")
+
+    upper = (bits & CLS_UPPER) != 0
+    lower = (bits & CLS_LOWER) != 0
+    digit = (bits & CLS_DIGIT) != 0
+    symbol = (bits & CLS_SYMBOL) != 0
+
+    cols: dict[str, np.ndarray] = {"Length": lengths}
+    cols["CountUpper"] = upper.sum(axis=1).astype(np.int64)
+    cols["CountLower"] = lower.sum(axis=1).astype(np.int64)
+    cols["CountDigit"] = digit.sum(axis=1).astype(np.int64)
+    cols["CountSymbol"] = symbol.sum(axis=1).astype(np.int64)
+    cols["HasUpper"] = (cols["CountUpper"] > 0).astype(np.int64)
+    cols["HasLower"] = (cols["CountLower"] > 0).astype(np.int64)
+    cols["HasDigit"] = (cols["CountDigit"] > 0).astype(np.int64)
+    cols["HasSymbol"] = (cols["CountSymbol"] > 0).astype(np.int64)
+    lap("Count*/Has*")
+
+    last = np.maximum(lengths - 1, 0)
+    cols["StartsWithDigit"] = (nonempty & digit[:, 0]).astype(np.int64)
+    cols["EndsWithSymbol"] = (nonempty & symbol[rows, last]).astype(np.int64)
+    lap("StartsWithDigit/EndsWithSymbol")
+
+    # UniqueChars: count value changes along each sorted row (padding sorts last)
+    padded = np.where(valid, codes, _PAD)
+    srt = np.sort(padded, axis=1)
+    changes = (srt[:, 1:] != srt[:, :-1]) & valid[:, 1:]
+    unique = np.where(nonempty, changes.sum(axis=1) + 1, 0).astype(np.int64)
+    cols["UniqueChars"] = unique
+    lap("UniqueChars")
+
+    # AsciiRange: max - min code point over the valid positions
+    hi = np.where(valid, codes, 0).max(axis=1).astype(np.int64)
+    lo = np.where(valid, codes, _PAD).min(axis=1).astype(np.int64)
+    cols["AsciiRange"] = np.where(nonempty, hi - lo, 0).astype(np.int64)
+    lap("AsciiRange")
+
+    # HasRepeatedChars: consecutive repeat, or low diversity (unique/len <= 0.5)
+    consecutive = _row_any((codes[:, 1:] == codes[:, :-1]) & valid[:, 1:])
+    low_diversity = (lengths >= 6) & (2 * unique <= lengths)
+    cols["HasRepeatedChars"] = np.where(nonempty, consecutive | low_diversity, 0).astype(np.int64)
+    lap("HasRepeatedChars")
+
+    # IsPalindrome: ASCII alphanumerics only, lowercased, length >= 3
+    keep = valid & ~symbol
+    k = keep.sum(axis=1)
+    order = np.argsort(~keep, axis=1, kind="stable")
+    t = np.take_along_axis(lowered, order, axis=1)
+    mirror = np.clip(k[:, None] - 1 - pos[None, :], 0, None)
+    same = (t == np.take_along_axis(t, mirror, axis=1)) | (pos[None, :] >= k[:, None])
+    cols["IsPalindrome"] = ((k >= 3) & same.all(axis=1)).astype(np.int64)
+    lap("IsPalindrome")
+
+    # HasSequential: three lowered chars, all alpha or all digit, stepping +1 or -1
+    if width >= 3:
+        in_range = pos[None, : width - 2] + 2 < lengths[:, None]
+        b0, b1, b2 = bits[:, :-2], bits[:, 1:-1], bits[:, 2:]
+        same_kind = ((b0 & b1 & b2 & CLS_SEQ_DIGIT) != 0) | ((b0 & b1 & b2 & CLS_SEQ_ALPHA) != 0)
+        d1 = lowered[:, 1:-1] - lowered[:, :-2]
+        d2 = lowered[:, 2:] - lowered[:, 1:-1]
+        step = ((d1 == 1) & (d2 == 1)) | ((d1 == -1) & (d2 == -1))
+        cols["HasSequential"] = _row_any(in_range & same_kind & step)
+    else:
+        cols["HasSequential"] = np.zeros(n, dtype=np.int64)
+    lap("HasSequential")
+
+    fallback = _row_any((bits & (CLS_LOWER_MULTI | CLS_LOWER_CONTEXT)) != 0).astype(bool)
+    return cols, fallback
+
+
+def compute_all_batch(passwords: Iterable[str | None]) -> pd.DataFrame:
+    """Compute every column of OAMPASS_DERIVED_COLUMNS for many passwords.
+
+    Returns an int64 DataFrame with one row per input password (the index of a
+    Series input is preserved). Values match `features.compute_all` exactly.
+    """
+    index = passwords.index if isinstance(passwords, pd.Series) else None
+    pws = [p or "" for p in passwords]
+    n = len(pws)
+    out = {c: np.zeros(n, dtype=np.int64) for c in OAMPASS_DERIVED_COLUMNS}
+
+    for start in range(0, n, BATCH_CHUNK_ROWS):
+        chunk = pws[start:start + BATCH_CHUNK_ROWS]
+        too_long = [i for i, p in enumerate(chunk) if len(p) > BATCH_MAX_WIDTH]
+        short = [("" if len(p) > BATCH_MAX_WIDTH else p) for p in chunk]
+
+        cols, fallback = _vector_features(short)
+        lap = _laps()
+        sl = slice(start, start + len(chunk))
+        for c, v in cols.items():
+            out[c][sl] = v
+        out["HasDictionaryWord"][sl] = [has_dictionary_word(p) for p in chunk]
+        lap("HasDictionaryWord")
+
+        for i in too_long:
+            for c, v in compute_all(chunk[i]).items():
+                out[c][start + i] = v
+        # Only HasSequential reads whole-string lowercase positions
+        for i in np.flatnonzero(fallback):
+            out["HasSequential"][start + i] = has_sequential(chunk[i])
+        lap("scalar_fallback")
+
+    return pd.DataFrame(out, columns=OAMPASS_DERIVED_COLUMNS, index=index)
+
+
+@dataclass(frozen=True)
+class DedupResult:
+    """Features computed once per distinct password and broadcast back to every row."""
+    features: pd.DataFrame  # one row per input password
+    unique_features: pd.DataFrame  # one row per distinct password
+    codes: np.ndarray  # input row -> row of unique_features
+    seconds: float  # factorize + compute + broadcast
+    compute_seconds: float
+
+    @property
+    def rows(self) -> int:
+        return len(self.codes)
+
+    @property
+    def unique(self) -> int:
+        return len(self.unique_features)
+
+    @property
+    def uniqueness_ratio(self) -> float:
+        return self.unique / self.rows if self.rows else 1.0
+
+    @property
+    def seconds_saved(self) -> float:
+        """Estimated: compute time scaled to all rows, minus what the dedup pass actually took.
+
+        Negative when nearly every password is distinct (factorize/broadcast overhead).
+        """
+        if not self.unique:
+            return 0.0
+        return self.compute_seconds * self.rows / self.unique - self.seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "unique": self.unique,
+            "uniqueness_ratio": round(self.uniqueness_ratio, 6),
+            "seconds": round(self.seconds, 6),
+            "seconds_saved_est": round(self.seconds_saved, 6),
+        }
+
+
+def compute_all_dedup(
+    passwords: Iterable[str | None],
+    compute: Callable[[list[str]], pd.DataFrame] = compute_all_batch,
+) -> DedupResult:
+    """compute_all_batch (or `compute`) over the distinct passwords only.
+
+    The password column is factorized; features are computed for the unique
+    values and broadcast back by code. Output matches compute_all_batch.
+    """
+    t0 = time.perf_counter()
+    index = passwords.index if isinstance(passwords, pd.Series) else None
+    codes, uniques = pd.factorize(pd.Series([p or "" for p in passwords], dtype=object), sort=False)
+    t1 = time.perf_counter()
+    unique_features = compute(list(uniques))
+    t2 = time.perf_counter()
+    values = unique_features.to_numpy()[codes]
+    features = pd.DataFrame(values, columns=OAMPASS_DERIVED_COLUMNS, index=index)
+    return DedupResult(
+        features=features,
+        unique_features=unique_features.reset_index(drop=True),
+        codes=codes,
+        seconds=time.perf_counter() - t0,
+        compute_seconds=t2 - t1,
+    )
@@ -0,0 +1,79 @@
+"""Keyed password fingerprints for finding repeated passwords.
+
+A fingerprint is HMAC-SHA256(key, password). Unlike the salted hash stored per
+entry it is deterministic, so it can back a unique index, but without the key
+it cannot be recomputed from a guessed password. The key comes from
+$OAMPASS_FINGERPRINT_KEY or from FINGERPRINT_KEY_PATH, which is created with a
+random key on first use. Changing the key makes earlier fingerprints
+unmatchable (entries are then simply treated as new).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import secrets
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+from .config import FINGERPRINT_KEY_PATH
+
+FINGERPRINT_ENV = "OAMPASS_FINGERPRINT_KEY"
+FINGERPRINT_KEY_MIN_BYTES = 32
+
+
+def _read_key(path: Path) -> bytes:
+    key = path.read_bytes()
+    if len(key) < FINGERPRINT_KEY_MIN_BYTES:
+        raise ValueError(
+            f"fingerprint key file {path} holds {len(key)} bytes, expected at least {FINGERPRINT_KEY_MIN_BYTES}; "
+            "restore it, or delete it to start a new key (earlier fingerprints will no longer match)"
+        )
+    return key
+
+
+def load_key(path: Path = FINGERPRINT_KEY_PATH, *, create: bool = True) -> bytes | None:
+    """Return the fingerprint key, or None if none is configured and `create` is False."""
+    env = os.environ.get(FINGERPRINT_ENV)
+    if env:
+        return env.encode("utf-8")
+    try:
+        return _read_key(path)
+    except FileNotFoundError:
+        if not create:
+            return None
+    key = secrets.token_bytes(FINGERPRINT_KEY_MIN_BYTES)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write the whole key to a private temp file, then hard-link it into place:
+    # other processes see either no key file or a complete one. If another
+    # process linked its key first, use that one instead.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            return _read_key(path)
+    finally:
+        os.unlink(tmp)
+    return key
+
+
+def fingerprint(password: str, key: bytes) -> str:
+    return hmac.new(key, password.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def fingerprints(passwords: Iterable[str], key: bytes) -> list[str]:
+    """fingerprint() for many passwords (reuses the keyed HMAC state)."""
+    base = hmac.new(key, digestmod=hashlib.sha256)
+    out = []
+    for pw in passwords:
+        h = base.copy()
+        h.update(pw.encode("utf-8"))
+        out.append(h.hexdigest())
+    return out
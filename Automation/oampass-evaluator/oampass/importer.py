@@ -1,73 +1,458 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+import time
+
+import numpy as np
 import pandas as pd
 import sqlite3
 
+from .config import IMPORT_CHUNK_ROWS, OAMPASS_DERIVED_COLUMNS
 from .features import compute_all
-from .scoring import compute_risk_index, risk_label
-from .db_ops import insert_entry, insert_features
+from .features_batch import compute_all_dedup
+from .fingerprint import fingerprint, fingerprints
+from .io import find_column, iter_oampass_excel_chunks
+from .scoring import (
+    EXTERNAL_MODEL_VERSION,
+    compute_risk_index,
+    compute_risk_index_batch,
+    risk_label,
+    risk_label_batch,
+    scoring_model_version,
+)
+from .db_ops import (
+    add_occurrences,
+    copy_features_many,
+    entry_values,
+    feature_values,
+    find_evaluation,
+    find_fingerprints,
+    insert_entries_many,
+    insert_features_many,
+    next_entry_id,
+)
 
-def _find_column(cols: list[str], candidates: list[str]) -> str | None:
-    low = {c.lower(): c for c in cols}
-    for cand in candidates:
-        if cand.lower() in low:
-            return low[cand.lower()]
-    return None
+STAGES = ("read", "features", "scoring", "hashing", "insert")
 
-def import_from_dataframe(conn: sqlite3.Connection, df: pd.DataFrame, source: str = "excel_import", recompute: bool = False) -> int:
-    """Import rows from a DataFrame.
-    Expects at least a password column. Optionally uses existing feature cols and RiskIndex.
-    If recompute=True, always recompute features and RiskIndex.
-    Returns number of imported rows.
-    """
+
+@dataclass
+class ImportReport:
+    """Throughput report returned by bulk_import_dataframe."""
+    rows: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    stage_seconds: dict[str, float] = field(default_factory=lambda: {s: 0.0 for s in STAGES})
+    # With a fingerprint key: rows folded into an existing entry's occurrences, and
+    # new (password, tool) entries whose features were copied instead of recomputed.
+    deduplicated: int = 0
+    reused: int = 0
+    # Dedup-then-broadcast inside each chunk: rows whose features were computed, the
+    # distinct passwords among them, and the estimated seconds saved.
+    computed_rows: int = 0
+    computed_unique: int = 0
+    broadcast_seconds_saved: float = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "seconds": round(self.seconds, 6),
+            "rows_per_s": round(self.rows_per_s, 1),
+            "stage_seconds": {k: round(v, 6) for k, v in self.stage_seconds.items()},
+            "deduplicated": self.deduplicated,
+            "reused": self.reused,
+            "uniqueness_ratio": round(self.computed_unique / self.computed_rows, 6) if self.computed_rows else None,
+            "broadcast_seconds_saved_est": round(self.broadcast_seconds_saved, 6),
+        }
+
+
+@dataclass(frozen=True)
+class _Columns:
+    pw: str
+    tool: str | None
+    risk: str | None
+    names: list
+
+
+def _resolve_columns(df: pd.DataFrame) -> _Columns:
     cols = list(df.columns)
-    pw_col = _find_column(cols, ["Password", "password", "pw", "Pass"])
+    pw_col = find_column(cols, ["Password", "password", "pw", "Pass"])
     if not pw_col:
         raise ValueError("Could not find a Password column in the imported sheet.")
-
-    tool_col = _find_column(cols, ["Tool", "tool"])
     # Manual labels are intentionally ignored in the SQLite-backed product to keep it objective.
-    label_col = None
-    risk_col = _find_column(cols, ["RiskIndex", "riskindex", "risk_index"])
+    return _Columns(
+        pw=pw_col,
+        tool=find_column(cols, ["Tool", "tool"]),
+        risk=find_column(cols, ["RiskIndex", "riskindex", "risk_index"]),
+        names=cols,
+    )
+
+
+@dataclass(frozen=True)
+class _ScoredChunk:
+    passwords: list[str]
+    tools: list[str | None]
+    records: list[dict]
+    risk_index: np.ndarray
+    labels: np.ndarray
+    model_versions: np.ndarray
+
+
+@dataclass(frozen=True)
+class _Dedup:
+    """Fingerprint bookkeeping for one chunk; fingerprints/counts align with the scored rows."""
+    fingerprints: list[str]
+    counts: list[int]
+    bumps: list[tuple[int, int]]  # (count, entry_id): (password, tool) already stored
+    copies: list[tuple[str, str | None, str, int, int]]  # (password, tool, fp, count, source entry_id)
+
+
+def _clean_password(v) -> str:
+    return str(v or "").strip()
+
+
+def _clean_tool(v) -> str | None:
+    return str(v).strip() if pd.notna(v) else None
+
+
+def _timed(it: Iterable, report: ImportReport, stage: str) -> Iterator:
+    """Yield from `it`, charging the time spent producing items to `stage`."""
+    it = iter(it)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        report.stage_seconds[stage] += time.perf_counter() - t0
+        yield item
+
+
+def _score_chunk(df: pd.DataFrame, c: _Columns, recompute: bool, report: ImportReport) -> _ScoredChunk:
+    """Feature + scoring stage for one chunk (column-wise)."""
+    t0 = time.perf_counter()
+    passwords = df[c.pw].map(_clean_password)
+    tools = df[c.tool].map(_clean_tool) if c.tool else None
+
+    # Features: take existing columns where present, fill the rest from one computed batch.
+    needed = OAMPASS_DERIVED_COLUMNS
+    needs_compute = recompute or any((k not in c.names) or pd.to_numeric(df[k], errors="coerce").isna().any() for k in needed)
+    dedup = compute_all_dedup(passwords) if needs_compute else None
+    computed = dedup.features if dedup is not None else None
+    if dedup is not None:
+        report.computed_rows += dedup.rows
+        report.computed_unique += dedup.unique
+        report.broadcast_seconds_saved += dedup.seconds_saved
+
+    feats_df = pd.DataFrame(index=df.index)
+    for k in needed:
+        if recompute or k not in c.names:
+            feats_df[k] = computed[k]
+        elif computed is not None:
+            given = pd.to_numeric(df[k], errors="coerce")  # unreadable cells are recomputed
+            feats_df[k] = given.where(given.notna(), computed[k])
+        else:
+            feats_df[k] = df[k]
+    feats_df = feats_df.astype(np.int64)
+    t1 = time.perf_counter()
+
+    # RiskIndex: keep the given value unless recomputing or missing. When every
+    # feature was computed, score the distinct passwords only and broadcast.
+    if dedup is not None and (recompute or not any(k in c.names for k in needed)):
+        rix = compute_risk_index_batch(dedup.unique_features)[dedup.codes]
+    else:
+        rix = compute_risk_index_batch(feats_df)
+    versions = np.full(len(rix), scoring_model_version(), dtype=object)
+    if (not recompute) and c.risk:
+        given = df[c.risk].astype(float).to_numpy()
+        rix = np.where(np.isnan(given), rix, given)
+        versions[~np.isnan(given)] = EXTERNAL_MODEL_VERSION
+    labels = risk_label_batch(rix)
+    t2 = time.perf_counter()
+
+    # Rows without a password are skipped
+    keep = np.flatnonzero(passwords.ne("").to_numpy())
+    records = feats_df.to_dict("records")
+    scored = _ScoredChunk(
+        passwords=[passwords.iat[i] for i in keep],
+        tools=[tools.iat[i] for i in keep] if tools is not None else [None] * len(keep),
+        records=[records[i] for i in keep],
+        risk_index=rix[keep],
+        labels=labels[keep],
+        model_versions=versions[keep],
+    )
+    report.stage_seconds["features"] += t1 - t0
+    report.stage_seconds["scoring"] += t2 - t1
+    return scored
+
+
+def _dedupe_chunk(conn: sqlite3.Connection, df: pd.DataFrame, c: _Columns, key: bytes, report: ImportReport) -> tuple[pd.DataFrame, _Dedup]:
+    """Fingerprint stage: keep one row per new (password, tool), count the rest.
+
+    Pairs already in the database only get their occurrences bumped; a known
+    password under a new tool reuses the stored features. Only the remaining
+    rows go on to feature extraction and scoring.
+    """
+    t0 = time.perf_counter()
+    passwords = df[c.pw].map(_clean_password).to_numpy()
+    tools = df[c.tool].map(_clean_tool).to_numpy() if c.tool else np.full(len(df), None, dtype=object)
+    keep = np.flatnonzero(passwords != "")
+    fps = fingerprints(passwords[keep], key)
 
-    imported = 0
-    for _, row in df.iterrows():
-        pw = str(row.get(pw_col) or "").strip()
-        if not pw:
+    groups: dict[tuple[str, str], list[int]] = {}  # (fp, tool) -> [first position, count]
+    for pos, fp, tool in zip(keep.tolist(), fps, tools[keep]):
+        g = groups.get((fp, tool or ""))
+        if g is None:
+            groups[(fp, tool or "")] = [pos, 1]
+        else:
+            g[1] += 1
+    stored = find_fingerprints(conn, [fp for fp, _ in groups])
+
+    new: list[tuple[int, str, int]] = []
+    bumps: list[tuple[int, int]] = []
+    copies: list[tuple[str, str | None, str, int, int]] = []
+    for (fp, tool_key), (pos, count) in groups.items():
+        rows = stored.get(fp)
+        if rows is None:
+            new.append((pos, fp, count))
             continue
-        tool = str(row.get(tool_col)).strip() if tool_col and pd.notna(row.get(tool_col)) else None
-        # Ignored by design.
-
-        feats = compute_all(pw) if recompute else {}
-        if not recompute:
-            # If feature columns exist, take them; else compute
-            needed = [
-                "Length","HasUpper","HasLower","HasDigit","HasSymbol","CountUpper","CountLower","CountDigit","CountSymbol",
-                "StartsWithDigit","EndsWithSymbol","HasRepeatedChars","HasDictionaryWord","IsPalindrome","HasSequential",
-                "UniqueChars","AsciiRange"
-            ]
-            has_any = any((c in cols) for c in needed)
-            if has_any:
-                for k in needed:
-                    if k in cols and pd.notna(row.get(k)):
-                        feats[k] = int(row.get(k))
-                # fill missing from compute
-                missing = [k for k in needed if k not in feats]
-                if missing:
-                    computed = compute_all(pw)
-                    for k in missing:
-                        feats[k] = int(computed[k])
-            else:
-                feats = compute_all(pw)
-
-        if (not recompute) and risk_col and pd.notna(row.get(risk_col)):
-            rix = float(row.get(risk_col))
+        same = [entry_id for entry_id, t in rows if t == tool_key]
+        if same:
+            bumps.append((count, same[0]))
         else:
-            rix = float(compute_risk_index(feats))
-        auto = risk_label(rix)
+            copies.append((passwords[pos], tools[pos], fp, count, rows[0][0]))
+    new.sort()
+
+    report.deduplicated += len(keep) - len(new) - len(copies)
+    report.reused += len(copies)
+    report.stage_seconds["hashing"] += time.perf_counter() - t0
+    dedup = _Dedup(
+        fingerprints=[fp for _, fp, _ in new],
+        counts=[count for _, _, count in new],
+        bumps=bumps,
+        copies=copies,
+    )
+    return df.iloc[[pos for pos, _, _ in new]], dedup
+
+
+@contextmanager
+def _write_transaction(conn: sqlite3.Connection, name: str) -> Iterator[None]:
+    """BEGIN IMMEDIATE ... COMMIT, or savepoint `name` if the caller already has a
+    transaction open (committing is then left to the caller)."""
+    owned = not conn.in_transaction
+    conn.execute("BEGIN IMMEDIATE" if owned else f"SAVEPOINT {name}")
+    try:
+        yield
+        if owned:
+            conn.commit()
+        else:
+            conn.execute(f"RELEASE {name}")
+    except BaseException:
+        if owned:
+            conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+        raise
+
+
+def _write_chunk(conn: sqlite3.Connection, chunk: _ScoredChunk, source: str, report: ImportReport, dedup: _Dedup | None = None) -> int:
+    """Hash + insert stage: write one scored chunk in a single transaction.
+
+    If the caller already has a transaction open, the chunk goes into a
+    savepoint instead and committing is left to the caller.
+    """
+    n = len(chunk.passwords)
+    if n == 0 and not (dedup and (dedup.bumps or dedup.copies)):
+        return 0
+    t0 = time.perf_counter()
+    now = int(time.time())
+    with _write_transaction(conn, "write_chunk"):
+        rows = list(range(n))
+        bumps: list[tuple[int, int]] = []
+        copies: list = []
+        if dedup is not None:
+            # Another writer may have stored some of these pairs since _dedupe_chunk looked.
+            stored = find_fingerprints(conn, dedup.fingerprints + [cp[2] for cp in dedup.copies])
+            now_stored = {(fp, t): entry_id for fp, pairs in stored.items() for entry_id, t in pairs}
+            rows = []
+            for j in range(n):
+                hit = now_stored.get((dedup.fingerprints[j], chunk.tools[j] or ""))
+                if hit is None:
+                    rows.append(j)
+                else:
+                    bumps.append((dedup.counts[j], hit))
+            bumps += dedup.bumps
+            for cp in dedup.copies:
+                hit = now_stored.get((cp[2], cp[1] or ""))
+                if hit is None:
+                    copies.append(cp)
+                else:
+                    bumps.append((cp[3], hit))
+
+        first_id = next_entry_id(conn)
+        entries = [
+            entry_values(
+                first_id + i, chunk.passwords[j], chunk.tools[j], source, now,
+                dedup.fingerprints[j] if dedup else None, dedup.counts[j] if dedup else 1,
+            )
+            for i, j in enumerate(rows)
+        ]
+        copy_id = first_id + len(rows)
+        entries += [
+            entry_values(copy_id + i, pw, tool, source, now, fp, count)
+            for i, (pw, tool, fp, count, _) in enumerate(copies)
+        ]
+        t1 = time.perf_counter()
+        insert_entries_many(conn, entries)
+        insert_features_many(
+            conn,
+            (
+                feature_values(first_id + i, chunk.records[j], float(chunk.risk_index[j]), chunk.labels[j], chunk.model_versions[j])
+                for i, j in enumerate(rows)
+            ),
+        )
+        copy_features_many(conn, ((copy_id + i, cp[4]) for i, cp in enumerate(copies)))
+        add_occurrences(conn, bumps)
+    report.stage_seconds["hashing"] += t1 - t0
+    report.stage_seconds["insert"] += time.perf_counter() - t1
+    if dedup is None:
+        return n
+    # Pairs that turned out to be stored already are folded in like any other duplicate
+    report.deduplicated += (n - len(rows)) + (len(dedup.copies) - len(copies))
+    report.reused -= len(dedup.copies) - len(copies)
+    return sum(dedup.counts) + sum(cp[3] for cp in dedup.copies) + sum(count for count, _ in dedup.bumps)
+
+
+def import_chunks(
+    conn: sqlite3.Connection,
+    chunks: Iterable[pd.DataFrame],
+    source: str = "excel_import",
+    recompute: bool = False,
+    fingerprint_key: bytes | None = None,
+) -> ImportReport:
+    """Run DataFrame chunks through the read -> score -> insert pipeline.
+
+    Stages are chained generators, so only one chunk is held in memory at a
+    time. Each chunk is written with executemany inside one transaction.
+    With a `fingerprint_key` (see fingerprint.load_key), repeated passwords are
+    stored once per tool with an occurrence count, and only passwords not yet
+    in the database are scored.
+    Returns an ImportReport with rows/s and per-stage timings.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    columns: _Columns | None = None
+
+    def scored() -> Iterator[tuple[_ScoredChunk, _Dedup | None]]:
+        nonlocal columns
+        for df in _timed(chunks, report, "read"):
+            if columns is None:
+                columns = _resolve_columns(df)
+            dedup = None
+            if fingerprint_key is not None:
+                df, dedup = _dedupe_chunk(conn, df, columns, fingerprint_key, report)
+            yield _score_chunk(df, columns, recompute, report), dedup
+
+    for chunk, dedup in scored():
+        report.rows += _write_chunk(conn, chunk, source, report, dedup)
+        report.chunks += 1
+    report.seconds = time.perf_counter() - start
+    return report
 
-        entry_id = insert_entry(conn, pw, tool, source=source)
-        insert_features(conn, entry_id, feats, rix, auto)
-        imported += 1
 
-    return imported
+def bulk_import_dataframe(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    source: str = "excel_import",
+    recompute: bool = False,
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    fingerprint_key: bytes | None = None,
+) -> ImportReport:
+    """Import rows from an in-memory DataFrame in chunked transactions."""
+    _resolve_columns(df)
+    chunk_size = max(1, int(chunk_size))
+    chunks = (df.iloc[lo:lo + chunk_size] for lo in range(0, len(df), chunk_size))
+    return import_chunks(conn, chunks, source=source, recompute=recompute, fingerprint_key=fingerprint_key)
+
+
+def stream_import_excel(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    source: str = "excel_import",
+    recompute: bool = False,
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    fingerprint_key: bytes | None = None,
+) -> ImportReport:
+    """Import an OAMpass workbook without loading the whole sheet.
+
+    Rows are streamed from the sheet in chunks (see io.iter_oampass_excel_chunks),
+    so peak memory depends on `chunk_size`, not on the number of rows.
+    """
+    chunks = iter_oampass_excel_chunks(path, chunk_size=chunk_size)
+    return import_chunks(conn, chunks, source=source, recompute=recompute, fingerprint_key=fingerprint_key)
+
+
+def import_from_dataframe(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    source: str = "excel_import",
+    recompute: bool = False,
+    fingerprint_key: bytes | None = None,
+) -> int:
+    """Import rows from a DataFrame.
+    Expects at least a password column. Optionally uses existing feature cols and RiskIndex.
+    If recompute=True, always recompute features and RiskIndex.
+    Returns number of imported rows.
+    """
+    return bulk_import_dataframe(conn, df, source=source, recompute=recompute, fingerprint_key=fingerprint_key).rows
+
+
+@dataclass(frozen=True)
+class StoredEvaluation:
+    entry_id: int
+    risk_index: float
+    auto_label: str
+    occurrences: int
+    reused: bool  # True if the stored evaluation of the same password was reused
+
+
+def store_evaluation(
+    conn: sqlite3.Connection,
+    password: str,
+    tool: str | None,
+    *,
+    source: str = "user_input",
+    fingerprint_key: bytes | None = None,
+) -> StoredEvaluation:
+    """Evaluate and store one password, reusing a stored evaluation when the fingerprint is known.
+
+    Same (password, tool): the entry's occurrences go up by one. Same password
+    under another tool: a new entry is added with the stored features copied.
+    """
+    fp = fingerprint(password, fingerprint_key) if fingerprint_key is not None else None
+    now = int(time.time())
+    # Lookup, id and inserts in one write transaction, so another writer cannot
+    # take the id or store the same (fingerprint, tool) pair in between.
+    with _write_transaction(conn, "store_evaluation"):
+        row = find_evaluation(conn, fp, tool) if fp is not None else None
+        if row is not None and (row["tool"] or "") == (tool or ""):
+            add_occurrences(conn, [(1, row["id"])])
+            return StoredEvaluation(row["id"], row["RiskIndex"], row["AutoRiskLabel"], row["occurrences"] + 1, True)
+        entry_id = next_entry_id(conn)
+        insert_entries_many(conn, [entry_values(entry_id, password, tool, source, now, fp)])
+        if row is not None:
+            copy_features_many(conn, [(entry_id, row["id"])])
+            return StoredEvaluation(entry_id, row["RiskIndex"], row["AutoRiskLabel"], 1, True)
+        feats = compute_all(password)
+        rix = float(compute_risk_index(feats))
+        label = risk_label(rix)
+        insert_features_many(conn, [feature_values(entry_id, feats, rix, label, scoring_model_version())])
+    return StoredEvaluation(entry_id, rix, label, 1, False)
@@ -0,0 +1,148 @@
+"""Run instrumentation for the CLI: per-stage timing, memory and optional profiling.
+
+StageTimer records wall time, CPU time and the process peak RSS for each
+named stage (plus the Python heap peak while tracemalloc is tracing). Its
+cost is a few clock reads per stage, so it is always on; cProfile and
+tracemalloc are opt-in because they slow the run down.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import cProfile
+import io
+import pstats
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> float | None:
+    """Process peak resident set size so far (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 3)
+
+
+def children_cpu_s() -> float | None:
+    """CPU seconds used by finished child processes (e.g. --workers pools)."""
+    if resource is None:
+        return None
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return round(ru.ru_utime + ru.ru_stime, 6)
+
+
+class StageTimer:
+    """Accumulates wall/CPU time per stage; stages can be entered many times."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict] = {}
+
+    def _record(self, name: str, wall: float, cpu: float) -> None:
+        s = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+        s["wall_s"] += wall
+        s["cpu_s"] += cpu
+        s["calls"] += 1
+        s["rss_peak_mb"] = peak_rss_mb()
+        if tracemalloc.is_tracing():
+            heap_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            s["py_heap_peak_mb"] = round(max(heap_peak, s.get("py_heap_peak_mb", 0.0)), 3)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - w0, time.process_time() - c0)
+
+    def iter(self, items: Iterable, name: str) -> Iterator:
+        """Yield from `items`, charging the time spent producing each item to `name`."""
+        it = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def as_dict(self) -> dict:
+        return {
+            name: {k: (round(v, 6) if isinstance(v, float) else v) for k, v in s.items()}
+            for name, s in self.stages.items()
+        }
+
+
+class _NullTimer(StageTimer):
+    """StageTimer that records nothing (default for library callers)."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def iter(self, items: Iterable, name: str) -> Iterator:
+        return iter(items)
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Optional cProfile + tracemalloc around a run; summary goes into the run log."""
+
+    def __init__(self, *, profile_path: Path | None = None, trace_malloc: bool = False, top: int = 15):
+        self.profile_path = profile_path
+        self.trace_malloc = trace_malloc
+        self.top = top
+        self._profile: cProfile.Profile | None = None
+        self.summary: dict = {}
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_malloc:
+            tracemalloc.start()
+        if self.profile_path is not None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stop(self) -> dict:
+        """Stop profiling/tracing (idempotent) and return the summary for the run log."""
+        if self._profile is not None:
+            self._profile.disable()
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self._profile.dump_stats(str(self.profile_path))
+            buf = io.StringIO()
+            pstats.Stats(self._profile, stream=buf).sort_stats("cumulative").print_stats(self.top)
+            self.summary["profile"] = {
+                "path": str(self.profile_path),
+                "top_cumulative": [line.strip() for line in buf.getvalue().splitlines() if line.strip()][-self.top:],
+            }
+            self._profile = None
+        if self.trace_malloc and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.summary["trace_malloc"] = {
+                "current_mb": round(current / (1024 * 1024), 3),
+                "peak_mb": round(peak / (1024 * 1024), 3),
+                "top_lines": [
+                    {"where": str(stat.traceback[0]), "size_mb": round(stat.size / (1024 * 1024), 3), "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[: self.top]
+                ],
+            }
+        return self.summary
@@ -1,18 +1,76 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 import hashlib
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
 
-from .config import MIN_REQUIRED_COLUMNS, OPTIONAL_COLUMNS, OAMPASS_DERIVED_COLUMNS
-from .features import compute_all
-from .scoring import compute_risk_index
+from .config import (
+    CATEGORY_COLUMNS,
+    DERIVED_COUNT_COLUMNS,
+    DERIVED_FLAG_COLUMNS,
+    IMPORT_CHUNK_ROWS,
+    MIN_REQUIRED_COLUMNS,
+    OPTIONAL_COLUMNS,
+    OAMPASS_DERIVED_COLUMNS,
+)
+from .features_batch import compute_all_dedup
+from .instrument import NULL_TIMER, StageTimer
+from .parallel import WorkerStats, compute_all_parallel
+from .scoring import compute_risk_index_batch
 
 @dataclass(frozen=True)
 class LoadResult:
     df: pd.DataFrame
     dataset_sha256: str
     source_sheet: str
+    # Per-worker timings when the feature pass ran in a process pool
+    worker_stats: dict | None = None
+    # Dedup-then-broadcast figures for the feature pass (DedupResult.as_dict)
+    dedup: dict | None = None
+
+# Bump when apply_table_dtypes changes what load_oampass_excel returns (part of the cache key)
+TABLE_SCHEMA_VERSION = 3
+
+_INT_TYPES = ((np.int8, "Int8"), (np.int16, "Int16"), (np.int32, "Int32"), (np.int64, "Int64"))
+
+
+def _small_int(s: pd.Series) -> pd.Series:
+    """Smallest integer dtype that holds `s` (nullable if it has gaps); other data is left alone."""
+    num = pd.to_numeric(s, errors="coerce")
+    if num.notna().sum() != s.notna().sum():
+        return s  # non-numeric text: keep it visible rather than turning it into NA
+    valid = num.dropna()
+    if not (valid == np.floor(valid)).all():
+        return num
+    lo, hi = (valid.min(), valid.max()) if len(valid) else (0, 0)
+    for np_type, nullable in _INT_TYPES:
+        info = np.iinfo(np_type)
+        if info.min <= lo and hi <= info.max:
+            return num.astype(nullable if len(valid) < len(num) else np_type)
+    return num
+
+
+def apply_table_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact dtypes for the evaluation table, in place (returns `df`).
+
+    Flags become int8 and counts the smallest integer type that fits
+    (nullable Int8/Int16/... where cells are missing); Tool/Label become
+    categoricals and RiskIndex float64. Columns holding non-numeric text keep
+    their values.
+    """
+    for col in DERIVED_FLAG_COLUMNS + DERIVED_COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = _small_int(df[col])
+    if "RiskIndex" in df.columns:
+        df["RiskIndex"] = pd.to_numeric(df["RiskIndex"], errors="coerce").astype(np.float64)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
 
 def _sha256_file(path: Path) -> str:
     h = hashlib.sha256()
@@ -21,51 +79,89 @@ def _sha256_file(path: Path) -> str:
             h.update(chunk)
     return h.hexdigest()
 
+_EXCEL_ERRORS = ("#VALUE!", "#N/A", "#DIV/0!", "#REF!", "#NAME?", "#NUM!", "#NULL!")
+
 def _normalize_boolish(s: pd.Series) -> pd.Series:
-    # Excel sometimes stores booleans as True/False, 0/1, or blank.
-    # Convert to 0/1 integers where applicable.
+    # Excel sometimes stores booleans as True/False, 0/1, or blank, and failed
+    # formulas as error literals. Convert to 0/1 integers / missing where
+    # applicable; other values pass through.
     mapping = {True: 1, False: 0, "TRUE": 1, "FALSE": 0, "True": 1, "False": 0}
-    out = s.map(mapping).where(~s.isna(), s)
-    return pd.to_numeric(out, errors="ignore")
+    mapping.update(dict.fromkeys(_EXCEL_ERRORS, None))
+    out = s.map(lambda v: mapping.get(v, v))
+    num = pd.to_numeric(out, errors="coerce")
+    if num.notna().sum() != out.notna().sum():
+        return out  # non-numeric text: keep it (same rule as _small_int)
+    return num
+
+def _clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Cleaning shared by the in-memory and streaming loaders."""
+    # Drop completely empty columns (the first column in Raw is empty in the provided file)
+    df = df.loc[:, [c for c in df.columns if str(c).strip().lower() != "nan"]]
 
-def load_oampass_excel(path: str | Path, *, recompute_missing: bool = False, recompute_riskindex: bool = False) -> LoadResult:
+    # Basic cleaning
+    for col in df.columns:
+        if col in ("Password", "Label", "Tool"):
+            df[col] = df[col].astype(str).str.strip()
+        else:
+            df[col] = _normalize_boolish(df[col])
+
+    # Drop empty placeholder rows (Excel often yields 'nan' strings). take() makes the one
+    # copy; unlike a boolean-mask view it can be assigned to without SettingWithCopy.
+    pw = df["Password"]
+    keep = pw.ne("") & pw.str.lower().ne("nan")
+    if not keep.all():
+        df = df.take(np.flatnonzero(keep.to_numpy()))
+    return df
+
+def find_column(cols: list, candidates: list[str]) -> str | None:
+    """Return the first column whose name matches a candidate (case-insensitive)."""
+    low = {str(c).lower(): c for c in cols}
+    for cand in candidates:
+        if cand.lower() in low:
+            return low[cand.lower()]
+    return None
+
+def _pick_sheet(sheet_names: list[str]) -> str:
+    return "Raw" if "Raw" in sheet_names else sheet_names[0]
+
+def load_oampass_excel(
+    path: str | Path,
+    *,
+    recompute_missing: bool = False,
+    recompute_riskindex: bool = False,
+    workers: int = 1,
+    timer: StageTimer = NULL_TIMER,
+) -> LoadResult:
     """Load an OAMpass workbook and return the evaluation table.
 
     Strategy:
     - Prefer sheet named 'Raw' (it contains Password + attributes + RiskIndex + Label + Tool)
     - Fall back to other sheets if needed.
+
+    With workers > 1 the feature pass is sharded over a process pool.
+    Stage timings (excel_parse, clean, features, scoring, hashing) go to `timer`.
     """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(p)
 
-    xls = pd.ExcelFile(p)
-    sheet = "Raw" if "Raw" in xls.sheet_names else xls.sheet_names[0]
+    with timer.stage("excel_parse"):
+        xls = pd.ExcelFile(p)
+        sheet = _pick_sheet(xls.sheet_names)
 
-    # Raw has a decorative first row; the true headers are on row 2 (0-indexed header=1),
-    # and then the first data row repeats the column names.
-    df = pd.read_excel(p, sheet_name=sheet, header=1)
+        # Raw has a decorative first row; the true headers are on row 2 (0-indexed header=1),
+        # and then the first data row repeats the column names.
+        df = pd.read_excel(p, sheet_name=sheet, header=1)
     if df.shape[0] < 2:
         raise ValueError("Sheet is too small to parse as OAMpass Raw.")
 
-    # Row 0 contains the true header names (Password, Length, ...)
-    header_row = df.iloc[0].tolist()
-    df = df.iloc[1:].reset_index(drop=True)
-    df.columns = header_row
+    with timer.stage("clean"):
+        # Row 0 contains the true header names (Password, Length, ...)
+        header_row = df.iloc[0].tolist()
+        df = df.iloc[1:].reset_index(drop=True)
+        df.columns = header_row
 
-    # Drop completely empty columns (the first column in Raw is empty in the provided file)
-    df = df.loc[:, [c for c in df.columns if str(c).strip().lower() != "nan"]]
-
-    # Basic cleaning
-    for col in df.columns:
-        if col in ("Password", "Label", "Tool"):
-            df[col] = df[col].astype(str).str.strip()
-        else:
-            df[col] = _normalize_boolish(df[col])
-
-    # Drop empty placeholder rows (Excel often yields 'nan' strings)
-    df = df[df["Password"].astype(str).str.strip().ne("")].copy()
-    df = df[df["Password"].astype(str).str.lower().ne("nan")].copy()
+        df = _clean_frame(df)
 
     # Minimum schema validation
     missing_min = [c for c in MIN_REQUIRED_COLUMNS if c not in df.columns]
@@ -78,20 +174,32 @@ def load_oampass_excel(path: str | Path, *, recompute_missing: bool = False, rec
             df[c] = "" if c in ("Label", "Tool") else pd.NA
 
     # If requested, compute derived attributes when missing.
+    worker_stats = None
+    dedup = None
     if recompute_missing:
         for col in OAMPASS_DERIVED_COLUMNS:
             if col not in df.columns:
                 df[col] = pd.NA
 
-        # Fill derived columns row-by-row (deterministic)
-        derived_rows = df["Password"].astype(str).fillna("").map(compute_all)
-        derived_df = pd.DataFrame(list(derived_rows.values))
-        for col in OAMPASS_DERIVED_COLUMNS:
-            # Only overwrite missing/NA columns or NA values
-            if col not in df.columns:
-                df[col] = derived_df[col]
+        # Fill derived columns column-wise (deterministic, index-aligned with df).
+        # Features are computed once per distinct password and broadcast back.
+        with timer.stage("features"):
+            passwords = df["Password"].astype(str).fillna("")
+            if workers > 1:
+                stats = WorkerStats()
+                result = compute_all_dedup(passwords, compute=lambda pws: compute_all_parallel(pws, workers, stats=stats))
+                worker_stats = stats.as_dict()
             else:
-                df[col] = df[col].where(~df[col].isna(), derived_df[col])
+                result = compute_all_dedup(passwords)
+            derived_df = result.features
+            dedup = result.as_dict()
+            for col in OAMPASS_DERIVED_COLUMNS:
+                # Only overwrite missing/NA columns or NA values (unreadable text counts as NA)
+                if col not in df.columns:
+                    df[col] = derived_df[col]
+                else:
+                    given = pd.to_numeric(df[col], errors="coerce")
+                    df[col] = given.where(given.notna(), derived_df[col])
 
     # RiskIndex handling
     if "RiskIndex" not in df.columns:
@@ -107,17 +215,16 @@ def load_oampass_excel(path: str | Path, *, recompute_missing: bool = False, rec
                         "RiskIndex recomputation requires derived columns. "
                         "Run with recompute_missing=True or provide OAMpass-derived columns."
                     )
-        df["RiskIndex"] = df.apply(lambda r: compute_risk_index(r.to_dict()), axis=1)
+        with timer.stage("scoring"):
+            df["RiskIndex"] = compute_risk_index_batch(df)
 
-    # Type enforcement (lightweight) if available
-    if "RiskIndex" in df.columns:
-        df["RiskIndex"] = pd.to_numeric(df["RiskIndex"], errors="coerce")
-    if "Length" in df.columns:
-        df["Length"] = pd.to_numeric(df["Length"], errors="coerce")
+    apply_table_dtypes(df)
 
     # Drop rows without RiskIndex unless we recomputed it
     if not recompute_riskindex:
-        df = df[~df["RiskIndex"].isna()].copy()
+        has_risk = df["RiskIndex"].notna().to_numpy()
+        if not has_risk.all():
+            df = df.take(np.flatnonzero(has_risk))
 
     # If RiskIndex is still missing, fail: ranking needs it
     if df.empty or df["RiskIndex"].isna().all():
@@ -125,4 +232,56 @@ def load_oampass_excel(path: str | Path, *, recompute_missing: bool = False, rec
             "RiskIndex is missing/empty. Provide RiskIndex in the input, or run with --recompute-riskindex."
         )
 
-    return LoadResult(df=df, dataset_sha256=_sha256_file(p), source_sheet=sheet)
+    with timer.stage("hashing"):
+        dataset_sha256 = _sha256_file(p)
+    return LoadResult(df=df, dataset_sha256=dataset_sha256, source_sheet=sheet, worker_stats=worker_stats, dedup=dedup)
+
+def iter_oampass_excel_chunks(path: str | Path, *, chunk_size: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream an OAMpass workbook as cleaned DataFrame chunks.
+
+    Reads the same sheet and header layout as load_oampass_excel (decorative
+    first row, placeholder header row, then the true column names) through
+    openpyxl's read-only mode, so memory stays bounded by `chunk_size` rows
+    regardless of sheet size. Chunks get the same cleaning as the in-memory
+    loader; RiskIndex/derived-column handling is left to the consumer.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(p)
+
+    wb = load_workbook(p, read_only=True, data_only=True)
+    try:
+        ws = wb[_pick_sheet(wb.sheetnames)]
+        rows = ws.iter_rows(values_only=True)
+
+        # Rows 0-1 are the decorative row and pandas' header row; row 2 holds the true names.
+        header = None
+        for i, row in enumerate(rows):
+            if i == 2:
+                header = [np.nan if h is None else h for h in row]
+                break
+        if header is None:
+            raise ValueError("Sheet is too small to parse as OAMpass Raw.")
+
+        missing_min = [c for c in MIN_REQUIRED_COLUMNS if c not in header]
+        if missing_min:
+            raise ValueError(f"Missing required columns: {missing_min}")
+
+        buf: list[tuple] = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buf.append(row)
+            if len(buf) >= chunk_size:
+                yield _records_to_frame(buf, header)
+                buf = []
+        if buf:
+            yield _records_to_frame(buf, header)
+    finally:
+        wb.close()
+
+def _records_to_frame(records: list[tuple], header: list) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(records, columns=header)
+    # Empty cells come back as None; make them NaN like pd.read_excel does.
+    df = df.where(df.notna(), np.nan)
+    return _clean_frame(df)
@@ -0,0 +1,116 @@
+"""Process-pool sharding for feature extraction and scoring.
+
+Passwords are split into chunks and scored by worker processes. Each worker
+loads the dictionary automaton once in its initializer (from the on-disk
+artifact), so tasks only carry passwords. Results are yielded back in input
+order, so downstream output is identical to a serial run.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+import os
+import time
+from typing import Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import OAMPASS_DERIVED_COLUMNS, WORKER_CHUNK_ROWS
+from .dictionary import get_automaton, load_automaton
+from .features_batch import compute_all_batch
+
+
+class WorkerStats:
+    """Per-worker task/row counts and busy time, for the run log."""
+
+    def __init__(self) -> None:
+        self.by_pid: dict[int, dict] = {}
+
+    def add(self, pid: int, rows: int, seconds: float) -> None:
+        s = self.by_pid.setdefault(pid, {"tasks": 0, "rows": 0, "seconds": 0.0})
+        s["tasks"] += 1
+        s["rows"] += rows
+        s["seconds"] += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "workers": len(self.by_pid),
+            "per_worker": [
+                {"pid": pid, "tasks": s["tasks"], "rows": s["rows"], "seconds": round(s["seconds"], 6)}
+                for pid, s in sorted(self.by_pid.items())
+            ],
+        }
+
+
+def _init_worker() -> None:
+    get_automaton()
+
+
+def _features_task(passwords: list[str]) -> tuple[int, int, float, np.ndarray]:
+    t0 = time.perf_counter()
+    values = compute_all_batch(passwords).to_numpy()
+    return os.getpid(), len(passwords), time.perf_counter() - t0, values
+
+
+def _timed_task(fn: Callable[[pd.DataFrame], pd.DataFrame], df: pd.DataFrame) -> tuple[int, int, float, pd.DataFrame]:
+    t0 = time.perf_counter()
+    out = fn(df)
+    return os.getpid(), len(df), time.perf_counter() - t0, out
+
+
+def _imap_ordered(pool: Executor, fn: Callable, items: Iterable, *args, max_pending: int) -> Iterator:
+    """Like pool.map, but keeps at most `max_pending` tasks in flight."""
+    pending: deque = deque()
+    for item in items:
+        pending.append(pool.submit(fn, *args, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def make_pool(workers: int) -> ProcessPoolExecutor:
+    # Build/refresh the on-disk automaton once here so workers only load it.
+    load_automaton()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def compute_all_parallel(
+    passwords: Sequence[str | None] | pd.Series,
+    workers: int,
+    *,
+    chunk_size: int = WORKER_CHUNK_ROWS,
+    stats: WorkerStats | None = None,
+) -> pd.DataFrame:
+    """compute_all_batch sharded over `workers` processes (same output, same order)."""
+    index = passwords.index if isinstance(passwords, pd.Series) else None
+    pws = [p or "" for p in passwords]
+    chunks = (pws[i:i + chunk_size] for i in range(0, len(pws), chunk_size))
+    parts = []
+    with make_pool(workers) as pool:
+        for pid, rows, seconds, values in _imap_ordered(pool, _features_task, chunks, max_pending=2 * workers):
+            if stats is not None:
+                stats.add(pid, rows, seconds)
+            parts.append(values)
+    values = np.concatenate(parts) if parts else np.zeros((0, len(OAMPASS_DERIVED_COLUMNS)), dtype=np.int64)
+    return pd.DataFrame(values, columns=OAMPASS_DERIVED_COLUMNS, index=index)
+
+
+def map_chunks_parallel(
+    fn: Callable[[pd.DataFrame], pd.DataFrame],
+    chunks: Iterable[pd.DataFrame],
+    workers: int,
+    *,
+    stats: WorkerStats | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Apply a picklable `fn` to a stream of chunks in worker processes, in order.
+
+    At most 2 * workers chunks are in flight, so memory stays bounded.
+    """
+    with make_pool(workers) as pool:
+        for pid, rows, seconds, out in _imap_ordered(pool, _timed_task, chunks, fn, max_pending=2 * workers):
+            if stats is not None:
+                stats.add(pid, rows, seconds)
+            yield out
@@ -0,0 +1,76 @@
+"""`oampass score`: score passwords from the command line without pandas.
+
+    python -m oampass score "Tr0ub4dor&3"
+    printf 'hunter2\nletmein\n' | python -m oampass score -
+    python -m oampass score - --fail-above 70 < candidates.txt   # e.g. in a git hook
+
+Only `features`, `scoring` and the pickled dictionary automaton are loaded
+(no pandas/numpy/openpyxl), so a call starts in tens of milliseconds. Keep
+this module's imports to the standard library and those two modules;
+tests/test_quickscore.py checks it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Iterable, Iterator, TextIO
+
+from .features import compute_all
+from .scoring import compute_risk_index, risk_label
+
+
+def score_password(pw: str) -> dict:
+    """Derived features plus RiskIndex and AutoRiskLabel for one password."""
+    row = compute_all(pw)
+    risk = compute_risk_index(row)
+    return {**row, "RiskIndex": risk, "AutoRiskLabel": risk_label(risk)}
+
+
+def iter_stdin_passwords(stream: TextIO) -> Iterator[str]:
+    # One password per line, surrounding whitespace dropped, blank lines skipped.
+    # Must match wordlists.iter_text_chunks (and the Excel/CSV importers).
+    for line in stream:
+        pw = line.strip()
+        if pw:
+            yield pw
+
+
+def _write(results: Iterable[dict], out: TextIO, as_json: bool) -> float:
+    worst = 0.0
+    for r in results:
+        worst = max(worst, r["RiskIndex"])
+        if as_json:
+            out.write(json.dumps(r) + "\n")
+        else:
+            out.write(f"{r['RiskIndex']:g}\t{r['AutoRiskLabel']}\n")
+    return worst
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="oampass score",
+        description="Print RiskIndex and AutoRiskLabel per password (tab-separated, input order).",
+    )
+    ap.add_argument(
+        "passwords",
+        nargs="*",
+        help="Passwords to score; '-' (or none) reads one per line from stdin, which keeps them out of the process list.",
+    )
+    ap.add_argument("--json", action="store_true", help="Emit one JSON object per password with all derived features.")
+    ap.add_argument("--fail-above", type=float, default=None, help="Exit with status 1 if any RiskIndex is >= this value.")
+    args = ap.parse_args(argv)
+
+    if not args.passwords or args.passwords == ["-"]:
+        pws: Iterable[str] = iter_stdin_passwords(sys.stdin)
+    else:
+        pws = args.passwords
+    worst = _write((score_password(pw) for pw in pws), sys.stdout, args.json)
+    if args.fail_above is not None and worst >= args.fail_above:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
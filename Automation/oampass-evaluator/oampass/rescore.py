@@ -0,0 +1,214 @@
+"""Re-score stored rows after DEFAULT_RISK_WEIGHTS / AUTO_RISK_LABEL_THRESHOLDS change.
+
+compute_risk_index only reads columns the database keeps (the flag bits,
+Length and UniqueChars), so the model is evaluated in SQL: one set-based
+UPDATE per range of entry ids, each range in its own transaction. The SQL
+applies the same additions, credits and clamps in the same order as the
+Python model, so the stored values equal compute_risk_index() exactly.
+
+Each row records the model_version that scored it. Rows already at the
+current version are skipped, so an interrupted job can simply be run again.
+Rows whose RiskIndex came from the input file (model_version 'external')
+keep it and only get their AutoRiskLabel refreshed, unless
+include_external is set. Rows with no model_version (written before the
+column existed, or by other tools) are of unknown origin and are treated
+the same way unless include_unknown is set.
+
+The per-row risk_stats trigger is dropped inside each chunk's transaction
+and recreated before commit. Its min/max fix-ups would rescan a whole tool
+or day group for many of the rows. The aggregates are rebuilt once at the
+end instead; if a run stops before that, `oampass rebuild-stats` repairs them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import sqlite3
+import time
+
+from .config import AUTO_RISK_LABEL_THRESHOLDS, DEFAULT_RISK_WEIGHTS, IMPORT_CHUNK_ROWS
+from .db import FEATURES_UPDATE_TRIGGER_SQL, feature_expr, rebuild_stats
+from .scoring import EXTERNAL_MODEL_VERSION, scoring_model_version
+
+_T = "password_features"
+
+# (flag, weight key): penalty when the flag is 0, then when it is 1 -- compute_risk_index's order
+_MISSING = (("HasUpper", "missing_upper"), ("HasLower", "missing_lower"), ("HasDigit", "missing_digit"), ("HasSymbol", "missing_symbol"))
+_PATTERNS = (
+    ("HasDictionaryWord", "dictionary_word"), ("HasSequential", "sequential"), ("HasRepeatedChars", "repeated"),
+    ("IsPalindrome", "palindrome"), ("StartsWithDigit", "startswith_digit"), ("EndsWithSymbol", "endswith_symbol"),
+)
+
+
+def _clamp(x: str, lo: str, hi: str) -> str:
+    # scoring.clamp: max(lo, min(hi, x))
+    return f"MAX({lo}, MIN({hi}, {x}))"
+
+
+def risk_index_sql() -> str:
+    """SQL for compute_risk_index over password_features (weights as :named parameters)."""
+    terms = [":base"]
+    terms += [f"CASE WHEN {feature_expr(flag, _T)} = 0 THEN :{key} ELSE 0.0 END" for flag, key in _MISSING]
+    terms += [f"CASE WHEN {feature_expr(flag, _T)} = 1 THEN :{key} ELSE 0.0 END" for flag, key in _PATTERNS]
+    length_credit = _clamp(f"{_T}.Length * :length_credit_per_char", "0.0", ":length_credit_cap")
+    unique_credit = _clamp(f"{_T}.UniqueChars * :unique_credit_per_char", "0.0", ":unique_credit_cap")
+    return _clamp(f"(({' + '.join(terms)}) - ({length_credit} + {unique_credit}))", "0.0", "100.0")
+
+
+def risk_label_sql(risk: str) -> str:
+    return f"CASE WHEN {risk} >= :risky THEN 'Risky' WHEN {risk} >= :medium THEN 'Medium' ELSE 'Safe' END"
+
+
+_RANGE = "entry_id > :lo AND entry_id <= :hi"
+_EXTERNAL = "model_version = :external"
+_UNKNOWN = "model_version IS NULL"
+_LABEL_CHANGED = f"AutoRiskLabel IS NOT {risk_label_sql('RiskIndex')}"
+
+
+def _stale(include_external: bool, include_unknown: bool) -> str:
+    """Rows to recompute: everything not at :version, minus the kept origins."""
+    conds = ["model_version IS NOT :version"]
+    if not include_external:
+        conds.append("model_version IS NOT :external")
+    if not include_unknown:
+        conds.append("model_version IS NOT NULL")
+    return " AND ".join(conds)
+
+
+_RESCORE_SQL = f"""UPDATE {_T}
+    SET RiskIndex = {risk_index_sql()},
+        AutoRiskLabel = {risk_label_sql(risk_index_sql())},
+        model_version = :version
+    WHERE {_RANGE} AND {{stale}}"""
+
+_RELABEL_SQL = f"""UPDATE {_T}
+    SET AutoRiskLabel = {risk_label_sql("RiskIndex")}
+    WHERE {_RANGE} AND ({{kept}}) AND {_LABEL_CHANGED}"""
+
+_NEXT_BOUND_SQL = f"SELECT MAX(entry_id) FROM (SELECT entry_id FROM {_T} WHERE entry_id > ? ORDER BY entry_id LIMIT ?)"
+
+
+@dataclass(frozen=True)
+class RescoreReport:
+    model_version: str
+    scanned: int     # rows in the table
+    rescored: int    # RiskIndex + AutoRiskLabel recomputed
+    relabeled: int   # 'external'/unversioned rows whose AutoRiskLabel changed
+    seconds: float
+    stats_seconds: float  # risk_stats rebuild (included in seconds)
+
+    @property
+    def rows_per_s(self) -> float:
+        return (self.rescored + self.relabeled) / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "scanned": self.scanned,
+            "rescored": self.rescored,
+            "relabeled": self.relabeled,
+            "seconds": round(self.seconds, 6),
+            "stats_seconds": round(self.stats_seconds, 6),
+            "rows_per_s": round(self.rows_per_s, 1),
+        }
+
+
+def _params(weights: dict | None, thresholds: dict | None) -> dict:
+    w = dict(DEFAULT_RISK_WEIGHTS)
+    if weights:
+        w.update(weights)
+    t = dict(AUTO_RISK_LABEL_THRESHOLDS)
+    if thresholds:
+        t.update(thresholds)
+    params = {k: float(v) for k, v in w.items()}
+    params.update(risky=float(t["risky"]), medium=float(t["medium"]))
+    params.update(version=scoring_model_version(weights, thresholds), external=EXTERNAL_MODEL_VERSION)
+    return params
+
+
+def count_stale(
+    conn: sqlite3.Connection,
+    *,
+    weights: dict | None = None,
+    thresholds: dict | None = None,
+    include_external: bool = False,
+    include_unknown: bool = False,
+) -> dict[str, int]:
+    """What rescore() would do: rows to recompute, 'external' rows to relabel,
+    and unversioned rows to relabel (or to recompute, with include_unknown).
+    "rescore" does not include the unversioned rows."""
+    p = _params(weights, thresholds)
+
+    def count(where: str) -> int:
+        return int(conn.execute(f"SELECT COUNT(*) FROM {_T} WHERE {where}", p).fetchone()[0])
+
+    return {
+        "rescore": count(_stale(include_external, False)),
+        "relabel": 0 if include_external else count(f"{_EXTERNAL} AND {_LABEL_CHANGED}"),
+        "unknown": count(_UNKNOWN if include_unknown else f"{_UNKNOWN} AND {_LABEL_CHANGED}"),
+    }
+
+
+def rescore(
+    conn: sqlite3.Connection,
+    *,
+    weights: dict | None = None,
+    thresholds: dict | None = None,
+    chunk_rows: int = IMPORT_CHUNK_ROWS,
+    include_external: bool = False,
+    include_unknown: bool = False,
+) -> RescoreReport:
+    """Bring every stored RiskIndex/AutoRiskLabel up to the current scoring model.
+
+    `weights`/`thresholds` override config.py like compute_risk_index does.
+    Commits once per chunk of `chunk_rows` entry ids; returns counts and timings.
+    """
+    p = _params(weights, thresholds)
+    stale = _stale(include_external, include_unknown)
+    kept = [c for c, included in ((_EXTERNAL, include_external), (_UNKNOWN, include_unknown)) if not included]
+    rescore_sql = _RESCORE_SQL.format(stale=stale)
+    relabel_sql = _RELABEL_SQL.format(kept=" OR ".join(kept)) if kept else None
+    stale_sql = f"SELECT EXISTS (SELECT 1 FROM {_T} WHERE {_RANGE} AND (({stale})"
+    if kept:
+        stale_sql += f" OR (({' OR '.join(kept)}) AND {_LABEL_CHANGED})"
+    stale_sql += "))"
+
+    t0 = time.perf_counter()
+    if conn.in_transaction:
+        conn.commit()
+    scanned = conn.execute(f"SELECT COUNT(*) FROM {_T}").fetchone()[0]
+    rescored = relabeled = 0
+    lo = 0
+    while True:
+        hi = conn.execute(_NEXT_BOUND_SQL, (lo, max(1, int(chunk_rows)))).fetchone()[0]
+        if hi is None:
+            break
+        rng = dict(p, lo=lo, hi=hi)
+        # Read-only check first, so up-to-date ranges cost no write transaction or DDL
+        if conn.execute(stale_sql, rng).fetchone()[0]:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DROP TRIGGER IF EXISTS trg_stats_features_update")
+                rescored += conn.execute(rescore_sql, rng).rowcount
+                if relabel_sql:
+                    relabeled += conn.execute(relabel_sql, rng).rowcount
+                conn.execute(FEATURES_UPDATE_TRIGGER_SQL)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        lo = hi
+
+    stats_seconds = 0.0
+    if rescored or relabeled:
+        t1 = time.perf_counter()
+        rebuild_stats(conn)
+        stats_seconds = time.perf_counter() - t1
+    return RescoreReport(
+        model_version=p["version"],
+        scanned=scanned,
+        rescored=rescored,
+        relabeled=relabeled,
+        seconds=time.perf_counter() - t0,
+        stats_seconds=stats_seconds,
+    )
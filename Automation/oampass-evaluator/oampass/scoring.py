@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import hashlib
+import json
 
 from .config import DEFAULT_RISK_WEIGHTS, AUTO_RISK_LABEL_THRESHOLDS
 
+# password_features.model_version of rows whose RiskIndex came from the input
+# (e.g. a workbook's own model) rather than from compute_risk_index
+EXTERNAL_MODEL_VERSION = "external"
+
 
 def clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
@@ -61,6 +67,100 @@ def compute_risk_index(row: dict, weights: dict | None = None) -> float:
     return float(clamp(risk, 0, 100))
 
 
+def _clamp_batch(x, lo: float, hi: float):
+    # Same comparisons as clamp(): NaN falls through to `hi`, like min()/max() do.
+    import numpy as np
+
+    y = np.where(x < hi, x, hi)
+    return np.where(y > lo, y, lo)
+
+
+def _flag_batch(features, col: str, n: int):
+    """int(row.get(col, 0)) for a whole column, as an int64 array."""
+    import numpy as np
+
+    if col not in features:
+        return np.zeros(n, dtype=np.int64)
+    values = np.asarray(features[col], dtype=np.float64)
+    if np.isnan(values).any():
+        raise ValueError(f"cannot convert NaN in column {col!r} to integer")
+    return np.trunc(values).astype(np.int64)
+
+
+def compute_risk_index_batch(features, weights: dict | None = None):
+    """Vectorized compute_risk_index over a feature DataFrame.
+
+    Applies the same penalties, credits and clamping column-wise, in the same
+    order, so each value equals compute_risk_index(row) bit for bit.
+    Returns a float64 NumPy array with one value per row.
+    """
+    # numpy is imported lazily so the single-password path stays light
+    import numpy as np
+
+    w = dict(DEFAULT_RISK_WEIGHTS)
+    if weights:
+        w.update(weights)
+
+    n = len(features)
+    risk = np.full(n, float(w["base"]))
+
+    # penalties: missing classes
+    for col, key in (("HasUpper", "missing_upper"), ("HasLower", "missing_lower"),
+                     ("HasDigit", "missing_digit"), ("HasSymbol", "missing_symbol")):
+        risk += np.where(_flag_batch(features, col, n) == 0, float(w[key]), 0.0)
+
+    # pattern penalties
+    for col, key in (("HasDictionaryWord", "dictionary_word"), ("HasSequential", "sequential"),
+                     ("HasRepeatedChars", "repeated"), ("IsPalindrome", "palindrome"),
+                     ("StartsWithDigit", "startswith_digit"), ("EndsWithSymbol", "endswith_symbol")):
+        risk += np.where(_flag_batch(features, col, n) == 1, float(w[key]), 0.0)
+
+    # credits: length and diversity reduce risk
+    L = np.asarray(features["Length"], dtype=np.float64) if "Length" in features else np.zeros(n)
+    U = np.asarray(features["UniqueChars"], dtype=np.float64) if "UniqueChars" in features else np.zeros(n)
+
+    length_credit = _clamp_batch(L * float(w["length_credit_per_char"]), 0, float(w["length_credit_cap"]))
+    unique_credit = _clamp_batch(U * float(w["unique_credit_per_char"]), 0, float(w["unique_credit_cap"]))
+
+    risk -= (length_credit + unique_credit)
+
+    return _clamp_batch(risk, 0, 100).astype(np.float64)
+
+
+def risk_label_batch(risk_index, thresholds: dict | None = None):
+    """Vectorized risk_label: returns an object array of Safe/Medium/Risky."""
+    import numpy as np
+
+    t = dict(AUTO_RISK_LABEL_THRESHOLDS)
+    if thresholds:
+        t.update(thresholds)
+
+    x = np.asarray(risk_index, dtype=np.float64)
+    labels = np.full(x.shape, "Safe", dtype=object)
+    labels[x >= float(t["medium"])] = "Medium"
+    labels[x >= float(t["risky"])] = "Risky"
+    return labels
+
+
+def scoring_model_version(weights: dict | None = None, thresholds: dict | None = None) -> str:
+    """Short hash of the effective weights and label thresholds.
+
+    Stored per row as password_features.model_version; changing either dict
+    in config.py yields a new version, which `oampass rescore` picks up.
+    """
+    w = dict(DEFAULT_RISK_WEIGHTS)
+    if weights:
+        w.update(weights)
+    t = dict(AUTO_RISK_LABEL_THRESHOLDS)
+    if thresholds:
+        t.update(thresholds)
+    payload = {
+        "weights": {k: float(v) for k, v in w.items()},
+        "thresholds": {k: float(v) for k, v in t.items()},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
 def risk_label(risk_index: float, thresholds: dict | None = None) -> str:
     """Map RiskIndex -> categorical label used by the demo UI.
 
@@ -0,0 +1,430 @@
+"""Local scoring daemon: HTTP/1.1 over TCP or a Unix socket, stdlib asyncio only.
+
+    python -m oampass.cli serve --port 8765
+    python -m oampass.cli serve --unix /tmp/oampass.sock
+
+Endpoints (JSON in, JSON out):
+  POST /score        {"password": "...", "features": false}
+  POST /score/batch  {"passwords": ["...", ...], "features": false}
+  GET  /metrics      counters, queue depth, batch sizes, latency percentiles
+  GET  /health
+
+Concurrent requests are queued and coalesced into micro-batches (up to
+`max_batch` passwords, waiting at most `max_wait_ms` for more), which are
+scored in one worker thread (see score_batch). When more than
+`max_pending` passwords are queued, new requests get 503 with Retry-After
+instead of growing the queue.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import signal
+import time
+from typing import Callable
+
+from .config import (
+    SERVICE_HOST,
+    SERVICE_MAX_BATCH,
+    SERVICE_MAX_BODY_BYTES,
+    SERVICE_MAX_PENDING,
+    SERVICE_MAX_WAIT_MS,
+    SERVICE_PORT,
+    SERVICE_VECTOR_MIN_BATCH,
+)
+from .dictionary import get_automaton
+from .features_batch import compute_all_batch
+from .quickscore import score_password
+from .scoring import compute_risk_index_batch, risk_label_batch
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+# Server-side latencies kept for the percentiles in /metrics
+_LATENCY_WINDOW = 10_000
+
+
+@dataclass(frozen=True)
+class ServiceConfig:
+    host: str = SERVICE_HOST
+    port: int = SERVICE_PORT
+    unix_path: str | None = None
+    max_batch: int = SERVICE_MAX_BATCH
+    max_wait_ms: float = SERVICE_MAX_WAIT_MS
+    max_pending: int = SERVICE_MAX_PENDING
+    max_body_bytes: int = SERVICE_MAX_BODY_BYTES
+
+
+class Overloaded(Exception):
+    """Raised by MicroBatcher.submit when the queue is full."""
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def score_batch(passwords: list[str]) -> list[dict]:
+    """Features, RiskIndex and AutoRiskLabel for each password.
+
+    Batches of SERVICE_VECTOR_MIN_BATCH or more go through the vectorised
+    path; below that the scalar path is faster. Both give identical results.
+    """
+    if len(passwords) < SERVICE_VECTOR_MIN_BATCH:
+        return [score_password(pw) for pw in passwords]
+    feats = compute_all_batch(passwords)
+    risk = compute_risk_index_batch(feats)
+    labels = risk_label_batch(risk)
+    out = feats.to_dict("records")
+    for r, x, label in zip(out, risk.tolist(), labels.tolist()):
+        r["RiskIndex"] = x
+        r["AutoRiskLabel"] = label
+    return out
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.requests: dict[str, int] = {}
+        self.responses: dict[int, int] = {}
+        self.passwords = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.score_seconds = 0.0
+        self.latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def batch_done(self, size: int, seconds: float) -> None:
+        self.batches += 1
+        self.passwords += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.score_seconds += seconds
+
+    def as_dict(self, pending: int) -> dict:
+        lat = sorted(self.latencies)
+        uptime = time.monotonic() - self.started
+        ms = lambda v: round(v * 1000, 3) if v is not None else None  # noqa: E731
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": dict(self.requests),
+            "responses": {str(k): v for k, v in sorted(self.responses.items())},
+            "passwords_scored": self.passwords,
+            "passwords_per_s": round(self.passwords / uptime, 1) if uptime > 0 else None,
+            "batches": self.batches,
+            "mean_batch_size": round(self.passwords / self.batches, 2) if self.batches else None,
+            "max_batch_size": self.max_batch_seen,
+            "score_seconds": round(self.score_seconds, 6),
+            "pending_passwords": pending,
+            "latency_window": len(lat),
+            "latency_p50_ms": ms(percentile(lat, 0.50)),
+            "latency_p90_ms": ms(percentile(lat, 0.90)),
+            "latency_p99_ms": ms(percentile(lat, 0.99)),
+            "latency_max_ms": ms(lat[-1] if lat else None),
+        }
+
+
+class MicroBatcher:
+    """Coalesces concurrent submit() calls into batches for `score_fn`."""
+
+    def __init__(
+        self,
+        score_fn: Callable[[list[str]], list[dict]],
+        *,
+        max_batch: int,
+        max_wait_ms: float,
+        max_pending: int,
+        metrics: Metrics,
+    ) -> None:
+        self.score_fn = score_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_pending = max(1, max_pending)
+        self.metrics = metrics
+        self.pending = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # One scoring thread: batches run one at a time, the event loop keeps accepting
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="oampass-score")
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, passwords: list[str]) -> list[dict]:
+        n = len(passwords)
+        if not n:
+            return []
+        # A single oversized request is still accepted when the queue is empty
+        if self.pending and self.pending + n > self.max_pending:
+            raise Overloaded(f"{self.pending} passwords queued")
+        self.pending += n
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((passwords, fut))
+        return await fut
+
+    async def _collect(self) -> list[tuple[list[str], asyncio.Future]]:
+        items = [await self._queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            if self._queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            flat = [pw for pws, _ in items for pw in pws]
+            t0 = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.score_fn, flat)
+            except Exception as e:  # hand the failure to every waiting request
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                results = None
+            self.pending -= len(flat)
+            if results is None:
+                continue
+            self.metrics.batch_done(len(flat), time.perf_counter() - t0)
+            pos = 0
+            for pws, fut in items:
+                if not fut.done():
+                    fut.set_result(results[pos:pos + len(pws)])
+                pos += len(pws)
+
+
+def _result(row: dict, with_features: bool) -> dict:
+    if with_features:
+        return row
+    return {"RiskIndex": row["RiskIndex"], "AutoRiskLabel": row["AutoRiskLabel"]}
+
+
+def _parse_json(body: bytes) -> dict:
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "body is not valid JSON") from None
+    if not isinstance(data, dict):
+        raise HttpError(400, "body must be a JSON object")
+    return data
+
+
+class ScoringService:
+    def __init__(self, cfg: ServiceConfig = ServiceConfig(), score_fn: Callable[[list[str]], list[dict]] = score_batch):
+        self.cfg = cfg
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(
+            score_fn,
+            max_batch=cfg.max_batch,
+            max_wait_ms=cfg.max_wait_ms,
+            max_pending=cfg.max_pending,
+            metrics=self.metrics,
+        )
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        self.batcher.start()
+        if self.cfg.unix_path:
+            self.server = await asyncio.start_unix_server(self._handle, path=self.cfg.unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle, self.cfg.host, self.cfg.port)
+        return self.server
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.close()
+        if self.cfg.unix_path:
+            Path(self.cfg.unix_path).unlink(missing_ok=True)
+
+    async def _route(self, method: str, path: str, body: bytes) -> dict:
+        if path == "/health":
+            return {"status": "ok"}
+        if path == "/metrics":
+            return self.metrics.as_dict(self.batcher.pending)
+        if path not in ("/score", "/score/batch"):
+            raise HttpError(404, f"no route {path}")
+        if method != "POST":
+            raise HttpError(405, "use POST")
+        data = _parse_json(body)
+        with_features = bool(data.get("features", False))
+        if path == "/score":
+            pw = data.get("password")
+            if not isinstance(pw, str):
+                raise HttpError(400, "'password' must be a string")
+            return _result((await self.batcher.submit([pw]))[0], with_features)
+        pws = data.get("passwords")
+        if not isinstance(pws, list) or not all(isinstance(p, str) for p in pws):
+            raise HttpError(400, "'passwords' must be a list of strings")
+        return {"results": [_result(r, with_features) for r in await self.batcher.submit(pws)]}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                path = target.split("?", 1)[0]
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                extra: dict[str, str] = {}
+                try:
+                    try:
+                        length = int(headers.get("content-length", 0) or 0)
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        keep_alive = False  # can't tell where the body ends
+                        raise HttpError(400, "invalid Content-Length")
+                    if length > self.cfg.max_body_bytes:
+                        keep_alive = False  # the unread body would corrupt the stream
+                        raise HttpError(413, f"body larger than {self.cfg.max_body_bytes} bytes")
+                    body = await reader.readexactly(length) if length else b""
+                    self.metrics.requests[path] = self.metrics.requests.get(path, 0) + 1
+                    status, payload = 200, await self._route(method, path, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Overloaded as e:
+                    status, payload = 503, {"error": f"overloaded: {e}"}
+                    extra["Retry-After"] = "1"
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:  # e.g. score_fn failed: answer every request in the batch
+                    status, payload = 500, {"error": f"internal error: {type(e).__name__}"}
+                self._respond(writer, status, payload, keep_alive, extra)
+                await writer.drain()
+                self.metrics.responses[status] = self.metrics.responses.get(status, 0) + 1
+                if path.startswith("/score"):
+                    self.metrics.latencies.append(time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool, extra: dict[str, str]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{k}: {v}" for k, v in extra.items()),
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+
+async def http_request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str, payload: dict | None = None
+) -> tuple[int, dict]:
+    """Minimal keep-alive client for the service (used by the load generator and tests)."""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: oampass\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        if k.strip().lower() == "content-length":
+            length = int(v)
+    return status, json.loads(await reader.readexactly(length)) if length else {}
+
+
+async def serve(cfg: ServiceConfig) -> None:
+    # Load the dictionary and warm the batch path before accepting requests
+    get_automaton()
+    score_batch(["warm-up"] * SERVICE_VECTOR_MIN_BATCH)
+    svc = ScoringService(cfg)
+    server = await svc.start()
+    where = cfg.unix_path or "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"oampass scoring service listening on {where}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await svc.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="oampass serve", description="Run the local micro-batching scoring service.")
+    ap.add_argument("--host", default=SERVICE_HOST)
+    ap.add_argument("--port", type=int, default=SERVICE_PORT)
+    ap.add_argument("--unix", default=None, help="Listen on this Unix socket instead of TCP.")
+    ap.add_argument("--max-batch", type=int, default=SERVICE_MAX_BATCH, help="Passwords per micro-batch.")
+    ap.add_argument("--max-wait-ms", type=float, default=SERVICE_MAX_WAIT_MS, help="How long a batch waits to fill up.")
+    ap.add_argument("--max-pending", type=int, default=SERVICE_MAX_PENDING, help="Queued passwords before answering 503.")
+    args = ap.parse_args(argv)
+    cfg = ServiceConfig(
+        host=args.host,
+        port=args.port,
+        unix_path=args.unix,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        max_pending=args.max_pending,
+    )
+    try:
+        asyncio.run(serve(cfg))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,185 @@
+"""Mergeable RiskIndex distribution sketches for streaming/sharded summaries.
+
+A RiskSketch keeps either exact value counts or a fixed-bin histogram over
+the RiskIndex range. Both merge associatively, so chunks and shards can be
+summarized independently and combined in any order.
+
+Error bounds (histogram mode, default 1000 bins over 0-100, i.e. 0.1 wide):
+each order statistic is placed inside the bin that holds the true value,
+so any quantile (median, p90, ...) is within one bin width of the exact
+pandas `quantile(q)` (linear interpolation) result. Estimates are clamped
+to the exact min/max; values outside the range are counted in the edge
+bins, where only that clamp applies. count, mean, min and max are always exact.
+
+Exact mode stores one counter per distinct value and gives the same
+quantiles as pandas. "auto" (the default) stays exact until a sketch holds
+more than SUMMARY_EXACT_MAX_DISTINCT distinct values, then folds itself
+into the histogram. The built-in scoring model yields few distinct
+RiskIndex values, so its summaries stay exact.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+import math
+
+import numpy as np
+
+from .config import SUMMARY_EXACT_MAX_DISTINCT, SUMMARY_HIST_BINS, SUMMARY_HIST_RANGE
+
+SKETCH_MODES = ("auto", "exact", "histogram")
+
+
+class RiskSketch:
+    """Value distribution of one group: exact counts or a fixed-bin histogram."""
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        *,
+        bins: int = SUMMARY_HIST_BINS,
+        value_range: tuple[float, float] = SUMMARY_HIST_RANGE,
+        max_distinct: int = SUMMARY_EXACT_MAX_DISTINCT,
+    ):
+        if mode not in SKETCH_MODES:
+            raise ValueError(f"unknown sketch mode {mode!r}; expected one of {SKETCH_MODES}")
+        self.mode = mode
+        self.bins = int(bins)
+        self.lo, self.hi = float(value_range[0]), float(value_range[1])
+        self.max_distinct = max_distinct
+        self.count = 0
+        self.values: Counter | None = Counter() if mode != "histogram" else None
+        self.hist: np.ndarray | None = np.zeros(self.bins, dtype=np.int64) if mode == "histogram" else None
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def exact(self) -> bool:
+        return self.values is not None
+
+    @property
+    def bin_width(self) -> float:
+        return (self.hi - self.lo) / self.bins
+
+    def _bin_index(self, values: np.ndarray) -> np.ndarray:
+        idx = np.floor((values - self.lo) / self.bin_width).astype(np.int64)
+        return np.clip(idx, 0, self.bins - 1)
+
+    def _to_histogram(self) -> None:
+        hist = np.zeros(self.bins, dtype=np.int64)
+        if self.values:
+            vals = np.fromiter(self.values.keys(), dtype=np.float64, count=len(self.values))
+            counts = np.fromiter(self.values.values(), dtype=np.int64, count=len(self.values))
+            np.add.at(hist, self._bin_index(vals), counts)
+        self.hist, self.values = hist, None
+
+    def _maybe_fold(self) -> None:
+        if self.mode == "auto" and self.values is not None and len(self.values) > self.max_distinct:
+            self._to_histogram()
+
+    def _check_compatible(self, other: "RiskSketch") -> None:
+        if (self.bins, self.lo, self.hi) != (other.bins, other.lo, other.hi):
+            raise ValueError("cannot merge sketches with different histogram bins")
+
+    def update(self, values) -> None:
+        """Add an array of values (NaN is ignored)."""
+        arr = np.asarray(values, dtype=np.float64)
+        arr = arr[~np.isnan(arr)]
+        if not arr.size:
+            return
+        self.count += int(arr.size)
+        self.min = min(self.min, float(arr.min()))
+        self.max = max(self.max, float(arr.max()))
+        if self.values is not None:
+            uniq, counts = np.unique(arr, return_counts=True)
+            self.values.update(dict(zip(uniq.tolist(), counts.tolist())))
+            self._maybe_fold()
+        else:
+            self.hist += np.bincount(self._bin_index(arr), minlength=self.bins)
+
+    def merge(self, other: "RiskSketch") -> None:
+        self._check_compatible(other)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.values is not None and other.values is not None:
+            self.values.update(other.values)
+            self._maybe_fold()
+            return
+        if self.values is not None:
+            if self.mode == "exact":
+                raise ValueError("an exact sketch cannot absorb a histogram")
+            self._to_histogram()
+        if other.values is not None:
+            vals = np.fromiter(other.values.keys(), dtype=np.float64, count=len(other.values))
+            counts = np.fromiter(other.values.values(), dtype=np.int64, count=len(other.values))
+            np.add.at(self.hist, self._bin_index(vals), counts)
+        else:
+            self.hist += other.hist
+
+    def _order_stat(self, rank: int, ordered: list | None, cum: np.ndarray) -> float:
+        # Value of the rank-th smallest element (0-based)
+        i = int(np.searchsorted(cum, rank, side="right"))
+        if ordered is not None:
+            return ordered[i]
+        before = int(cum[i - 1]) if i else 0
+        in_bin = int(self.hist[i])
+        # Spread the bin's elements evenly over its width
+        est = self.lo + (i + (rank - before + 0.5) / in_bin) * self.bin_width
+        return min(max(est, self.min), self.max)
+
+    def quantiles(self, qs) -> list[float]:
+        """Quantiles with pandas' default (linear) interpolation; NaN when empty."""
+        if not self.count:
+            return [math.nan for _ in qs]
+        if self.values is not None:
+            ordered = sorted(self.values)
+            cum = np.cumsum([self.values[v] for v in ordered])
+        else:
+            ordered = None
+            cum = np.cumsum(self.hist)
+        out = []
+        for q in qs:
+            h = q * (self.count - 1)
+            lo_rank, hi_rank = math.floor(h), math.ceil(h)
+            lo = self._order_stat(lo_rank, ordered, cum)
+            hi = lo if hi_rank == lo_rank else self._order_stat(hi_rank, ordered, cum)
+            out.append(lo + (hi - lo) * (h - lo_rank))
+        return out
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def to_dict(self) -> dict:
+        """JSON-safe form (sparse), for combining shards across processes or runs."""
+        d = {
+            "mode": self.mode,
+            "bins": self.bins,
+            "range": [self.lo, self.hi],
+            "max_distinct": self.max_distinct,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        if self.values is not None:
+            d["values"] = sorted([v, c] for v, c in self.values.items())
+        else:
+            nz = np.flatnonzero(self.hist)
+            d["hist"] = [[int(i), int(self.hist[i])] for i in nz]
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RiskSketch":
+        sk = cls(d["mode"], bins=d["bins"], value_range=tuple(d["range"]), max_distinct=d["max_distinct"])
+        sk.count = int(d["count"])
+        if sk.count:
+            sk.min, sk.max = float(d["min"]), float(d["max"])
+        if "values" in d:
+            sk.values = Counter({float(v): int(c) for v, c in d["values"]})
+            sk.hist = None
+        else:
+            sk.values = None
+            sk.hist = np.zeros(sk.bins, dtype=np.int64)
+            for i, c in d["hist"]:
+                sk.hist[i] = c
+        return sk
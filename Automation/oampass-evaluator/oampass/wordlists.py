@@ -0,0 +1,156 @@
+"""Chunked readers for newline-delimited and CSV password lists.
+
+Breach-style dumps are too large to load as one DataFrame, so these readers
+yield fixed-size chunks that are scored with the batch feature/scoring code
+and consumed as a stream (see analysis.export_streamed_artifacts).
+Files ending in `.gz` are decompressed on the fly.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+from pathlib import Path
+from typing import IO, Iterator
+
+import pandas as pd
+
+from .config import IMPORT_CHUNK_ROWS, OAMPASS_DERIVED_COLUMNS
+from .features_batch import compute_all_batch
+from .io import find_column
+from .scoring import compute_risk_index_batch
+
+INPUT_FORMATS = ("xlsx", "text", "csv")
+
+# Column layout of scored chunks (same order as the OAMpass Raw sheet)
+SCORED_COLUMNS = ["Password", *OAMPASS_DERIVED_COLUMNS, "RiskIndex", "Label", "Tool"]
+
+_TEXT_SUFFIXES = {".txt", ".lst", ".dic", ".list"}
+
+
+def detect_format(path: str | Path) -> str:
+    """Guess the input format from the file name (a trailing .gz is ignored)."""
+    p = Path(path)
+    suffixes = [s.lower() for s in p.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes = suffixes[:-1]
+    ext = suffixes[-1] if suffixes else ""
+    if ext in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if ext in (".csv", ".tsv"):
+        return "csv"
+    if ext in _TEXT_SUFFIXES or not ext:
+        return "text"
+    raise ValueError(f"Cannot infer input format from {p.name!r}; pass --input-format.")
+
+
+def _open_text(path: Path, encoding: str) -> IO[str]:
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, "rt", encoding=encoding, errors="replace", newline="")
+    return path.open("r", encoding=encoding, errors="replace", newline="")
+
+
+def _frame(passwords: list[str], tools: list[str] | None = None, labels: list[str] | None = None) -> pd.DataFrame:
+    n = len(passwords)
+    return pd.DataFrame({
+        "Password": passwords,
+        "Label": labels if labels is not None else [""] * n,
+        "Tool": tools if tools is not None else [""] * n,
+    })
+
+
+def iter_text_chunks(path: str | Path, *, chunk_size: int = IMPORT_CHUNK_ROWS, encoding: str = "utf-8") -> Iterator[pd.DataFrame]:
+    """Yield Password/Label/Tool chunks from a newline-delimited list (one password per line)."""
+    p = Path(path)
+    buf: list[str] = []
+    with _open_text(p, encoding) as f:
+        for line in f:
+            pw = line.strip()  # same rule as quickscore.iter_stdin_passwords
+            if not pw:
+                continue
+            buf.append(pw)
+            if len(buf) >= chunk_size:
+                yield _frame(buf)
+                buf = []
+    if buf:
+        yield _frame(buf)
+
+
+def iter_csv_chunks(
+    path: str | Path,
+    *,
+    password_column: str | None = None,
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    encoding: str = "utf-8",
+) -> Iterator[pd.DataFrame]:
+    """Yield Password/Label/Tool chunks from a CSV with a header row.
+
+    The password column is `password_column` or the first of Password/pw/Pass;
+    Tool and Label columns are carried over when present.
+    """
+    p = Path(path)
+    with _open_text(p, encoding) as f:
+        dialect = csv.excel_tab if ".tsv" in [s.lower() for s in p.suffixes] else csv.excel
+        reader = csv.reader(f, dialect)
+        header = next(reader, None)
+        if header is None:
+            return
+        pw_name = find_column(header, [password_column] if password_column else ["Password", "password", "pw", "Pass"])
+        if pw_name is None:
+            raise ValueError(f"Could not find a password column in {p.name!r} (header: {header}).")
+        pw_i = header.index(pw_name)
+        tool_name = find_column(header, ["Tool"])
+        label_name = find_column(header, ["Label"])
+        tool_i = header.index(tool_name) if tool_name else None
+        label_i = header.index(label_name) if label_name else None
+
+        pws: list[str] = []
+        tools: list[str] = []
+        labels: list[str] = []
+
+        def cell(row: list[str], i: int | None) -> str:
+            return row[i].strip() if i is not None and i < len(row) else ""
+
+        for row in reader:
+            pw = cell(row, pw_i)
+            if not pw:
+                continue
+            pws.append(pw)
+            tools.append(cell(row, tool_i))
+            labels.append(cell(row, label_i))
+            if len(pws) >= chunk_size:
+                yield _frame(pws, tools, labels)
+                pws, tools, labels = [], [], []
+        if pws:
+            yield _frame(pws, tools, labels)
+
+
+def iter_password_chunks(
+    path: str | Path,
+    *,
+    fmt: str = "text",
+    password_column: str | None = None,
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    encoding: str = "utf-8",
+) -> Iterator[pd.DataFrame]:
+    """Dispatch to the text or CSV reader."""
+    if fmt == "text":
+        return iter_text_chunks(path, chunk_size=chunk_size, encoding=encoding)
+    if fmt == "csv":
+        return iter_csv_chunks(path, password_column=password_column, chunk_size=chunk_size, encoding=encoding)
+    raise ValueError(f"Unsupported wordlist format: {fmt!r}")
+
+
+def score_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Add derived columns and RiskIndex to a Password/Label/Tool chunk."""
+    feats = compute_all_batch(df["Password"])
+    out = pd.concat([df[["Password"]], feats], axis=1)
+    out["RiskIndex"] = compute_risk_index_batch(feats)
+    out["Label"] = df["Label"]
+    out["Tool"] = df["Tool"]
+    return out[SCORED_COLUMNS]
+
+
+def iter_scored_chunks(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    for df in chunks:
+        yield score_chunk(df)
@@ -0,0 +1,158 @@
+"""Load generator for the scoring service: fixed request rate, p50/p99 latency.
+
+Requests are sent open-loop at `--rate` per second over a pool of keep-alive
+connections. Latency is measured from each request's scheduled send time, so
+time spent waiting for a free connection counts (no coordinated omission).
+
+    python scripts/loadgen_service.py --spawn --rate 2000 --duration 10
+    python scripts/loadgen_service.py --port 8765 --rate 500 --batch 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.generator import PasswordSpec, generate_passwords  # noqa: E402
+from oampass.service import http_request, percentile  # noqa: E402
+
+
+async def _connect(args: argparse.Namespace):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def _wait_ready(args: argparse.Namespace, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await _connect(args)
+            await http_request(reader, writer, "GET", "/health")
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_load(args: argparse.Namespace, passwords: list[str]) -> dict:
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.connections):
+        pool.put_nowait(await _connect(args))
+
+    total = int(args.rate * args.duration)
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    errors: list[str] = []
+
+    async def one(i: int, scheduled: float) -> None:
+        conn = await pool.get()
+        try:
+            if args.batch > 1:
+                pws = [passwords[(i * args.batch + k) % len(passwords)] for k in range(args.batch)]
+                status, _ = await http_request(*conn, "POST", "/score/batch", {"passwords": pws})
+            else:
+                status, _ = await http_request(*conn, "POST", "/score", {"password": passwords[i % len(passwords)]})
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            conn = await _connect(args)
+        else:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - scheduled)
+        finally:
+            pool.put_nowait(conn)
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(total):
+        scheduled = start + i / args.rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i, scheduled)))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+
+    reader, writer = await _connect(args)
+    _, server = await http_request(reader, writer, "GET", "/metrics")
+    writer.close()
+    while not pool.empty():
+        pool.get_nowait()[1].close()
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2) if v is not None else None  # noqa: E731
+    return {
+        "target_rps": args.rate,
+        "sent": total,
+        "ok": statuses.get(200, 0),
+        "rejected_503": statuses.get(503, 0),
+        "other_status": {str(k): v for k, v in statuses.items() if k not in (200, 503)},
+        "errors": len(errors),
+        "seconds": round(wall, 3),
+        "achieved_rps": round(total / wall, 1) if wall else None,
+        "passwords_per_request": args.batch,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p90_ms": ms(percentile(latencies, 0.90)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "server_mean_batch_size": server.get("mean_batch_size"),
+        "server_batches": server.get("batches"),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--unix", default=None, help="Connect to a Unix socket instead of TCP.")
+    ap.add_argument("--spawn", action="store_true", help="Start `oampass serve` on a free port for the run.")
+    ap.add_argument("--rate", type=float, default=1000.0, help="Requests per second.")
+    ap.add_argument("--duration", type=float, default=5.0, help="Seconds of load.")
+    ap.add_argument("--connections", type=int, default=64, help="Keep-alive connections in the pool.")
+    ap.add_argument("--batch", type=int, default=1, help="Passwords per request (>1 uses /score/batch).")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    args = ap.parse_args()
+
+    proc = None
+    if args.spawn:
+        args.port = _free_port()
+        cmd = [sys.executable, "-m", "oampass.cli", "serve", "--host", args.host, "--port", str(args.port)]
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL)
+    passwords = generate_passwords(10_000, PasswordSpec(), seed=args.seed)
+    try:
+        asyncio.run(_wait_ready(args))
+        result = asyncio.run(run_load(args, passwords))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for k, v in result.items():
+            print(f"{k:>24}: {v}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
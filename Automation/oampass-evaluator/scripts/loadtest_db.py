@@ -0,0 +1,128 @@
+"""Load test: N concurrent sessions inserting evaluated passwords into SQLite.
+
+Compares the app's previous pattern (one shared connection, rollback
+journal, commit per statement) with ConnectionManager (WAL, per-thread
+readers, single batching writer).
+
+    python scripts/loadtest_db.py --sessions 16 --inserts 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from oampass.db import ConnectionManager, get_conn, init_db  # noqa: E402
+from oampass.db_ops import fetch_joined, insert_evaluation  # noqa: E402
+from oampass.features import compute_all  # noqa: E402
+from oampass.scoring import compute_risk_index, risk_label  # noqa: E402
+
+
+def _evaluate(pw: str) -> tuple[dict, float, str]:
+    feats = compute_all(pw)
+    rix = float(compute_risk_index(feats))
+    return feats, rix, risk_label(rix)
+
+
+def _add(conn, pw: str, feats: dict, rix: float, auto: str) -> int:
+    return insert_evaluation(conn, pw, "LoadTest", feats, rix, auto, source="loadtest")
+
+
+def _run(sessions: int, inserts: int, reads_every: int, do_write, do_read) -> dict:
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def session(sid: int) -> None:
+        local: list[float] = []
+        for i in range(inserts):
+            pw = f"Sess{sid}-Pw{i}!"
+            args = _evaluate(pw)
+            t0 = time.perf_counter()
+            try:
+                do_write(pw, *args)
+                if reads_every and i % reads_every == 0:
+                    do_read()
+            except Exception as e:  # "database is locked" etc.
+                with lock:
+                    errors.append(type(e).__name__ + ": " + str(e))
+                continue
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(s,)) for s in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    ok = len(latencies)
+    return {
+        "ok": ok,
+        "errors": len(errors),
+        "seconds": round(wall, 3),
+        "writes_per_s": round(ok / wall, 1) if wall else 0.0,
+        "p50_ms": round(1000 * statistics.median(latencies), 2) if latencies else None,
+        "p99_ms": round(1000 * latencies[min(ok - 1, int(ok * 0.99))], 2) if latencies else None,
+    }
+
+
+def run_shared_connection(db: Path, sessions: int, inserts: int, reads_every: int) -> dict:
+    conn = get_conn(db)
+    init_db(conn)
+    try:
+        return _run(
+            sessions, inserts, reads_every,
+            lambda pw, f, r, a: _add(conn, pw, f, r, a),
+            lambda: fetch_joined(conn, limit=200),
+        )
+    finally:
+        conn.close()
+
+
+def run_manager(db: Path, sessions: int, inserts: int, reads_every: int) -> dict:
+    mgr = ConnectionManager(db)
+    try:
+        out = _run(
+            sessions, inserts, reads_every,
+            lambda pw, f, r, a: mgr.write(_add, pw, f, r, a),
+            lambda: fetch_joined(mgr.reader(), limit=200),
+        )
+        out["commits"] = mgr.commits
+        return out
+    finally:
+        mgr.close()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", type=int, default=8)
+    ap.add_argument("--inserts", type=int, default=200, help="Inserts per session")
+    ap.add_argument("--reads-every", type=int, default=10, help="Run a fetch_joined every N inserts (0 = never)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        base = run_shared_connection(Path(td) / "shared.sqlite", args.sessions, args.inserts, args.reads_every)
+        mgr = run_manager(Path(td) / "managed.sqlite", args.sessions, args.inserts, args.reads_every)
+
+    print(f"sessions={args.sessions} inserts/session={args.inserts}")
+    for name, r in (("shared connection", base), ("ConnectionManager", mgr)):
+        print(f"{name:>18}: {r}")
+    if base["writes_per_s"]:
+        print(f"speedup: {mgr['writes_per_s'] / base['writes_per_s']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
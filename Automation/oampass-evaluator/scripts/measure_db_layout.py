@@ -0,0 +1,140 @@
+"""Size and scan time of the legacy vs compact database layout.
+
+Builds a database in the pre-compact layout (db.LEGACY_TABLES_SQL) with N
+synthetic rows, measures it, migrates it with init_db, VACUUMs both and
+measures again.
+
+    python scripts/measure_db_layout.py --rows 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.generator import PasswordSpec, generate_passwords  # noqa: E402
+from oampass.db import FEATURE_FLAGS, LEGACY_TABLES_SQL, feature_expr, init_db  # noqa: E402
+from oampass.db_ops import FEATURE_KEYS, _mask_password, _salted_sha256  # noqa: E402
+from oampass.features_batch import compute_all_batch  # noqa: E402
+from oampass.fingerprint import fingerprints  # noqa: E402
+from oampass.scoring import compute_risk_index_batch, risk_label_batch  # noqa: E402
+
+_LEGACY_JOINED = (
+    "e.id, e.password_hash, e.password_mask, e.tool, e.source, e.created_at, e.occurrences, "
+    + ", ".join(f"f.{k}" for k in FEATURE_KEYS)
+    + ", f.RiskIndex, f.AutoRiskLabel"
+)
+
+# name -> (legacy SQL, compact SQL); each is fully fetched
+QUERIES = {
+    "joined_scan": (
+        f"SELECT {_LEGACY_JOINED} FROM password_entries e JOIN password_features f ON f.entry_id = e.id ORDER BY e.created_at DESC",
+        "SELECT * FROM password_joined ORDER BY created_at DESC",
+    ),
+    "flag_aggregate": (
+        "SELECT AutoRiskLabel, COUNT(*), AVG(RiskIndex), SUM(HasDictionaryWord), SUM(HasSequential) FROM password_features GROUP BY 1",
+        f"SELECT AutoRiskLabel, COUNT(*), AVG(RiskIndex), SUM({feature_expr('HasDictionaryWord', 'password_features')}), "
+        f"SUM({feature_expr('HasSequential', 'password_features')}) FROM password_features GROUP BY 1",
+    ),
+    "entries_scan": (
+        "SELECT COUNT(*), SUM(length(password_hash) + length(salt)) FROM password_entries",
+        "SELECT COUNT(*), SUM(length(password_hash) + length(salt)) FROM password_entries",
+    ),
+}
+
+
+def _legacy_indexes(conn: sqlite3.Connection) -> None:
+    # Same secondary indexes the app creates, so file sizes compare like for like
+    conn.executescript(
+        """CREATE INDEX idx_entries_created_at ON password_entries(created_at);
+           CREATE INDEX idx_entries_tool_created ON password_entries(tool, created_at);
+           CREATE INDEX idx_entries_source_created ON password_entries(source, created_at);
+           CREATE INDEX idx_features_risk ON password_features(RiskIndex);
+           CREATE INDEX idx_features_label_risk ON password_features(AutoRiskLabel, RiskIndex);
+           CREATE UNIQUE INDEX idx_entries_fingerprint_tool ON password_entries(fingerprint, COALESCE(tool, ''))
+             WHERE fingerprint IS NOT NULL;"""
+    )
+
+
+def build_legacy(path: Path, rows: int, seed: int) -> int:
+    # Distinct passwords, as stored by a fingerprinting import
+    pws = list(dict.fromkeys(generate_passwords(rows, PasswordSpec(duplicate_rate=0.0), seed=seed)))
+    feats = compute_all_batch(pws)
+    risk = compute_risk_index_batch(feats).tolist()
+    labels = risk_label_batch(risk).tolist()
+    fps = fingerprints(pws, b"measure")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_TABLES_SQL)
+    entries, features = [], []
+    for i, (pw, rec) in enumerate(zip(pws, feats.to_dict("records")), start=1):
+        h, salt = _salted_sha256(pw)
+        entries.append((i, h.hex(), salt.hex(), _mask_password(pw), f"Tool{i % 7}", "bulk_import", 1_700_000_000 + i, fps[i - 1], 1))
+        features.append([i] + [rec[k] for k in FEATURE_KEYS] + [risk[i - 1], labels[i - 1]])
+    conn.executemany("INSERT INTO password_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", entries)
+    conn.executemany(f"INSERT INTO password_features VALUES ({','.join('?' * (len(FEATURE_KEYS) + 3))})", features)
+    conn.commit()
+    _legacy_indexes(conn)
+    conn.close()
+    return len(pws)
+
+
+def measure(path: Path, layout: int, repeat: int) -> dict:
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    out = {"file_bytes": path.stat().st_size}
+    for table in ("password_entries", "password_features"):
+        # Approximate per-table bytes via the page count of a full scan (dbstat is not always compiled in)
+        try:
+            pages = conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (table,)).fetchone()[0]
+        except sqlite3.OperationalError:
+            pages = None
+        out[f"{table}_bytes"] = pages
+    conn.close()
+    for name, sqls in QUERIES.items():
+        best = float("inf")
+        for _ in range(repeat):
+            conn = sqlite3.connect(path)  # fresh connection: empty SQLite page cache
+            t0 = time.perf_counter()
+            conn.execute(sqls[layout]).fetchall()
+            best = min(best, time.perf_counter() - t0)
+            conn.close()
+        out[f"{name}_ms"] = round(best * 1000, 2)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        path = Path(td) / "layout.sqlite"
+        stored = build_legacy(path, args.rows, args.seed)
+        legacy = measure(path, 0, args.repeat)
+
+        conn = sqlite3.connect(path)
+        t0 = time.perf_counter()
+        init_db(conn)
+        migrate_s = time.perf_counter() - t0
+        conn.close()
+        compact = measure(path, 1, args.repeat)
+
+    print(f"rows={stored} flags packed={len(FEATURE_FLAGS)} migration={migrate_s:.2f}s")
+    print(f"{'':<26}{'legacy':>14}{'compact':>14}{'change':>9}")
+    for k in legacy:
+        a, b = legacy[k], compact[k]
+        change = f"{b / a - 1:+.0%}" if a and b is not None else ""
+        print(f"{k:<26}{a if a is not None else '-':>14}{b if b is not None else '-':>14}{change:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
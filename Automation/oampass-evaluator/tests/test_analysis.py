@@ -28,3 +28,15 @@ def test_summarize_sorts_rank_desc():
     s = summarize(df)
     assert s.ranked.iloc[0]["RiskIndex"] == 90
     assert s.ranked.iloc[-1]["RiskIndex"] == 10
+
+def test_make_ranked_top_matches_full_sort_with_ties():
+    import numpy as np
+    from oampass.analysis import make_ranked
+
+    rng = np.random.default_rng(0)
+    risk = rng.integers(0, 6, 500).astype(float)
+    risk[rng.choice(500, 20, replace=False)] = np.nan
+    df = pd.DataFrame({"Password": rng.choice(list("abcdefgh"), 500), "RiskIndex": risk, "Row": np.arange(500)})
+    full = make_ranked(df)
+    for k in (1, 7, 83, 480, 499, 500, 800):
+        pd.testing.assert_frame_equal(make_ranked(df, top=k), full.head(k))
@@ -0,0 +1,29 @@
+from benchmarks.compare import compare, main
+from benchmarks.generator import PasswordSpec, generate_passwords
+
+
+def test_generator_is_seeded_and_respects_spec():
+    spec = PasswordSpec(min_len=8, max_len=12, classes="d", dictionary_rate=0.0, duplicate_rate=0.5)
+    a = generate_passwords(2000, spec, seed=1)
+    assert a == generate_passwords(2000, spec, seed=1)
+    assert a != generate_passwords(2000, spec, seed=2)
+    assert all(p.isdigit() and 8 <= len(p) <= 12 for p in a)
+    assert 0.4 < 1 - len(set(a)) / len(a) < 0.6
+
+
+def _report(**best):
+    return {"rows": 10, "spec": {}, "results": {k: {"best_s": v} for k, v in best.items()}}
+
+
+def test_compare_thresholds(tmp_path):
+    base = _report(a=1.0, b=1.0, c=1.0)
+    cur = _report(a=1.1, b=1.3, d=5.0)
+    got = {c.case: c.regressed for c in compare(base, cur, 0.15, [("b", 0.5)])}
+    assert got == {"a": False, "b": False}
+    assert [c.case for c in compare(base, cur, 0.05) if c.regressed] == ["a", "b"]
+
+    import json
+    (tmp_path / "base.json").write_text(json.dumps(base))
+    (tmp_path / "cur.json").write_text(json.dumps(cur))
+    assert main([str(tmp_path / "base.json"), str(tmp_path / "cur.json")]) == 1
+    assert main([str(tmp_path / "base.json"), str(tmp_path / "cur.json"), "--case-threshold", "b=0.5"]) == 0
@@ -0,0 +1,31 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from oampass import cache
+from oampass.io import LoadResult
+
+SAMPLE = Path(__file__).resolve().parents[1] / "data" / "OAMpass_sample.xlsx"
+
+
+def test_cached_load_hits_on_second_run(tmp_path):
+    first, hit1 = cache.cached_load_oampass_excel(SAMPLE, recompute_riskindex=True, recompute_missing=True, cache_dir=tmp_path)
+    second, hit2 = cache.cached_load_oampass_excel(SAMPLE, recompute_riskindex=True, recompute_missing=True, cache_dir=tmp_path)
+    assert (hit1, hit2) == (False, True)
+    pd.testing.assert_frame_equal(first.df, second.df)
+    assert second.dataset_sha256 == first.dataset_sha256
+
+    # Different flags -> different key
+    _, hit3 = cache.cached_load_oampass_excel(SAMPLE, cache_dir=tmp_path)
+    assert hit3 is False
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    lr = LoadResult(df=pd.DataFrame({"x": range(1000)}), dataset_sha256="0" * 64, source_sheet="Raw")
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, lr, tmp_path, max_bytes=10**9)
+        os.utime(tmp_path / f"{key}.pkl", (1000 + i, 1000 + i))
+    size = (tmp_path / "a.pkl").stat().st_size
+    assert cache.evict(tmp_path, max_bytes=2 * size) == 1
+    assert sorted(p.stem for p in tmp_path.glob("*.pkl")) == ["b", "c"]
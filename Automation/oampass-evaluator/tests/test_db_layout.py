@@ -0,0 +1,93 @@
+import hashlib
+import sqlite3
+
+import pytest
+
+from oampass.cli import main
+from oampass.db import LEGACY_TABLES_SQL, get_conn, init_db, is_legacy_layout
+from oampass.db_ops import FEATURE_KEYS, fetch_joined, fetch_stats, find_fingerprints, insert_evaluation
+from oampass.features import compute_all
+from oampass.scoring import compute_risk_index, risk_label
+
+PASSWORDS = ["password", "Abc123!", "zzz", "Tr0ub4dor&3", "aaa!1A"]
+
+
+def _legacy_db(path):
+    conn = get_conn(path)
+    conn.executescript(LEGACY_TABLES_SQL)
+    for i, pw in enumerate(PASSWORDS, start=1):
+        feats = compute_all(pw)
+        rix = compute_risk_index(feats)
+        salt = bytes([i]) * 16
+        conn.execute(
+            "INSERT INTO password_entries VALUES (?, ?, ?, ?, ?, 'legacy', ?, ?, ?)",
+            (i, hashlib.sha256(salt + pw.encode()).hexdigest(), salt.hex(), "m", f"T{i % 2}", 1000 + i, f"{i:064x}", i),
+        )
+        conn.execute(
+            f"INSERT INTO password_features VALUES ({','.join('?' * (len(FEATURE_KEYS) + 3))})",
+            [i] + [feats[k] for k in FEATURE_KEYS] + [rix, risk_label(rix)],
+        )
+    # A deleted entry: AUTOINCREMENT must not hand its id out again
+    conn.execute("INSERT INTO password_entries(id, password_hash, salt, created_at) VALUES (9, 'aa', 'bb', 0)")
+    conn.execute("DELETE FROM password_entries WHERE id = 9")
+    conn.commit()
+    return conn
+
+
+def test_failed_migration_keeps_legacy_tables(tmp_path):
+    conn = _legacy_db(tmp_path / "legacy.sqlite")
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("DELETE FROM password_entries WHERE id = 3")  # leaves an orphaned features row
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    for _ in range(2):  # reported every time, not just once
+        with pytest.raises(sqlite3.IntegrityError, match="foreign key violations"):
+            init_db(conn)
+        assert is_legacy_layout(conn) and not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM password_features").fetchone()[0] == len(PASSWORDS)
+
+
+def test_legacy_database_is_migrated_to_compact_layout(tmp_path):
+    conn = _legacy_db(tmp_path / "legacy.sqlite")
+    before = [dict(r) for r in conn.execute(
+        f"""SELECT e.id, e.password_hash, e.password_mask, e.tool, e.source, e.created_at, e.occurrences,
+                   {", ".join("f." + k for k in FEATURE_KEYS)}, f.RiskIndex, f.AutoRiskLabel
+            FROM password_entries e JOIN password_features f ON f.entry_id = e.id ORDER BY e.created_at DESC"""
+    )]
+    assert is_legacy_layout(conn)
+
+    init_db(conn)
+    assert not is_legacy_layout(conn)
+    assert [dict(r) for r in fetch_joined(conn)] == before
+    assert tuple(conn.execute("SELECT typeof(password_hash), length(salt) FROM password_entries LIMIT 1").fetchone()) == ("blob", 16)
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    assert sum(r["count"] for r in fetch_stats(conn, "tool")) == len(PASSWORDS)
+
+    assert find_fingerprints(conn, [f"{2:064x}"]) == {f"{2:064x}": [(2, "T0")]}
+    feats = compute_all("new one")
+    new_id = insert_evaluation(conn, "new one", "T1", feats, 50.0, "Medium", fingerprint=f"{99:064x}")
+    assert new_id == 10
+    row = dict(fetch_joined(conn, limit=1)[0])
+    assert {k: row[k] for k in FEATURE_KEYS} == {k: feats[k] for k in FEATURE_KEYS}
+
+    init_db(conn)  # idempotent
+    assert len(fetch_joined(conn)) == len(PASSWORDS) + 1
+
+
+def test_flags_round_trip_through_view(tmp_path):
+    conn = get_conn(tmp_path / "c.sqlite")
+    init_db(conn)
+    for pw in PASSWORDS:
+        feats = compute_all(pw)
+        insert_evaluation(conn, pw, None, feats, 1.0, "Safe")
+    got = [{k: r[k] for k in FEATURE_KEYS} for r in conn.execute("SELECT * FROM password_joined ORDER BY id")]
+    assert got == [{k: compute_all(pw)[k] for k in FEATURE_KEYS} for pw in PASSWORDS]
+
+
+def test_compact_command_migrates_and_vacuums(tmp_path, capsys):
+    db = tmp_path / "legacy.sqlite"
+    _legacy_db(db).close()
+    assert main(["compact", "--db", str(db)]) == 0
+    assert "migrated to the compact layout" in capsys.readouterr().out
+    assert not is_legacy_layout(sqlite3.connect(db))
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+
+import pytest
+
+from oampass.db import ConnectionManager
+from oampass.db_ops import fetch_joined, insert_evaluation, insert_features
+from oampass.features import compute_all
+
+
+def test_manager_concurrent_writes_and_reads(tmp_path):
+    mgr = ConnectionManager(tmp_path / "m.sqlite")
+    try:
+        def add(i: int) -> int:
+            pw = f"Pw{i}!"
+            return mgr.write(insert_evaluation, pw, "T", compute_all(pw), 50.0, "Medium")
+
+        with ThreadPoolExecutor(8) as ex:
+            ids = list(ex.map(add, range(200)))
+        assert sorted(ids) == list(range(1, 201))
+        assert mgr.commits <= mgr.writes == 200
+        assert len(fetch_joined(mgr.reader(), limit=1000)) == 200
+        assert mgr.reader().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        mgr.close()
+
+
+def test_failed_write_does_not_roll_back_batch(tmp_path):
+    mgr = ConnectionManager(tmp_path / "m.sqlite")
+    try:
+        ok = mgr.submit(insert_evaluation, "abc", None, compute_all("abc"), 90.0, "Risky")
+        bad = mgr.submit(insert_features, 12345, {}, 1.0, "Safe")  # no such entry
+        assert ok.result() == 1
+        with pytest.raises(Exception):
+            bad.result()
+        assert len(fetch_joined(mgr.reader())) == 1
+    finally:
+        mgr.close()
+
+
+def test_data_version_changes_only_on_commits(tmp_path):
+    mgr = ConnectionManager(tmp_path / "m.sqlite")
+    try:
+        v0 = mgr.data_version()
+        mgr.reader().execute("SELECT COUNT(*) FROM password_entries").fetchone()
+        assert mgr.data_version() == v0
+
+        mgr.write(insert_evaluation, "abc", None, compute_all("abc"), 90.0, "Risky")
+        v1 = mgr.data_version()
+        assert v1 != v0
+        assert mgr.data_version() == v1
+
+        # Writes from another connection (e.g. the CLI importer) count too
+        other = sqlite3.connect(tmp_path / "m.sqlite")
+        other.execute("DELETE FROM password_entries")
+        other.commit()
+        other.close()
+        assert mgr.data_version() != v1
+    finally:
+        mgr.close()
+
+
+def test_writer_survives_external_write_lock(tmp_path):
+    mgr = ConnectionManager(tmp_path / "m.sqlite")
+    try:
+        mgr.write(lambda conn: conn.execute("PRAGMA busy_timeout = 50"))
+        other = sqlite3.connect(tmp_path / "m.sqlite", isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")  # e.g. the CLI importer mid-chunk
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            mgr.write(insert_evaluation, "abc", None, compute_all("abc"), 90.0, "Risky")
+        other.execute("ROLLBACK")
+        other.close()
+
+        assert mgr.write(insert_evaluation, "abc", None, compute_all("abc"), 90.0, "Risky") == 1
+        assert len(fetch_joined(mgr.reader())) == 1
+    finally:
+        mgr.close()
+    with pytest.raises(RuntimeError, match="stopped"):
+        mgr.submit(insert_evaluation, "late", None, compute_all("late"), 1.0, "Safe")
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from oampass.db import init_db
+from oampass.db_ops import fetch_page, insert_evaluation, page_query
+from oampass.features import compute_all
+
+
+def _db(n: int = 60) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    init_db(conn)
+    for i in range(n):
+        pw = f"Pw{i}!"
+        risk = float((i * 37) % 100)
+        label = "Risky" if risk >= 70 else "Medium" if risk >= 40 else "Safe"
+        entry_id = insert_evaluation(conn, pw, ["A", "B", None][i % 3], compute_all(pw), risk, label)
+        # Several rows share a timestamp so the id tie-breaker matters
+        conn.execute("UPDATE password_entries SET created_at = ? WHERE id = ?", (1000 + i // 4, entry_id))
+    conn.commit()
+    return conn
+
+
+def _all_pages(conn, **kw):
+    out, cursor = [], None
+    while True:
+        page = fetch_page(conn, cursor=cursor, limit=7, **kw)
+        out.extend(r["id"] for r in page.rows)
+        if page.next_cursor is None:
+            return out
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("kw", [
+    {},
+    {"tool": "A"},
+    {"order": "risk"},
+    {"order": "risk", "label": "Medium"},
+    {"risk_min": 20, "risk_max": 80, "since": 1003, "until": 1012},
+])
+def test_pages_match_single_query(kw):
+    conn = _db()
+    sql, params = page_query(limit=10_000, **kw)
+    expected = [r["id"] for r in conn.execute(sql, params)]
+    assert expected
+    got = _all_pages(conn, **kw)
+    assert got == expected
+    assert len(set(got)) == len(got)
+
+
+def test_unknown_order_rejected():
+    with pytest.raises(ValueError):
+        page_query(order="alphabetical")
+
+
+@pytest.mark.parametrize("kw, index", [
+    ({}, "idx_entries_created_at"),
+    ({"cursor": (1000, 5)}, "idx_entries_created_at"),
+    ({"since": 1, "until": 5}, "idx_entries_created_at"),
+    ({"tool": "A", "cursor": (1000, 5)}, "idx_entries_tool_created"),
+    ({"source": "user_input"}, "idx_entries_source_created"),
+    ({"order": "risk", "cursor": (50.0, 3)}, "idx_features_risk"),
+    ({"order": "risk", "risk_min": 40, "risk_max": 70}, "idx_features_risk"),
+    ({"order": "risk", "label": "Risky", "cursor": (80.0, 3)}, "idx_features_label_risk"),
+])
+def test_page_queries_use_indexes(kw, index):
+    conn = _db(0)
+    sql, params = page_query(**kw)
+    plan = " | ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,94 @@
+import random
+import sqlite3
+
+import pandas as pd
+
+from oampass.cli import main
+from oampass.db import get_conn, init_db, rebuild_stats
+from oampass.db_ops import fetch_stats, fetch_totals, insert_evaluation
+from oampass.features import compute_all
+from oampass.importer import bulk_import_dataframe
+
+
+def _snapshot(conn):
+    return sorted(
+        (d, k, n, round(s, 6), lo, hi)
+        for d, k, n, s, lo, hi in conn.execute("SELECT dim, key, n, risk_sum, risk_min, risk_max FROM risk_stats")
+    )
+
+
+def test_triggers_match_rebuild_under_random_writes():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON")
+    init_db(conn)
+    rng = random.Random(7)
+    for _ in range(1500):
+        ids = [r[0] for r in conn.execute("SELECT id FROM password_entries")]
+        op = rng.random()
+        if op < 0.5 or not ids:
+            entry_id = insert_evaluation(conn, "pw", rng.choice(["A", "B", None, ""]), compute_all("pw"),
+                                         float(rng.randint(0, 100)), rng.choice(["Risky", "Safe"]))
+            conn.execute("UPDATE password_entries SET created_at = ? WHERE id = ?", (rng.randint(0, 5 * 86400), entry_id))
+        elif op < 0.65:
+            conn.execute("DELETE FROM password_entries WHERE id = ?", (rng.choice(ids),))
+        elif op < 0.75:
+            conn.execute("DELETE FROM password_features WHERE entry_id = ?", (rng.choice(ids),))
+        elif op < 0.9:
+            conn.execute("UPDATE password_features SET RiskIndex = ?, AutoRiskLabel = ? WHERE entry_id = ?",
+                         (float(rng.randint(0, 100)), rng.choice(["Risky", "Medium"]), rng.choice(ids)))
+        else:
+            conn.execute("UPDATE password_entries SET tool = ? WHERE id = ?", (rng.choice(["A", "C", None]), rng.choice(ids)))
+        conn.commit()
+
+    maintained = _snapshot(conn)
+    rebuild_stats(conn)
+    assert maintained == _snapshot(conn)
+    assert maintained
+
+
+def test_fetch_stats_matches_groupby_after_bulk_import():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    init_db(conn)
+    df = pd.DataFrame({"Password": [f"Pass{i}!x" for i in range(300)], "Tool": [f"T{i % 4}" for i in range(300)]})
+    bulk_import_dataframe(conn, df, recompute=True, chunk_size=64)
+
+    base = pd.DataFrame([dict(r) for r in conn.execute(
+        "SELECT e.tool, f.RiskIndex, f.AutoRiskLabel FROM password_entries e JOIN password_features f ON f.entry_id = e.id"
+    )])
+    expected = base.groupby("tool")["RiskIndex"].agg(["count", "mean", "min", "max"])
+    got = pd.DataFrame([dict(r) for r in fetch_stats(conn, "tool")]).set_index("Tool").sort_index()
+    pd.testing.assert_frame_equal(got, expected.rename_axis("Tool"), check_exact=False)
+
+    totals = fetch_totals(conn)
+    assert totals["count"] == 300
+    assert totals["by_label"] == base["AutoRiskLabel"].value_counts().to_dict()
+
+
+def test_init_db_backfills_stats_for_existing_databases(tmp_path):
+    conn = get_conn(tmp_path / "old.sqlite")
+    init_db(conn)
+    insert_evaluation(conn, "abc", "X", compute_all("abc"), 90.0, "Risky")
+    conn.execute("DELETE FROM risk_stats")
+    conn.commit()
+    init_db(conn)
+    assert [tuple(r) for r in fetch_stats(conn, "tool")] == [("X", 1, 90.0, 90.0, 90.0)]
+
+
+def test_cli_stats_and_rebuild(tmp_path, capsys):
+    db = tmp_path / "cli.sqlite"
+    conn = get_conn(db)
+    init_db(conn)
+    insert_evaluation(conn, "abc", "X", compute_all("abc"), 80.0, "Risky")
+    insert_evaluation(conn, "abcd", None, compute_all("abcd"), 20.0, "Safe")
+    conn.execute("UPDATE risk_stats SET n = 99")  # simulate drift
+    conn.commit()
+
+    assert main(["rebuild-stats", "--db", str(db)]) == 0
+    out = tmp_path / "by_label.csv"
+    assert main(["stats", "--db", str(db), "--by", "label", "--out", str(out)]) == 0
+    assert out.read_text(encoding="utf-8").splitlines() == [
+        "AutoRiskLabel,count,mean,min,max",
+        "Risky,1,80.0,80.0,80.0",
+        "Safe,1,20.0,20.0,20.0",
+    ]
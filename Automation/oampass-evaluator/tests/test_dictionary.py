@@ -0,0 +1,25 @@
+from oampass.dictionary import LIST_WORD, WEAK_WORD, Automaton, load_automaton
+from oampass.features import has_dictionary_word, has_dictionary_word_reference
+
+
+def test_automaton_finds_overlapping_patterns():
+    ac = Automaton.build([("he", WEAK_WORD), ("she", LIST_WORD), ("hers", LIST_WORD)])
+    assert ac.search("ushers", LIST_WORD)
+    assert ac.search("ahe", WEAK_WORD)
+    assert not ac.search("shx", WEAK_WORD | LIST_WORD)
+
+
+def test_has_dictionary_word_matches_reference():
+    for pw in ["", "P@ssw0rd", "adm1n!", "Qwerty", "xK9#mZ", "sp3c13s", "zzstationzz", "St4t10n", "日本"]:
+        assert has_dictionary_word(pw) == has_dictionary_word_reference(pw)
+
+
+def test_automaton_cache_roundtrip(tmp_path):
+    wl = tmp_path / "words.txt"
+    wl.write_text("# comment\nstation\nab\nPower\n", encoding="utf-8")
+    first = load_automaton(wl, tmp_path / "cache")
+    assert list((tmp_path / "cache").glob("dictionary-*.pickle"))
+    second = load_automaton(wl, tmp_path / "cache")
+    assert second.goto == first.goto
+    assert second.search("xpowerx", LIST_WORD)
+    assert not second.search("xabx", LIST_WORD)
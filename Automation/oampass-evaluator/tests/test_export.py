@@ -0,0 +1,86 @@
+import csv
+import gzip
+import sqlite3
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from oampass.cli import main
+from oampass.db import get_conn, init_db
+from oampass.db_ops import fetch_page
+from oampass.export import detect_export_format, export_db
+from oampass.importer import bulk_import_dataframe
+
+
+def _db(path=":memory:", n=120):
+    conn = sqlite3.connect(path) if path == ":memory:" else get_conn(path)
+    conn.row_factory = sqlite3.Row
+    init_db(conn)
+    df = pd.DataFrame({"Password": [f"Pw{i}word!" for i in range(n)], "Tool": [f"T{i % 3}" for i in range(n)]})
+    bulk_import_dataframe(conn, df, recompute=True)
+    return conn
+
+
+def _expected(conn, **filters):
+    return [tuple(r) for r in fetch_page(conn, limit=10_000, **filters).rows]
+
+
+@pytest.mark.parametrize("name", ["out.csv", "out.csv.gz"])
+def test_csv_export_matches_query(tmp_path, name):
+    conn = _db()
+    report = export_db(conn, tmp_path / name, chunk_size=7, tool="T1")
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(tmp_path / name, "rt", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    expected = _expected(conn, tool="T1")
+    assert report.rows == len(expected) == 40
+    assert rows[0][:3] == ["id", "password_hash", "password_mask"]
+    assert rows[1:] == [[str(v) for v in r] for r in expected]
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_xlsx_export_splits_sheets(tmp_path, monkeypatch):
+    monkeypatch.setattr("oampass.export.XLSX_MAX_ROWS", 50)
+    conn = _db()
+    report = export_db(conn, tmp_path / "out.xlsx", chunk_size=16, order="risk")
+    wb = load_workbook(tmp_path / "out.xlsx", read_only=True)
+    assert wb.sheetnames == ["DB_Export", "DB_Export_2", "DB_Export_3"]
+    rows = [r for ws in wb.worksheets for r in list(ws.iter_rows(values_only=True))[1:]]
+    assert report.rows == len(rows) == 120
+    assert rows == _expected(conn, order="risk")
+
+
+def test_detect_export_format():
+    assert detect_export_format("a/b.CSV.GZ") == "csv.gz"
+    assert detect_export_format("b.xlsx") == "xlsx"
+    with pytest.raises(ValueError):
+        detect_export_format("b.json")
+
+
+def test_cli_export(tmp_path, capsys):
+    db = tmp_path / "x.sqlite"
+    _db(db, n=30).close()
+    assert main(["export", "--db", str(db), "--out", str(tmp_path / "e.csv"), "--label", "Safe"]) == 0
+    assert "Exported" in capsys.readouterr().out
+    assert (tmp_path / "e.csv").exists()
+
+
+def test_top_k_export_reads_risk_index(tmp_path, capsys):
+    from oampass.db_ops import page_query
+
+    conn = _db()
+    sql, params = page_query(order="risk", limit=10)
+    plan = " | ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert "idx_features_risk" in plan and "TEMP B-TREE" not in plan
+
+    report = export_db(conn, tmp_path / "top.csv", order="risk", limit=10, chunk_size=4)
+    with open(tmp_path / "top.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    assert report.rows == 10
+    assert rows == [[str(v) for v in r] for r in _expected(conn, order="risk")[:10]]
+
+    db = tmp_path / "x.sqlite"
+    _db(db, n=30).close()
+    assert main(["export", "--db", str(db), "--out", str(tmp_path / "t.csv"), "--top", "5"]) == 0
+    assert "Exported 5 rows" in capsys.readouterr().out
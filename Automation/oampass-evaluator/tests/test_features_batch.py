@@ -0,0 +1,34 @@
+import random
+
+from oampass.features import compute_all, compute_all_reference
+from oampass.features_batch import compute_all_batch
+
+
+def test_batch_matches_scalar_on_edge_cases():
+    pws = ["", None, "a", "abc", "RaceCar", "ra#ce$car", "aaaaaa", "Abc123!@#", "İabc", "x" * 300, "日本語123", "πρΣ", "ΣΣΣ1"]
+    df = compute_all_batch(pws)
+    assert len(df) == len(pws)
+    for i, pw in enumerate(pws):
+        assert df.iloc[i].to_dict() == compute_all_reference(pw)
+
+
+def test_batch_matches_scalar_random():
+    rng = random.Random(7)
+    alphabet = "abcxyzABCXYZ0123456789!@#$ _-éß"
+    pws = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24))) for _ in range(500)]
+    df = compute_all_batch(pws)
+    for i, pw in enumerate(pws):
+        assert df.iloc[i].to_dict() == compute_all(pw)
+
+
+def test_dedup_broadcast_matches_batch():
+    import pandas as pd
+    from oampass.features_batch import compute_all_dedup
+
+    rng = random.Random(3)
+    pool = ["123456", "password", "", "Tr0ub4dor&3", "qwerty"] + [f"u{i}!" for i in range(20)]
+    pws = pd.Series([rng.choice(pool + [None]) for _ in range(400)], index=range(1000, 1400))
+    res = compute_all_dedup(pws)
+    pd.testing.assert_frame_equal(res.features, compute_all_batch(pws))
+    assert res.rows == 400 and res.unique <= len(pool)
+    assert res.as_dict()["uniqueness_ratio"] == round(res.unique / 400, 6)
@@ -0,0 +1,16 @@
+import random
+
+from oampass.features import compute_all, compute_all_reference
+
+
+def test_fused_scan_matches_reference():
+    rng = random.Random(11)
+    alphabet = "abcxyzABCXYZ0123456789!@#$ _-éßİ日πρΣ"
+    pws = ["", "a", "abc", "cba", "987", "RaceCar", "aaaaaa", "abcabc", "P@ssw0rd", "İabc", "πρΣ", "ΣΣΣ1", "ςρΣπ"]
+    pws += ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24))) for _ in range(500)]
+    for pw in pws:
+        assert compute_all(pw) == compute_all_reference(pw)
+
+
+def test_compute_all_key_order_unchanged():
+    assert list(compute_all("Abc123!")) == list(compute_all_reference("Abc123!"))
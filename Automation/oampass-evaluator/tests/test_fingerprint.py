@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from oampass.db import get_conn, init_db
+from oampass.db_ops import fetch_joined, insert_entry
+from oampass.fingerprint import FINGERPRINT_ENV, fingerprint, fingerprints, load_key
+from oampass import importer
+from oampass.importer import bulk_import_dataframe, store_evaluation
+
+KEY = b"unit-test-key"
+
+
+def _conn(tmp_path):
+    conn = get_conn(tmp_path / "fp.sqlite")
+    init_db(conn)
+    return conn
+
+
+def _occurrences(conn):
+    return {(r["password_mask"], r["tool"]): r["occurrences"] for r in fetch_joined(conn, limit=10_000)}
+
+
+def test_key_file_created_once_and_env_override(tmp_path, monkeypatch):
+    monkeypatch.delenv(FINGERPRINT_ENV, raising=False)
+    path = tmp_path / "k" / "fingerprint.key"
+    assert load_key(path, create=False) is None
+    key = load_key(path)
+    assert len(key) == 32 and load_key(path) == key
+    monkeypatch.setenv(FINGERPRINT_ENV, "from-env")
+    assert load_key(path) == b"from-env"
+    assert fingerprints(["a", "b"], key) == [fingerprint("a", key), fingerprint("b", key)]
+    assert fingerprint("a", key) != fingerprint("a", b"other")
+
+
+def test_key_file_creation_is_atomic_and_short_keys_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.delenv(FINGERPRINT_ENV, raising=False)
+    path = tmp_path / "fingerprint.key"
+    with ThreadPoolExecutor(16) as ex:
+        keys = set(ex.map(lambda _: load_key(path), range(64)))
+    assert len(keys) == 1 and len(keys.pop()) == 32
+    assert [p.name for p in tmp_path.iterdir()] == ["fingerprint.key"]  # no temp files left
+
+    path.write_bytes(b"")
+    with pytest.raises(ValueError, match="0 bytes"):
+        load_key(path)
+    path.write_bytes(b"x" * 31)
+    with pytest.raises(ValueError, match="at least 32"):
+        load_key(path, create=False)
+
+
+def test_import_dedupes_and_counts_occurrences(tmp_path):
+    conn = _conn(tmp_path)
+    pws = ["123456", "password", "123456", "", "123456", "Tr0ub4dor&3", "password"]
+    tools = ["A", "A", "A", "A", "B", "A", "A"]
+    df = pd.DataFrame({"Password": pws, "Tool": tools})
+
+    first = bulk_import_dataframe(conn, df, recompute=True, chunk_size=3, fingerprint_key=KEY)
+    assert first.rows == 6
+    # Rows 2 and 6 fold into earlier rows; ("123456", "B") copies the stored features
+    assert (first.deduplicated, first.reused) == (2, 1)
+    assert _occurrences(conn) == {("1***56", "A"): 2, ("p*****rd", "A"): 2, ("1***56", "B"): 1, ("T********&3", "A"): 1}
+
+    second = bulk_import_dataframe(conn, df, recompute=True, fingerprint_key=KEY)
+    assert second.deduplicated == 6 and second.reused == 0
+    assert _occurrences(conn) == {("1***56", "A"): 4, ("p*****rd", "A"): 4, ("1***56", "B"): 2, ("T********&3", "A"): 2}
+
+    # Copied features are identical to the computed ones
+    rows = [dict(r) for r in fetch_joined(conn) if r["password_mask"] == "1***56"]
+    strip = lambda r: {k: v for k, v in r.items() if k not in ("id", "password_hash", "tool", "occurrences")}
+    assert strip(rows[0]) == strip(rows[1])
+
+
+def test_without_key_every_row_is_stored(tmp_path):
+    conn = _conn(tmp_path)
+    report = bulk_import_dataframe(conn, pd.DataFrame({"Password": ["x1", "x1"]}), recompute=True)
+    assert (report.rows, report.deduplicated) == (2, 0)
+    assert len(fetch_joined(conn)) == 2
+
+
+def test_unique_index_on_password_and_tool(tmp_path):
+    conn = _conn(tmp_path)
+    fp = fingerprint("abc", KEY)
+    insert_entry(conn, "abc", None, fingerprint=fp)
+    insert_entry(conn, "abc", "T", fingerprint=fp)
+    with pytest.raises(sqlite3.IntegrityError):
+        insert_entry(conn, "abc", None, fingerprint=fp)
+    plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN SELECT id FROM password_entries WHERE fingerprint = ?", (fp,)))
+    assert "idx_entries_fingerprint_tool" in plan
+
+
+def test_store_evaluation_reuses(tmp_path):
+    conn = _conn(tmp_path)
+    a = store_evaluation(conn, "hunter2", "T", fingerprint_key=KEY)
+    b = store_evaluation(conn, "hunter2", "T", fingerprint_key=KEY)
+    c = store_evaluation(conn, "hunter2", None, fingerprint_key=KEY)
+    assert not a.reused and b.reused and c.reused
+    assert b.entry_id == a.entry_id and b.occurrences == 2
+    assert c.entry_id != a.entry_id and (c.risk_index, c.auto_label) == (a.risk_index, a.auto_label)
+
+
+def test_store_evaluation_holds_write_lock_from_lookup_to_insert(tmp_path, monkeypatch):
+    conn = _conn(tmp_path)  # plain connection, no ConnectionManager
+    store_evaluation(conn, "hunter2", "A", fingerprint_key=KEY)
+    other = get_conn(tmp_path / "fp.sqlite")
+    other.execute("PRAGMA busy_timeout = 0")
+    raced = []
+    real_find = importer.find_evaluation
+
+    def find_then_race(c, fp, tool):
+        row = real_find(c, fp, tool)
+        if c is conn and not raced:
+            # Another writer tries to store the same new (password, tool) pair in between
+            try:
+                raced.append(store_evaluation(other, "hunter2", "B", fingerprint_key=KEY))
+            except sqlite3.OperationalError as e:
+                raced.append(e)
+        return row
+
+    monkeypatch.setattr(importer, "find_evaluation", find_then_race)
+    ev = store_evaluation(conn, "hunter2", "B", fingerprint_key=KEY)
+    assert isinstance(raced[0], sqlite3.OperationalError) and "locked" in str(raced[0])
+    assert ev.reused and _occurrences(conn) == {("h****r2", "A"): 1, ("h****r2", "B"): 1}
+
+
+def test_migration_adds_columns_to_old_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.sqlite")
+    conn.executescript("""
+        CREATE TABLE password_entries (id INTEGER PRIMARY KEY AUTOINCREMENT, password_hash TEXT NOT NULL,
+          salt TEXT NOT NULL, password_mask TEXT, tool TEXT, source TEXT NOT NULL DEFAULT 'user_input',
+          created_at INTEGER NOT NULL);
+        INSERT INTO password_entries(password_hash, salt, created_at) VALUES ('h', 's', 0);
+    """)
+    init_db(conn)
+    assert conn.execute("SELECT fingerprint, occurrences FROM password_entries").fetchall() == [(None, 1)]
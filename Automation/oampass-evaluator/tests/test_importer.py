@@ -0,0 +1,87 @@
+from pathlib import Path
+import tempfile
+
+import pandas as pd
+
+from oampass.db import get_conn, init_db
+from oampass.db_ops import fetch_joined, insert_entry
+from oampass.features import compute_all
+from oampass.importer import bulk_import_dataframe, import_from_dataframe
+from oampass.scoring import compute_risk_index, risk_label
+
+
+def test_bulk_import_chunks_and_matches_scalar_scoring():
+    pws = ["password1", "Abc123!@#", "", "zz", "Tr0ub4dor&3", "qwerty"]
+    df = pd.DataFrame({"Password": pws, "Tool": ["Manual", None, "x", "Chrome", "Manual", "Chrome"]})
+    with tempfile.TemporaryDirectory() as td:
+        conn = get_conn(Path(td) / "t.sqlite")
+        init_db(conn)
+        report = bulk_import_dataframe(conn, df, source="unit_test", chunk_size=4)
+        assert report.rows == 5
+        assert report.chunks == 2
+        assert report.as_dict()["rows_per_s"] > 0
+
+        rows = {r["password_mask"]: dict(r) for r in fetch_joined(conn, limit=100)}
+        assert len(rows) == 5
+        ids = sorted(r["id"] for r in rows.values())
+        assert ids == list(range(1, 6))
+        # Single-row helpers keep working after explicit-id bulk inserts
+        assert insert_entry(conn, "x", None) == 6
+
+        for pw in filter(None, pws):
+            feats = compute_all(pw)
+            rix = compute_risk_index(feats)
+            matches = [r for r in rows.values() if r["Length"] == len(pw) and r["RiskIndex"] == rix]
+            assert matches and all(m["AutoRiskLabel"] == risk_label(rix) for m in matches)
+
+
+def test_import_keeps_given_riskindex():
+    df = pd.DataFrame({"Password": ["abc", "def"], "RiskIndex": [12.5, None]})
+    with tempfile.TemporaryDirectory() as td:
+        conn = get_conn(Path(td) / "t.sqlite")
+        init_db(conn)
+        assert import_from_dataframe(conn, df) == 2
+        got = sorted(r["RiskIndex"] for r in fetch_joined(conn))
+        assert got == sorted([12.5, compute_risk_index(compute_all("def"))])
+
+
+def test_import_inside_caller_transaction_leaves_commit_to_caller():
+    df = pd.DataFrame({"Password": ["abc", "def", "ghi"], "Tool": "T"})
+    with tempfile.TemporaryDirectory() as td:
+        conn = get_conn(Path(td) / "t.sqlite")
+        init_db(conn)
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("CREATE TABLE caller_work (x INTEGER)")
+        bulk_import_dataframe(conn, df, chunk_size=2)
+        assert conn.in_transaction
+        assert len(fetch_joined(conn)) == 3
+        conn.rollback()
+        assert fetch_joined(conn) == []
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'caller_work'").fetchone()[0] == 0
+
+
+def test_stream_import_excel():
+    from oampass.importer import stream_import_excel
+
+    p = Path(__file__).resolve().parents[1] / "data" / "OAMpass_sample.xlsx"
+    with tempfile.TemporaryDirectory() as td:
+        conn = get_conn(Path(td) / "t.sqlite")
+        init_db(conn)
+        report = stream_import_excel(conn, p, chunk_size=25)
+        assert report.rows > 0
+        assert report.chunks >= 2
+        assert report.stage_seconds["read"] > 0
+        assert len(fetch_joined(conn, limit=10_000)) == report.rows
+
+
+def test_import_reports_uniqueness_and_matches_scalar():
+    pws = ["123456", "password", "123456", "123456", "Abc!9"] * 10
+    with tempfile.TemporaryDirectory() as td:
+        conn = get_conn(Path(td) / "t.sqlite")
+        init_db(conn)
+        report = bulk_import_dataframe(conn, pd.DataFrame({"Password": pws}), recompute=True, chunk_size=20)
+        assert report.as_dict()["uniqueness_ratio"] == round(9 / 50, 6)
+        for r in fetch_joined(conn, limit=100):
+            pw = {"1***56": "123456", "p*****rd": "password", "A**!9": "Abc!9"}[r["password_mask"]]
+            assert r["RiskIndex"] == compute_risk_index(compute_all(pw))
@@ -0,0 +1,53 @@
+import json
+
+import pandas as pd
+
+from oampass.cli import main
+from oampass.features_batch import compute_all_batch, feature_timings
+from oampass.instrument import NULL_TIMER, Profiler, StageTimer
+
+
+def test_stage_timer_accumulates_and_iter_charges_production():
+    timer = StageTimer()
+    for _ in range(3):
+        with timer.stage("a"):
+            sum(range(1000))
+    assert list(timer.iter(iter([1, 2]), "b")) == [1, 2]
+    stages = timer.as_dict()
+    assert stages["a"]["calls"] == 3
+    assert stages["b"]["calls"] == 3  # two items + the exhausting next()
+    assert stages["a"]["wall_s"] >= 0 and "cpu_s" in stages["a"]
+    assert list(NULL_TIMER.iter([1], "x")) == [1] and NULL_TIMER.as_dict() == {}
+
+
+def test_profiler_trace_malloc_adds_heap_peaks():
+    timer = StageTimer()
+    with Profiler(trace_malloc=True) as prof:
+        with timer.stage("alloc"):
+            kept = [bytes(1000) for _ in range(1000)]
+    assert len(kept) == 1000
+    assert timer.as_dict()["alloc"]["py_heap_peak_mb"] > 0.5
+    assert prof.summary["trace_malloc"]["top_lines"]
+
+
+def test_feature_timings_only_inside_context():
+    pws = pd.Series(["password", "Abc123!", "zzz"])
+    compute_all_batch(pws)
+    with feature_timings() as ft:
+        compute_all_batch(pws)
+    assert {"classify", "HasDictionaryWord", "IsPalindrome"} <= set(ft)
+    n = dict(ft)
+    compute_all_batch(pws)
+    assert ft == n
+
+
+def test_cli_run_log_has_instrumentation(tmp_path):
+    src = tmp_path / "pw.txt"
+    src.write_text("\n".join(f"pw{i}!" for i in range(50)), encoding="utf-8")
+    out = tmp_path / "out"
+    assert main(["--input", str(src), "--outdir", str(out), "--chunk-size", "20", "--profile"]) == 0
+    log = json.loads((out / "run_log.json").read_text(encoding="utf-8"))["instrumentation"]
+    assert log["stages"]["score"]["calls"] == 3
+    assert {"read", "summarize", "sort_spill", "merge_write", "write_csv"} <= set(log["stages"])
+    assert log["feature_timings_s"]
+    assert (out / "profile.pstats").exists() and log["profile"]["top_cumulative"]
@@ -7,3 +7,52 @@ def test_load_oampass_excel_smoke():
     assert lr.df.shape[0] > 0
     assert "RiskIndex" in lr.df.columns
     assert lr.df["RiskIndex"].between(0, 100).all()
+
+def test_iter_oampass_excel_chunks_matches_loader():
+    from oampass.io import iter_oampass_excel_chunks
+    import pandas as pd
+
+    p = Path(__file__).resolve().parents[1] / "data" / "OAMpass_sample.xlsx"
+    chunks = list(iter_oampass_excel_chunks(p, chunk_size=16))
+    assert len(chunks) > 1
+    assert all(len(c) <= 16 for c in chunks)
+    streamed = pd.concat(chunks, ignore_index=True)
+    full = load_oampass_excel(p, recompute_missing=True, recompute_riskindex=True).df
+    assert streamed["Password"].tolist() == full["Password"].tolist()
+    assert list(streamed.columns) == [c for c in full.columns if c in streamed.columns]
+
+def test_loaded_table_uses_compact_dtypes():
+    import warnings
+    import pandas as pd
+    from oampass.analysis import summarize
+
+    p = Path(__file__).resolve().parents[1] / "data" / "OAMpass_sample.xlsx"
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", pd.errors.SettingWithCopyWarning)
+        warnings.simplefilter("error", FutureWarning)  # e.g. to_numeric(errors="ignore"), gone in pandas 3
+        df = load_oampass_excel(p, recompute_missing=True, recompute_riskindex=True).df
+        s = summarize(df)
+    assert df["HasUpper"].dtype == "int8"
+    assert df["Length"].dtype.itemsize <= 2
+    assert isinstance(df["Tool"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Label"].dtype, pd.CategoricalDtype)
+    # Only categories that occur get a summary row
+    assert set(s.by_tool["Tool"]) == set(df["Tool"].dropna())
+
+def test_apply_table_dtypes_keeps_text_and_gaps():
+    import pandas as pd
+    from oampass.io import apply_table_dtypes
+
+    df = pd.DataFrame({"HasUpper": [1, None, 0], "Length": [8, 300, 12], "CountDigit": ["1", "n/a", "2"]})
+    apply_table_dtypes(df)
+    assert str(df["HasUpper"].dtype) == "Int8" and df["HasUpper"].isna().sum() == 1
+    assert df["Length"].dtype == "int16"
+    assert df["CountDigit"].tolist() == ["1", "n/a", "2"]
+
+def test_normalize_boolish_maps_bools_and_keeps_other_values():
+    import pandas as pd
+    from oampass.io import _normalize_boolish
+
+    s = _normalize_boolish(pd.Series([True, "FALSE", 5, 12.5, None], dtype=object))
+    assert s.dtype == "float64" and s.tolist()[:4] == [1, 0, 5, 12.5] and pd.isna(s.iloc[4])
+    assert _normalize_boolish(pd.Series(["True", "n/a", None], dtype=object)).tolist() == [1, "n/a", None]
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from oampass.features_batch import compute_all_batch
+from oampass.parallel import WorkerStats, compute_all_parallel, map_chunks_parallel
+from oampass.wordlists import score_chunk
+
+
+def test_compute_all_parallel_matches_serial_in_order():
+    pws = pd.Series([f"Pw{i}!{'a' * (i % 7)}" for i in range(300)], index=range(1000, 1300))
+    stats = WorkerStats()
+    got = compute_all_parallel(pws, 2, chunk_size=64, stats=stats)
+    pd.testing.assert_frame_equal(got, compute_all_batch(pws))
+    summary = stats.as_dict()
+    assert sum(w["rows"] for w in summary["per_worker"]) == 300
+    assert sum(w["tasks"] for w in summary["per_worker"]) == 5
+
+
+def test_map_chunks_parallel_keeps_order():
+    chunks = [pd.DataFrame({"Password": [f"x{i}{j}" for j in range(5)], "Label": "", "Tool": "T"}) for i in range(6)]
+    out = list(map_chunks_parallel(score_chunk, iter(chunks), 2))
+    assert [o["Password"].tolist() for o in out] == [c["Password"].tolist() for c in chunks]
@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from oampass.features import compute_all
+from oampass.quickscore import score_password
+from oampass.scoring import compute_risk_index
+
+ROOT = Path(__file__).resolve().parents[1]
+_HEAVY = ("pandas", "numpy", "openpyxl")
+
+
+def test_score_password_matches_library():
+    r = score_password("Tr0ub4dor&3")
+    assert r["RiskIndex"] == compute_risk_index(compute_all("Tr0ub4dor&3"))
+    assert r["AutoRiskLabel"] in {"Safe", "Medium", "Risky"}
+
+
+def test_score_stdin_batch_without_heavy_imports():
+    # Last output line lists the heavy modules that ended up imported
+    probe = (
+        "import json, sys\n"
+        "from oampass.__main__ import main\n"
+        "main(['score', '-', '--json'])\n"
+        f"print(json.dumps(sorted(m for m in {_HEAVY!r} if m in sys.modules)))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, input="hunter2\n\n  spaced \t\r\n", capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    rows = [json.loads(line) for line in out[:-1]]
+    assert [r["Length"] for r in rows] == [7, 6]  # blank line skipped, same strip rule as wordlists
+    assert rows[0]["RiskIndex"] == score_password("hunter2")["RiskIndex"]
+    assert json.loads(out[-1]) == []
+
+
+def test_fail_above_exit_status():
+    cmd = [sys.executable, "-m", "oampass", "score", "--fail-above", "70", "password"]
+    assert subprocess.run(cmd, cwd=ROOT, capture_output=True).returncode == 1
+    cmd[-1] = "k#8Vq!2zL@x9Wm"
+    assert subprocess.run(cmd, cwd=ROOT, capture_output=True).returncode == 0
@@ -0,0 +1,112 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from oampass.cli import main
+from oampass.db import get_conn, init_db, rebuild_stats
+from oampass.db_ops import insert_evaluation
+from oampass.features import compute_all
+from oampass.importer import bulk_import_dataframe
+from oampass.rescore import count_stale, rescore
+from oampass.scoring import EXTERNAL_MODEL_VERSION, compute_risk_index_batch, risk_label_batch, scoring_model_version
+
+WEIGHTS = {"missing_symbol": 25, "length_credit_per_char": 2.2, "base": 80.3}
+THRESHOLDS = {"risky": 65.0}
+
+
+def _db(path=":memory:", n=400):
+    conn = sqlite3.connect(path) if path == ":memory:" else get_conn(path)
+    conn.row_factory = sqlite3.Row
+    init_db(conn)
+    rng = np.random.default_rng(0)
+    pws = ["".join(rng.choice(list("abcXYZ123!@password"), rng.integers(1, 20))) for _ in range(n)]
+    df = pd.DataFrame({"Password": pws, "Tool": [["A", "B", None][i % 3] for i in range(n)]})
+    bulk_import_dataframe(conn, df, recompute=True)
+    return conn
+
+
+def _stats(conn):
+    return [tuple(r) for r in conn.execute("SELECT * FROM risk_stats ORDER BY dim, key")]
+
+
+def test_rescore_matches_python_model_and_skips_current_rows():
+    conn = _db()
+    insert_evaluation(conn, "unversioned1", "A", compute_all("unversioned1"), 1.0, "Safe")
+    assert count_stale(conn) == {"rescore": 0, "relabel": 0, "unknown": 0}
+    assert count_stale(conn, include_unknown=True)["unknown"] == 1
+    assert count_stale(conn, weights=WEIGHTS, thresholds=THRESHOLDS)["rescore"] == 400
+
+    report = rescore(conn, weights=WEIGHTS, thresholds=THRESHOLDS, chunk_rows=64, include_unknown=True)
+    assert (report.rescored, report.scanned) == (401, 401)
+    df = pd.read_sql("SELECT * FROM password_joined ORDER BY id", conn)
+    expected = compute_risk_index_batch(df, weights=WEIGHTS)
+    assert np.array_equal(df["RiskIndex"].to_numpy(), expected)
+    assert (df["AutoRiskLabel"].to_numpy() == risk_label_batch(expected, THRESHOLDS)).all()
+    versions = {r[0] for r in conn.execute("SELECT DISTINCT model_version FROM password_features")}
+    assert versions == {scoring_model_version(WEIGHTS, THRESHOLDS)}
+
+    # Aggregates match a full rebuild and the stats trigger is back in place
+    stats = _stats(conn)
+    rebuild_stats(conn)
+    assert stats == _stats(conn)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'trg_stats_features_update'").fetchone()[0] == 1
+
+    again = rescore(conn, weights=WEIGHTS, thresholds=THRESHOLDS)
+    assert (again.rescored, again.relabeled, again.stats_seconds) == (0, 0, 0.0)
+
+
+def test_rescore_keeps_external_scores_and_relabels_them():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    init_db(conn)
+    df = pd.DataFrame({"Password": ["abc", "Tr0ub4dor&3", "zzz"], "Tool": "X", "RiskIndex": [66.0, 10.0, None]})
+    bulk_import_dataframe(conn, df)
+    rows = conn.execute("SELECT RiskIndex, model_version FROM password_features ORDER BY entry_id").fetchall()
+    assert [r[1] for r in rows[:2]] == [EXTERNAL_MODEL_VERSION] * 2
+    assert rows[2][1] == scoring_model_version()
+
+    report = rescore(conn, thresholds=THRESHOLDS)
+    assert (report.rescored, report.relabeled) == (1, 1)
+    got = conn.execute("SELECT RiskIndex, AutoRiskLabel FROM password_features ORDER BY entry_id").fetchall()
+    assert [tuple(r) for r in got[:2]] == [(66.0, "Risky"), (10.0, "Safe")]
+
+    report = rescore(conn, include_external=True)
+    assert report.rescored == 3
+    assert conn.execute("SELECT COUNT(*) FROM password_features WHERE model_version = ?", (EXTERNAL_MODEL_VERSION,)).fetchone()[0] == 0
+
+
+def test_unversioned_rows_are_only_relabeled_by_default():
+    conn = _db(n=20)
+    conn.execute("UPDATE password_features SET model_version = NULL, RiskIndex = 70.0, AutoRiskLabel = 'Safe' WHERE entry_id <= 5")
+    conn.execute("UPDATE password_features SET model_version = 'old' WHERE entry_id > 15")
+    conn.commit()
+    assert count_stale(conn) == {"rescore": 5, "relabel": 0, "unknown": 5}
+
+    report = rescore(conn, thresholds=THRESHOLDS)  # new thresholds: all 15 versioned rows are stale
+    assert (report.rescored, report.relabeled) == (15, 5)
+    got = conn.execute("SELECT RiskIndex, AutoRiskLabel, model_version FROM password_features WHERE entry_id <= 5").fetchall()
+    assert {tuple(r) for r in got} == {(70.0, "Risky", None)}
+    assert count_stale(conn, thresholds=THRESHOLDS)["unknown"] == 0
+
+    report = rescore(conn, thresholds=THRESHOLDS, include_unknown=True)
+    assert report.rescored == 5
+    assert conn.execute("SELECT COUNT(*) FROM password_features WHERE model_version IS NULL").fetchone()[0] == 0
+
+
+def test_cli_rescore(tmp_path, capsys):
+    db = tmp_path / "x.sqlite"
+    conn = _db(db, n=50)
+    conn.execute("UPDATE password_features SET model_version = NULL WHERE entry_id <= 10")
+    conn.execute("UPDATE password_features SET model_version = 'old' WHERE entry_id > 40")
+    conn.commit()
+    conn.close()
+    assert main(["rescore", "--db", str(db), "--dry-run"]) == 0
+    assert "10 rows to rescore, 0 imported rows to relabel, 0 unversioned rows to relabel" in capsys.readouterr().out
+    assert main(["rescore", "--db", str(db), "--dry-run", "--include-unknown"]) == 0
+    assert "10 unversioned rows to rescore" in capsys.readouterr().out
+    assert main(["rescore", "--db", str(db), "--chunk-size", "7"]) == 0
+    out = capsys.readouterr().out
+    assert "rescored 10" in out and "rows/s" in out
+    assert main(["rescore", "--db", str(db), "--include-unknown"]) == 0
+    assert "rescored 10" in capsys.readouterr().out
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from oampass.features import compute_all
+from oampass.scoring import compute_risk_index, compute_risk_index_batch, risk_label, risk_label_batch
+
+
+def test_risk_index_batch_matches_scalar_bitwise():
+    pws = ["", "a", "password", "Abc123!@#", "Tr0ub4dor&3", "correct horse battery staple", "1111aaaa"]
+    df = pd.DataFrame([compute_all(p) for p in pws])
+    df.loc[1, "Length"] = np.nan
+    weights = {"base": 61.7, "length_credit_per_char": 1.3}
+    for w in (None, weights):
+        got = compute_risk_index_batch(df, w)
+        want = [compute_risk_index(r, w) for r in df.to_dict("records")]
+        assert got.tolist() == want
+
+
+def test_risk_label_batch_matches_scalar():
+    xs = [0.0, 39.99, 40.0, 69.9, 70.0, 100.0]
+    assert risk_label_batch(xs).tolist() == [risk_label(x) for x in xs]
+    t = {"risky": 50.0}
+    assert risk_label_batch(xs, t).tolist() == [risk_label(x, t) for x in xs]
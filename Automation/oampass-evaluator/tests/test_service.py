@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+from oampass.quickscore import score_password
+from oampass.service import ScoringService, ServiceConfig, http_request, score_batch
+
+
+def test_score_batch_paths_agree():
+    pws = [f"Passw0rd{i}!" for i in range(300)] + ["", "aaa", "ünïcödé"]
+    assert score_batch(pws) == [score_password(p) for p in pws]
+    assert score_batch(pws[:3]) == [score_password(p) for p in pws[:3]]
+
+
+async def _with_service(cfg, score_fn, scenario):
+    svc = ScoringService(cfg, score_fn=score_fn)
+    server = await svc.start()
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await scenario(lambda: asyncio.open_connection("127.0.0.1", port), svc)
+    finally:
+        await svc.close()
+
+
+def test_concurrent_requests_are_batched():
+    sizes = []
+
+    def fn(pws):
+        sizes.append(len(pws))
+        return score_batch(pws)
+
+    async def scenario(connect, svc):
+        conns = [await connect() for _ in range(20)]
+        pws = [f"pw{i}" for i in range(20)]
+        replies = await asyncio.gather(*(http_request(r, w, "POST", "/score", {"password": p}) for (r, w), p in zip(conns, pws)))
+        status, batch = await http_request(*conns[0], "POST", "/score/batch", {"passwords": pws[:3], "features": True})
+        bad = await http_request(*conns[1], "POST", "/score", {"password": 5})
+        _, metrics = await http_request(*conns[2], "GET", "/metrics")
+        for _, w in conns:
+            w.close()
+        return pws, replies, (status, batch), bad, metrics
+
+    cfg = ServiceConfig(port=0, max_wait_ms=50)
+    pws, replies, (status, batch), bad, metrics = asyncio.run(_with_service(cfg, fn, scenario))
+    assert [r for _, r in replies] == [
+        {"RiskIndex": score_password(p)["RiskIndex"], "AutoRiskLabel": score_password(p)["AutoRiskLabel"]} for p in pws
+    ]
+    assert len(sizes) < 20  # coalesced
+    assert status == 200 and batch["results"] == [score_password(p) for p in pws[:3]]
+    assert bad[0] == 400
+    assert metrics["passwords_scored"] == 23 and metrics["responses"]["400"] == 1
+
+
+def test_backpressure_returns_503():
+    release = threading.Event()
+
+    def slow(pws):
+        release.wait(5)
+        return score_batch(pws)
+
+    async def scenario(connect, svc):
+        (r1, w1), (r2, w2) = await connect(), await connect()
+        first = asyncio.ensure_future(http_request(r1, w1, "POST", "/score/batch", {"passwords": ["a", "b"]}))
+        while svc.batcher.pending == 0:
+            await asyncio.sleep(0.01)
+        rejected = await http_request(r2, w2, "POST", "/score", {"password": "c"})
+        release.set()
+        accepted = await first
+        w1.close()
+        w2.close()
+        return rejected, accepted
+
+    cfg = ServiceConfig(port=0, max_pending=2, max_wait_ms=0)
+    rejected, accepted = asyncio.run(_with_service(cfg, slow, scenario))
+    assert rejected[0] == 503 and "overloaded" in rejected[1]["error"]
+    assert accepted[0] == 200 and len(accepted[1]["results"]) == 2
+
+
+def test_scoring_error_returns_500_to_every_request():
+    def broken(pws):
+        raise RuntimeError("model crashed")
+
+    async def scenario(connect, svc):
+        conns = [await connect() for _ in range(3)]
+        replies = await asyncio.gather(*(http_request(r, w, "POST", "/score", {"password": "pw"}) for r, w in conns))
+        health = await http_request(*conns[0], "GET", "/metrics")  # connection still usable
+        for _, w in conns:
+            w.close()
+        return replies, health
+
+    replies, health = asyncio.run(_with_service(ServiceConfig(port=0, max_wait_ms=20), broken, scenario))
+    assert all(status == 500 and "RuntimeError" in body["error"] for status, body in replies)
+    assert health[0] == 200 and health[1]["responses"]["500"] == 3
+
+
+def test_invalid_content_length_returns_400():
+    async def scenario(connect, svc):
+        reader, writer = await connect()
+        writer.write(b"POST /score HTTP/1.1\r\nHost: oampass\r\nContent-Length: abc\r\n\r\n")
+        raw = await reader.read()  # the server closes the connection afterwards
+        writer.close()
+        return raw
+
+    raw = asyncio.run(_with_service(ServiceConfig(port=0), score_batch, scenario))
+    assert raw.startswith(b"HTTP/1.1 400 Bad Request") and b"invalid Content-Length" in raw
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from oampass.analysis import StreamingSummary, save_summary_sketch, summarize
+from oampass.cli import main
+from oampass.sketch import RiskSketch
+
+QS = [0.0, 0.1, 0.5, 0.9, 0.99, 1.0]
+
+
+def test_exact_sketch_matches_pandas_quantiles():
+    values = np.random.default_rng(0).integers(0, 101, 5000).astype(float)
+    sk = RiskSketch("exact")
+    for part in np.array_split(values, 7):
+        sk.update(part)
+    assert sk.quantiles(QS) == pytest.approx(pd.Series(values).quantile(QS).tolist())
+
+
+def test_histogram_within_one_bin_of_exact():
+    values = np.random.default_rng(1).beta(2, 5, 20000) * 100
+    sk = RiskSketch("histogram")
+    sk.update(values)
+    expected = pd.Series(values).quantile(QS).to_numpy()
+    assert not sk.exact
+    assert np.abs(np.array(sk.quantiles(QS)) - expected).max() <= sk.bin_width
+    assert (sk.min, sk.max, sk.count) == (values.min(), values.max(), values.size)
+
+
+def test_auto_folds_into_histogram_and_merges_in_any_order():
+    rng = np.random.default_rng(2)
+    shards = [rng.uniform(0, 100, 300) for _ in range(4)]
+    dumps = []
+    for shard in shards:
+        sk = RiskSketch("auto", max_distinct=500)
+        sk.update(shard)
+        assert sk.exact
+        dumps.append(sk.to_dict())
+
+    def combine(order):
+        out = RiskSketch.from_dict(dumps[order[0]])
+        for i in order[1:]:
+            out.merge(RiskSketch.from_dict(dumps[i]))
+        return out
+
+    a, b = combine([0, 1, 2, 3]), combine([3, 2, 1, 0])
+    assert not a.exact and not b.exact
+    assert a.quantiles(QS) == b.quantiles(QS)
+    whole = np.concatenate(shards)
+    assert np.abs(np.array(a.quantiles(QS)) - pd.Series(whole).quantile(QS).to_numpy()).max() <= a.bin_width
+
+
+def test_streaming_summary_shards_match_summarize(tmp_path):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "Password": [f"pw{i}" for i in range(600)],
+        "RiskIndex": rng.integers(0, 101, 600).astype(float),
+        "Tool": rng.choice(["Chrome", "Manual", "1Password"], 600),
+        "Label": rng.choice(["safe", "risky", ""], 600),
+    })
+    for i, shard in enumerate(np.array_split(np.arange(len(df)), 3)):
+        out = tmp_path / f"shard{i}"
+        out.mkdir()
+        s = StreamingSummary()
+        s.update(df.iloc[shard])
+        save_summary_sketch(s, out / "summary_sketch.json")
+
+    assert main(["merge-summaries", *(str(tmp_path / f"shard{i}") for i in range(3)),
+                 "--outdir", str(tmp_path / "merged"), "--percentiles", "90"]) == 0
+    merged = pd.read_csv(tmp_path / "merged" / "summary_by_tool.csv").set_index("Tool").sort_index()
+    expected = summarize(df, [0.9]).by_tool.set_index("Tool").sort_index()
+    pd.testing.assert_frame_equal(merged, expected, check_dtype=False)
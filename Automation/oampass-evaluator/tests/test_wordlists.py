@@ -0,0 +1,96 @@
+import gzip
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from oampass.analysis import export_streamed_artifacts, summarize
+from oampass.quickscore import iter_stdin_passwords
+from oampass.wordlists import detect_format, iter_csv_chunks, iter_scored_chunks, iter_text_chunks, score_chunk
+
+
+def test_detect_format():
+    assert detect_format("dump.txt") == "text"
+    assert detect_format("dump.txt.gz") == "text"
+    assert detect_format("dump.csv.gz") == "csv"
+    assert detect_format("OAMpass.xlsx") == "xlsx"
+
+
+def test_text_and_gzip_csv_readers(tmp_path):
+    (tmp_path / "a.txt").write_text("alpha\n\n  beta \t\r\n \ngamma\n", encoding="utf-8")
+    chunks = list(iter_text_chunks(tmp_path / "a.txt", chunk_size=2))
+    assert [c["Password"].tolist() for c in chunks] == [["alpha", "beta"], ["gamma"]]
+    with (tmp_path / "a.txt").open(encoding="utf-8", newline="") as f:
+        assert list(iter_stdin_passwords(f)) == ["alpha", "beta", "gamma"]  # `oampass score -` reads the same
+
+    with gzip.open(tmp_path / "b.csv.gz", "wt", encoding="utf-8") as f:
+        f.write("id,pw,Tool\n1,secret1,Chrome\n2,,Manual\n3,hunter2,Manual\n")
+    chunks = list(iter_csv_chunks(tmp_path / "b.csv.gz", password_column="pw"))
+    df = pd.concat(chunks)
+    assert df["Password"].tolist() == ["secret1", "hunter2"]
+    assert df["Tool"].tolist() == ["Chrome", "Manual"]
+
+
+def test_streamed_artifacts_match_in_memory_summary(tmp_path):
+    pws = ["password", "Abc123!", "zzz", "Tr0ub4dor&3", "qwerty", "aaa", "Abc123!", "x"]
+    (tmp_path / "in.txt").write_text("\n".join(pws), encoding="utf-8")
+    paths = export_streamed_artifacts(
+        iter_scored_chunks(iter_text_chunks(tmp_path / "in.txt", chunk_size=3)), tmp_path / "out", {}
+    )
+    full = score_chunk(pd.DataFrame({"Password": pws, "Label": "", "Tool": ""}))
+    s = summarize(full)
+    s.ranked.to_csv(tmp_path / "ref.csv", index=False)
+    assert (tmp_path / "ref.csv").read_text() == open(paths["ranked_csv"]).read()
+    by_tool = pd.read_csv(paths["summary_by_tool_csv"])
+    assert by_tool["count"].tolist() == [len(pws)]
+    assert by_tool["median"].iloc[0] == s.by_tool["median"].iloc[0]
+
+
+def test_streamed_top_k_matches_head_of_full_ranking(tmp_path):
+    rng = np.random.default_rng(1)
+    pws = ["".join(rng.choice(list("aB3!x"), rng.integers(1, 7))) for _ in range(400)]
+    (tmp_path / "in.txt").write_text("\n".join(pws), encoding="utf-8")
+
+    def run(out, **kw):
+        chunks = iter_scored_chunks(iter_text_chunks(tmp_path / "in.txt", chunk_size=37))
+        return export_streamed_artifacts(chunks, tmp_path / out, {}, **kw)
+
+    full = run("full")
+    top = run("top", top=25)
+    with open(full["ranked_csv"], encoding="utf-8") as f:
+        head = f.readlines()[:26]
+    with open(top["ranked_csv"], encoding="utf-8") as f:
+        assert f.readlines() == head
+    assert json.loads(Path(top["run_log_json"]).read_text(encoding="utf-8"))["rows"] == 400
+
+
+def test_streamed_ranking_merges_runs_in_bounded_passes(tmp_path, monkeypatch):
+    import oampass.analysis
+
+    pws = [f"pw{i % 37}x{i}" for i in range(300)] + ["same"] * 5
+    (tmp_path / "in.txt").write_text("\n".join(pws), encoding="utf-8")
+    full = score_chunk(pd.DataFrame({"Password": pws, "Label": "", "Tool": ""}))
+    opened = []
+    real_open = Path.open
+
+    def counting_open(self, *a, **kw):
+        f = real_open(self, *a, **kw)
+        if self.suffix == ".csv":
+            opened.append(f)
+        if sum(not x.closed for x in opened) > 4 + 1:  # fan-in inputs + the output
+            raise OSError(24, "Too many open files")
+        return f
+
+    # 3 rows per chunk -> ~100 runs, merged 4 at a time over several passes
+    monkeypatch.setattr(oampass.analysis.config, "SPILL_MERGE_FAN_IN", 4)
+    monkeypatch.setattr(Path, "open", counting_open)
+    rows = oampass.analysis.write_ranked_csv(
+        iter_scored_chunks(iter_text_chunks(tmp_path / "in.txt", chunk_size=3)), tmp_path / "ranked.csv"
+    )
+    monkeypatch.undo()
+    assert rows == len(pws)
+    ranked = pd.read_csv(tmp_path / "ranked.csv", keep_default_na=False)
+    expected = summarize(full).ranked
+    assert ranked["Password"].tolist() == expected["Password"].tolist()
+    assert ranked["Rank"].tolist() == list(range(1, len(pws) + 1))